@@ -0,0 +1,103 @@
+"""Накладные расходы логирования на один вызов BaseAPI.send_request
+
+Сеть не используется: на сессию пула монтируется адаптер, который сразу
+возвращает готовый ответ, поэтому замер показывает только работу клиента
+(логирование, разбор JSON, вложение Allure). Лог пишется в файл через
+QueueHandler, как в tests/conftest.py.
+
+    python -m benchmarks.bench_logging --memes 2000 --requests 500
+"""
+import argparse
+import json
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import requests
+from requests.adapters import BaseAdapter
+
+from endpoints.baseapi import BaseAPI
+from endpoints.get_meme import GetMeme
+
+BENCH_URL = "http://bench.local/"
+
+
+class StaticAdapter(BaseAdapter):
+    """Адаптер requests, отдающий один и тот же JSON без сети"""
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers["Content-Type"] = "application/json"
+        response._content = self.body
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def make_memes(count):
+    return {"data": [
+        {"id": i, "text": f"Meme {i}", "url": f"https://example.com/{i}.jpg",
+         "tags": ["bench", "test"], "info": {"colors": ["red"], "objects": ["text"]},
+         "updated_by": "bench_user"}
+        for i in range(count)
+    ]}
+
+
+def run(level, requests_count, log_file):
+    root = logging.getLogger()
+    root.handlers.clear()
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    root.setLevel(level)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    api = GetMeme()
+    api.get_all_memes_endpoint()
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        api.get_all_memes_endpoint()
+    elapsed = time.perf_counter() - started
+
+    listener.stop()
+    file_handler.close()
+    return elapsed / requests_count * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Накладные расходы логирования на запрос")
+    parser.add_argument("--memes", type=int, default=2000, help="Сколько мемов в ответе GET /meme")
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    body = json.dumps(make_memes(args.memes)).encode()
+    BaseAPI.url = BENCH_URL
+    BaseAPI.transport.session.mount(BENCH_URL, StaticAdapter(body))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name in ("INFO", "DEBUG"):
+            results[name] = run(getattr(logging, name), args.requests, f"{tmp}/{name}.log")
+
+    print(f"Ответ GET /meme: {args.memes} мемов, {len(body) / 1024:.0f} КБ")
+    for name, per_request in results.items():
+        print(f"  {name:<5}: {per_request:9.1f} мкс/запрос")
+    print(f"  DEBUG дороже INFO на {results['DEBUG'] - results['INFO']:.1f} мкс/запрос")
+
+
+if __name__ == "__main__":
+    main()
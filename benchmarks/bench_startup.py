@@ -0,0 +1,106 @@
+"""Время запуска: импорт клиента, сбор тестов и прогон одного теста
+
+Каждый замер - отдельный процесс Python, как при настоящем запуске, поэтому
+в результат входят импорты и вся работа при импорте модулей. Для каждого
+сценария печатаются минимум и медиана по --repeat запускам и отмечается,
+создал ли сценарий новые файлы в logs/ (при сборе тестов их быть не должно).
+
+    python -m benchmarks.bench_startup --repeat 10
+    python -m benchmarks.bench_startup --importtime 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(ROOT, "logs")
+
+ENDPOINTS = ("endpoints.authorization", "endpoints.create_meme", "endpoints.get_meme",
+             "endpoints.update_meme", "endpoints.delete_meme")
+SINGLE_TEST = "tests/test_memes.py::test_token_is_alive"
+
+
+def scenarios(history_db):
+    pytest_args = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--history-db", history_db]
+    return {
+        "python": [sys.executable, "-c", "pass"],
+        "import endpoints": [sys.executable, "-c", "; ".join(f"import {name}" for name in ENDPOINTS)],
+        "import conftest": [sys.executable, "-c", "import tests.conftest"],
+        "collect tests": pytest_args + ["--collect-only", "tests"],
+        "single test": pytest_args + ["--local-server", SINGLE_TEST],
+    }
+
+
+def log_files():
+    return set(os.listdir(LOG_DIR)) if os.path.isdir(LOG_DIR) else set()
+
+
+def measure(command, repeat):
+    durations = []
+    new_logs = set()
+    for _ in range(repeat):
+        before = log_files()
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        durations.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} завершился с кодом {result.returncode}:\n{result.stdout}"
+                               f"{result.stderr}")
+        new_logs |= log_files() - before
+    return {
+        "min_ms": round(min(durations) * 1000, 1),
+        "median_ms": round(statistics.median(durations) * 1000, 1),
+        "new_log_files": len(new_logs),
+    }
+
+
+def import_profile(modules, top):
+    """Самые дорогие по суммарному времени модули из python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "; ".join(f"import {name}" for name in modules)],
+                            cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска клиента и тестов")
+    parser.add_argument("--repeat", type=int, default=5, help="Сколько раз запускать каждый сценарий")
+    parser.add_argument("--only", action="append", help="Запустить только этот сценарий (можно несколько)")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Показать N самых дорогих импортов модулей эндпоинтов")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, command in scenarios(os.path.join(tmp, "history.sqlite3")).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(command, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"Запусков на сценарий: {args.repeat}")
+        for name, result in results.items():
+            note = f", новых файлов в logs/: {result['new_log_files']}" if result["new_log_files"] else ""
+            print(f"  {name:<17} min {result['min_ms']:8.1f} мс, медиана {result['median_ms']:8.1f} мс{note}")
+    if args.importtime:
+        print("Импорт модулей эндпоинтов, мс (суммарно / собственное):")
+        for cumulative_us, self_us, name in import_profile(ENDPOINTS, args.importtime):
+            print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Сравнение транспортов BaseAPI (endpoints/transports.py) на локальном Memes API
+
+Каждый транспорт получает свой свежий локальный Memes API с --memes мемами:
+requests и urllib3 ходят в него по HTTP, memory вызывает обработчик MemesApp
+напрямую. POST /meme замеряется последним, чтобы список мемов в GET /meme
+был одинаковым для всех транспортов. Операции выполняются через классы
+эндпоинтов, поэтому в замер входит весь путь send_request (заголовки,
+повторы, замеры фаз, логирование, разбор JSON). Файловый лог не пишется:
+root-логгер на уровне WARNING.
+
+    python -m benchmarks.bench_transports --requests 2000
+    python -m benchmarks.bench_transports --threads 8 --only requests --only urllib3
+"""
+import argparse
+import json
+import math
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from endpoints.authorization import Authorization
+from endpoints.baseapi import BaseAPI
+from endpoints.create_meme import CreateMeme
+from endpoints.credentials import credentials
+from endpoints.get_meme import GetMeme
+from endpoints.transports import TRANSPORTS, InMemoryTransport
+from support.memes_server import MemesServer
+from support.payloads import SAMPLE_MEME_PAYLOAD
+
+
+def build_transport(name, server, pool_maxsize):
+    if name == InMemoryTransport.name:
+        return InMemoryTransport(server.app.handle)
+    return TRANSPORTS[name](pool_maxsize=pool_maxsize)
+
+
+def operations(meme_id):
+    get_meme, create_meme = GetMeme(), CreateMeme()
+    return {
+        "GET /meme/{id}": lambda: get_meme.get_meme_by_id_endpoint(meme_id),
+        "GET /meme": get_meme.get_all_memes_endpoint,
+        "POST /meme": lambda: create_meme.create_new_meme(SAMPLE_MEME_PAYLOAD),
+    }
+
+
+def measure(operation, requests_count, threads):
+    """Время каждого вызова, секунды, и общее время всех вызовов"""
+    def worker(count):
+        durations = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = operation()
+            durations.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"Неожиданный ответ {response.status_code}: {response.text[:200]}")
+        return durations
+
+    shares = [requests_count // threads + (i < requests_count % threads) for i in range(threads)]
+    started = time.perf_counter()
+    if threads == 1:
+        durations = worker(requests_count)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            durations = [value for chunk in pool.map(worker, shares) for value in chunk]
+    return durations, time.perf_counter() - started
+
+
+def summarize(durations, elapsed):
+    ordered = sorted(durations)
+    return {
+        "median_us": round(statistics.median(ordered) * 1e6, 1),
+        "p95_us": round(ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)] * 1e6, 1),
+        "min_us": round(ordered[0] * 1e6, 1),
+        "rps": round(len(ordered) / elapsed, 1),
+    }
+
+
+def run(name, args):
+    server = MemesServer().start()
+    BaseAPI.url = server.url
+    BaseAPI.transport = build_transport(name, server, max(args.threads, 10))
+    try:
+        credentials.set(Authorization().authorization({"name": f"bench_{name}"}).json()["token"])
+        for _ in range(max(args.memes, 1)):
+            meme_id = CreateMeme().create_new_meme(SAMPLE_MEME_PAYLOAD).json()["id"]
+        results = {}
+        for operation_name, operation in operations(meme_id).items():
+            if args.operation and operation_name not in args.operation:
+                continue
+            measure(operation, args.warmup, 1)
+            results[operation_name] = summarize(*measure(operation, args.requests, args.threads))
+        results["connections"] = BaseAPI.transport.stats.as_dict()
+        return results
+    finally:
+        BaseAPI.transport.close()
+        credentials.set(None)
+        server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение транспортов BaseAPI")
+    parser.add_argument("--requests", type=int, default=1000, help="Сколько вызовов каждой операции")
+    parser.add_argument("--warmup", type=int, default=50, help="Сколько вызовов перед замером")
+    parser.add_argument("--memes", type=int, default=100, help="Сколько мемов создать до замера (не меньше 1)")
+    parser.add_argument("--threads", type=int, default=1, help="Сколько потоков отправляют запросы")
+    parser.add_argument("--only", action="append", choices=sorted(TRANSPORTS),
+                        help="Замерить только этот транспорт (можно несколько)")
+    parser.add_argument("--operation", action="append",
+                        help='Замерить только эту операцию, например "GET /meme/{id}" (можно несколько)')
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    results = {name: run(name, args) for name in TRANSPORTS if not args.only or name in args.only}
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return results
+    print(f"Вызовов на операцию: {args.requests}, потоков: {args.threads}, мемов в GET /meme: {args.memes}")
+    baseline = results.get("requests")
+    for name, result in results.items():
+        connections = result["connections"]
+        print(f"{name} (соединений открыто {connections['opened']}, переиспользовано {connections['reused']}):")
+        for operation_name, summary in result.items():
+            if operation_name == "connections":
+                continue
+            note = ""
+            if baseline is not None and name != "requests" and operation_name in baseline:
+                note = f"  x{baseline[operation_name]['median_us'] / summary['median_us']:.2f} к requests"
+            print(f"  {operation_name:<15} медиана {summary['median_us']:8.1f} мкс, p95 {summary['p95_us']:8.1f} мкс, "
+                  f"{summary['rps']:9.1f} запр/с{note}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
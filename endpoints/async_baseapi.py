@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+from requests.structures import CaseInsensitiveDict
+
+from endpoints.baseapi import BaseAPI
+from endpoints.cassette import cassette
+from endpoints.deadline import PAUSE, current_deadline, resolve_timeout
+from endpoints.timing import current_timing, timings
+from endpoints.response import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResponse:
+    """Полностью прочитанный ответ aiohttp с интерфейсом requests.Response"""
+
+    def __init__(self, method, url, status_code, reason, headers, content, request_body=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.request = SimpleNamespace(method=method, url=url, body=request_body)
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _timing_trace_config():
+    """Ожидание соединения из пула и подключение попадают в фазы acquire/connect RequestTiming"""
+    import aiohttp
+
+    def phase(name):
+        async def on_start(session, ctx, params):
+            ctx.started = time.perf_counter()
+
+        async def on_end(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.add(name, time.perf_counter() - ctx.started)
+        return on_start, on_end
+
+    trace_config = aiohttp.TraceConfig()
+    for name, start, end in (
+        ("acquire", trace_config.on_connection_queued_start, trace_config.on_connection_queued_end),
+        ("connect", trace_config.on_connection_create_start, trace_config.on_connection_create_end),
+    ):
+        on_start, on_end = phase(name)
+        start.append(on_start)
+        end.append(on_end)
+    return trace_config
+
+
+class AsyncHttpPool:
+    """Пул соединений aiohttp; у каждого event loop своя сессия, close закрывает все"""
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=15):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions = {}
+
+    def session(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[_timing_trace_config()])
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Закрывает сессии всех event loop: текущего - здесь, других работающих - в их потоке"""
+        sessions, self._sessions = self._sessions, {}
+        current = asyncio.get_running_loop()
+        for loop, session in sessions.items():
+            if session.closed:
+                continue
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+            else:
+                # Остановленный loop не выполнит закрытие, соединения закроются вместе с процессом
+                logger.warning("Сессия aiohttp остановленного event loop не закрыта")
+
+
+class AsyncBaseAPI(BaseAPI):
+    """Асинхронный аналог BaseAPI: тот же retry, логирование и Allure, но без блокировок"""
+
+    async_pool = AsyncHttpPool()
+
+    async def send_request(self, method="GET", endpoint="", retries=None, backoff=None, headers=None, timeout=None,
+                           **kwargs):
+        import aiohttp
+
+        headers = self._build_headers(headers)
+        full_url = self.url + endpoint
+        self._log_request(method, endpoint, full_url, kwargs)
+        request_body = json.dumps(kwargs["json"]).encode() if kwargs.get("json") is not None else kwargs.get("data")
+        cassette_key = cassette.key(method, endpoint, headers, kwargs) if cassette.active else None
+        if cassette.replaying:
+            recorded = cassette.play(cassette_key)
+            if recorded is not None:
+                return self._replay(recorded, method, full_url, headers, kwargs)
+        deadline = current_deadline()
+        call = self.retry_policy.start(method, endpoint, retries, backoff, deadline)
+
+        with timings.measure(call.key) as timing:
+            while True:
+                if deadline is not None:
+                    deadline.check(call.key)
+                connect, read = resolve_timeout(timeout, self.timeout, deadline)
+                client_timeout = aiohttp.ClientTimeout(
+                    total=max(deadline.remaining(), 0.001) if deadline is not None else None,
+                    sock_connect=connect, sock_read=read,
+                )
+                started = time.monotonic()
+                try:
+                    r = await self._fetch(timing, method, full_url, request_body, headers=headers,
+                                          timeout=client_timeout, **kwargs)
+                except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as ex:
+                    self._record_attempt(deadline, call, started, type(ex).__name__)
+                    logger.error("Сетевая ошибка '%s', попытка %s/%s", ex, call.attempt, call.max_attempts)
+                    delay = call.on_error(ex, connect_error=isinstance(ex, aiohttp.ClientConnectorError))
+                    if delay is None:
+                        if deadline is not None and deadline.expired:
+                            raise deadline.exceeded(call.key) from ex
+                        raise
+                    await self._async_pause(deadline, delay)
+                    continue
+
+                self._record_attempt(deadline, call, started, r.status_code)
+                self._log_response(r)
+                delay = call.on_response(r)
+                if delay is None:
+                    self._handle_response(r)
+                    if cassette.recording:
+                        cassette.record(cassette_key, r)
+                    return r
+                await self._async_pause(deadline, delay)
+
+    @staticmethod
+    def _replayed_response(recorded, method, full_url, headers, kwargs):
+        request_body = json.dumps(kwargs["json"]).encode() if kwargs.get("json") is not None else kwargs.get("data")
+        return AsyncResponse(method, full_url, recorded["status"], recorded["reason"],
+                             CaseInsensitiveDict(recorded["headers"]),
+                             recorded["content"], request_body)
+
+    async def _fetch(self, timing, method, full_url, request_body, **kwargs):
+        timing.attempts += 1
+        session = self.async_pool.session()
+        connection_time = timing.acquire + timing.connect
+        started = time.perf_counter()
+        try:
+            # Ответ возвращается после заголовков, тело читается отдельно
+            resp = await session.request(method, full_url, trace_request_ctx=timing, **kwargs)
+        finally:
+            timing.add("ttfb", time.perf_counter() - started - (timing.acquire + timing.connect - connection_time))
+        started = time.perf_counter()
+        try:
+            content = await resp.read()
+        finally:
+            resp.release()
+            timing.add("download", time.perf_counter() - started)
+        timing.status = resp.status
+        return ApiResponse(AsyncResponse(
+            method, str(resp.url), resp.status, resp.reason, resp.headers, content, request_body,
+        ))
+
+    @staticmethod
+    async def _async_pause(deadline, delay):
+        await asyncio.sleep(delay)
+        if deadline is not None:
+            deadline.record(PAUSE, delay)
+        timing = current_timing()
+        if timing is not None:
+            timing.add("retry_wait", delay)
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import queue
+import threading
+import zlib
+import logging
+
+from endpoints.log_utils import truncated_json
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AttachmentPipeline:
+    """Вложения Allure с ограничением размера, дедупликацией и фоновой записью
+
+    - каждое вложение обрезается до max_attachment_bytes, а на один тест
+      приходится не больше max_test_bytes (остальное отбрасывается);
+    - вложение регистрируется через allure.attach в момент вызова attach,
+      поэтому попадает в текущий шаг, фикстуру или тест;
+    - файлы пишет фоновый поток; одинаковые тела сохраняются в allure-results
+      один раз, повторные файлы - жесткие ссылки на первый;
+    - при sample_rate < 1 вложения прошедших тестов сохраняются только у доли
+      тестов. У остальных вложения фазы (setup, call, teardown) копятся до ее
+      конца и сохраняются, только если фаза упала.
+
+    Пока пайплайн не привязан к отчету Allure (bind), attach ничего не делает.
+    """
+
+    def __init__(self, max_attachment_bytes=256 * 1024, max_test_bytes=2 * 1024 * 1024, sample_rate=1.0):
+        self.max_attachment_bytes = max_attachment_bytes
+        self.max_test_bytes = max_test_bytes
+        self.sample_rate = sample_rate
+        self.stats = {"attached": 0, "deduplicated": 0, "truncated": 0, "dropped": 0, "sampled_out": 0}
+        self._allure = None
+        self._file_logger = None
+        self._writer = None
+        self._test_bytes = 0
+        self._sampled = True
+        self._buffer = []
+
+    @property
+    def enabled(self):
+        return self._allure is not None
+
+    def bind(self, report_dir, **settings):
+        """Включает вложения; запись файлов вложений allure-pytest переходит в фоновый поток"""
+        import allure
+        import allure_commons
+        from allure_commons.logger import AllureFileLogger
+
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self._allure = allure
+        self._file_logger = next((plugin for plugin in allure_commons.plugin_manager.get_plugins()
+                                  if type(plugin) is AllureFileLogger), None)
+        if self._file_logger is not None:
+            self._writer = _background_file_logger(report_dir, self.stats)
+            allure_commons.plugin_manager.unregister(self._file_logger)
+            allure_commons.plugin_manager.register(self._writer)
+
+    def close(self):
+        if self._writer is not None:
+            import allure_commons
+
+            self._writer.close()
+            allure_commons.plugin_manager.unregister(self._writer)
+            allure_commons.plugin_manager.register(self._file_logger)
+            self._writer = self._file_logger = None
+            logger.debug("Вложения Allure: %s", self.stats)
+        self._allure = None
+
+    def attach(self, body, name, attachment_type="text"):
+        """attachment_type - allure.attachment_type или его имя ("text", "json", ...)"""
+        if not self.enabled:
+            return
+        if isinstance(attachment_type, str):
+            attachment_type = _attachment_type(attachment_type)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if len(body) > self.max_attachment_bytes:
+            self.stats["truncated"] += 1
+            note = f"\n... [обрезано: {self.max_attachment_bytes} из {len(body)} байт]".encode("utf-8")
+            body = body[:self.max_attachment_bytes] + note
+            attachment_type = _attachment_type("text")
+        if self._test_bytes + len(body) > self.max_test_bytes:
+            self.stats["dropped"] += 1
+            return
+        self._test_bytes += len(body)
+
+        if self._sampled:
+            self._register(body, name, attachment_type)
+        else:
+            # Сохранится, только если текущая фаза упадет
+            self._buffer.append((body, name, attachment_type))
+
+    def attach_json(self, data, name):
+        """JSON-вложение; большой JSON сериализуется только до лимита вложения"""
+        if self.enabled:
+            self.attach(truncated_json(data, self.max_attachment_bytes, indent=None), name, "json")
+
+    def start_test(self, nodeid):
+        # Детерминированная выборка: один и тот же тест попадает в нее в каждом прогоне
+        self._sampled = self.sample_rate >= 1.0 or zlib.crc32(nodeid.encode("utf-8")) / 2 ** 32 < self.sample_rate
+        self._test_bytes = 0
+
+    def finish_phase(self, failed):
+        """Конец setup, call или teardown: вложения упавшей фазы сохраняются, остальные отбрасываются"""
+        buffer, self._buffer = self._buffer, []
+        for body, name, attachment_type in buffer:
+            if failed:
+                self._register(body, name, attachment_type)
+            else:
+                self.stats["sampled_out"] += 1
+
+    def _register(self, body, name, attachment_type):
+        try:
+            self._allure.attach(body, name=name, attachment_type=attachment_type)
+        except KeyError:
+            # Вне теста и фикстуры (например, в хуках конца сессии) прикладывать некуда
+            self.stats["dropped"] += 1
+            return
+        self.stats["attached"] += 1
+
+
+def _background_file_logger(report_dir, stats):
+    from allure_commons import hookimpl
+    from allure_commons.logger import AllureFileLogger
+
+    class BackgroundFileLogger(AllureFileLogger):
+        """AllureFileLogger, который пишет тела вложений в фоновом потоке
+
+        Тест только кладет тело в очередь. Тело, уже записанное в этом
+        прогоне, не пишется повторно: новый файл - жесткая ссылка на первый.
+        """
+
+        def __init__(self):
+            super().__init__(report_dir)
+            self._written = {}
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._write_loop, name="allure-attachments", daemon=True)
+            self._thread.start()
+
+        @hookimpl
+        def report_attached_data(self, body, file_name):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            self._queue.put((file_name, body))
+
+        def close(self):
+            self._queue.put(_STOP)
+            self._thread.join()
+
+        def _write_loop(self):
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    return
+                file_name, body = item
+                final_path = os.path.join(self._report_dir, file_name)
+                key = (hashlib.blake2b(body, digest_size=16).digest(), os.path.splitext(file_name)[1])
+                try:
+                    source = self._written.get(key)
+                    if source is not None and _link(source, final_path):
+                        stats["deduplicated"] += 1
+                        continue
+                    tmp_path = f"{final_path}.tmp"
+                    with open(tmp_path, "wb") as fh:
+                        fh.write(body)
+                    os.replace(tmp_path, final_path)
+                    self._written[key] = final_path
+                except OSError as ex:
+                    logger.error("Не удалось записать вложение %s: %s", file_name, ex)
+
+    return BackgroundFileLogger()
+
+
+def _link(source, target):
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        # Файловая система без жестких ссылок: файл будет записан целиком
+        return False
+
+
+def _attachment_type(name):
+    # allure импортируется только при включенном отчете
+    from allure_commons.types import AttachmentType
+
+    return AttachmentType[name.upper()]
+
+
+attachments = AttachmentPipeline()
@@ -1,20 +1,40 @@
-import allure
 from endpoints.baseapi import BaseAPI
+from endpoints.credentials import credentials
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.schemas import TOKEN
+from endpoints.steps import async_step, step
 
 
 class Authorization(BaseAPI):
-    token = None
 
-    @allure.step("Получение токена авторизации")
+    @step("Получение токена авторизации")
     def authorization(self, payload):
-        response = self.send_request(method="POST", endpoint="/authorize", json=payload)
+        response = self._check_schema(self.send_request(method="POST", endpoint="/authorize", json=payload), TOKEN)
         data = response.json()
         token = data.get("token")
         if not token:
             raise Exception("Токен не найден в ответе!")
-        BaseAPI.token = token
+        credentials.set(token)
         return response
 
-    @allure.step("Проверка жизни токена")
+    @step("Проверка жизни токена")
     def is_alive(self, token):
         return self.send_request(method="GET", endpoint=f"/authorize/{token}")
+
+
+class AsyncAuthorization(AsyncBaseAPI):
+
+    @async_step("Получение токена авторизации")
+    async def authorization(self, payload):
+        response = self._check_schema(await self.send_request(method="POST", endpoint="/authorize", json=payload),
+                                      TOKEN)
+        data = response.json()
+        token = data.get("token")
+        if not token:
+            raise Exception("Токен не найден в ответе!")
+        credentials.set(token)
+        return response
+
+    @async_step("Проверка жизни токена")
+    async def is_alive(self, token):
+        return await self.send_request(method="GET", endpoint=f"/authorize/{token}")
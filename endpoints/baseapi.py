@@ -1,8 +1,19 @@
 import requests
-import allure
-import json
 import time
 import logging
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import NewConnectionError
+
+from endpoints.attachments import attachments
+from endpoints.cassette import cassette
+from endpoints.credentials import credentials, TokenAttribute
+from endpoints.deadline import DEFAULT_TIMEOUT, PAUSE, current_deadline, resolve_timeout
+from endpoints.http_pool import HttpPool
+from endpoints.log_utils import LazyBody
+from endpoints.response import ApiResponse
+from endpoints.retry import RetryPolicy, endpoint_template
+from endpoints.schemas import SchemaError
+from endpoints.timing import current_timing, timings
 
 # Получаем logger для API классов
 logger = logging.getLogger(__name__)
@@ -11,64 +22,202 @@ logger = logging.getLogger(__name__)
 class BaseAPI:
 
     url = "http://memesapi.course.qa-practice.com/"
-    response = None
-    json_response = None
-    token = None
+    # Токен хранится в credentials: общий для сессии или свой внутри credentials.use()
+    token = TokenAttribute(credentials)
+    # Транспорт запросов (endpoints/transports.py), общий для всех эндпоинтов;
+    # по умолчанию - пул соединений requests. Выбирается опцией --transport
+    transport = HttpPool()
+    # Повторы, бюджет повторов и автоматы эндпоинтов - общие для всех классов
+    retry_policy = RetryPolicy()
+    # Таймауты (подключение, чтение), секунд; наследники могут задать свои
+    timeout = DEFAULT_TIMEOUT
+    # Проверять успешные ответы на схемы (endpoints.schemas); включается опцией --strict-schemas
+    strict_schemas = False
 
-    def send_request(self, method="GET", endpoint="", retries=3, backoff=1, headers=None, **kwargs):
-        headers = headers or {}
+    def send_request(self, method="GET", endpoint="", retries=None, backoff=None, headers=None, timeout=None,
+                     **kwargs):
+        # retries/backoff переопределяют max_attempts/base_delay политики для одного вызова
+        headers = self._build_headers(headers)
         full_url = self.url + endpoint
+        self._log_request(method, endpoint, full_url, kwargs)
+        cassette_key = cassette.key(method, endpoint, headers, kwargs) if cassette.active else None
+        if cassette.replaying:
+            recorded = cassette.play(cassette_key)
+            if recorded is not None:
+                return self._replay(recorded, method, full_url, headers, kwargs)
+        r = self._send(method, endpoint, full_url, headers, retries, backoff, timeout, kwargs)
+        if cassette.recording:
+            cassette.record(cassette_key, r)
+        return r
+
+    def open_stream(self, method="GET", endpoint="", retries=None, backoff=None, headers=None, timeout=None,
+                    **kwargs):
+        """Как send_request, но возвращает requests.Response сразу после заголовков
+
+        Тело не читается и не разбирается: вызывающий читает его сам
+        (iter_content) и обязан закрыть ответ. Повторы, дедлайн и таймауты те
+        же, что у send_request; в фазы попадает время до первого байта.
+        Кассеты не поддерживаются - для них нужен send_request.
+        """
+        headers = self._build_headers(headers)
+        full_url = self.url + endpoint
+        self._log_request(method, endpoint, full_url, kwargs)
+        return self._send(method, endpoint, full_url, headers, retries, backoff, timeout, kwargs, stream=True)
+
+    def _send(self, method, endpoint, full_url, headers, retries, backoff, timeout, kwargs, stream=False):
+        deadline = current_deadline()
+        call = self.retry_policy.start(method, endpoint, retries, backoff, deadline)
+
+        with timings.measure(call.key) as timing:
+            while True:
+                if deadline is not None:
+                    deadline.check(call.key)
+                started = time.monotonic()
+                try:
+                    r = self._fetch(timing, method, full_url, stream=stream, headers=headers,
+                                    timeout=resolve_timeout(timeout, self.timeout, deadline), **kwargs)
+                except (requests.Timeout, requests.ConnectionError) as ex:
+                    self._record_attempt(deadline, call, started, type(ex).__name__)
+                    logger.error("Сетевая ошибка '%s', попытка %s/%s", ex, call.attempt, call.max_attempts)
+                    delay = call.on_error(ex, connect_error=self._is_connect_error(ex))
+                    if delay is None:
+                        if deadline is not None and deadline.expired:
+                            raise deadline.exceeded(call.key) from ex
+                        raise
+                    self._pause(deadline, delay)
+                    continue
+
+                self._record_attempt(deadline, call, started, r.status_code)
+                self._log_response(r)
+                delay = call.on_response(r)
+                if delay is None:
+                    if not stream:
+                        self._handle_response(r)
+                    return r
+                if stream:
+                    r.close()
+                self._pause(deadline, delay)
+
+    def _replay(self, recorded, method, full_url, headers, kwargs):
+        # Ответ из кассеты проходит то же логирование и вложения, что и ответ из сети
+        r = ApiResponse(self._replayed_response(recorded, method, full_url, headers, kwargs))
+        self._log_response(r)
+        self._handle_response(r)
+        return r
+
+    @staticmethod
+    def _replayed_response(recorded, method, full_url, headers, kwargs):
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response._content = recorded["content"]
+        response.url = full_url
+        response.request = requests.Request(
+            method, full_url, headers=headers, json=kwargs.get("json"), data=kwargs.get("data"),
+            params=kwargs.get("params"),
+        ).prepare()
+        return response
 
-        if BaseAPI.token:
-            headers["Authorization"] = f'{BaseAPI.token}'
+    def _fetch(self, timing, method, full_url, stream=False, **kwargs):
+        # stream=True: запрос возвращается после заголовков, тело читается отдельно,
+        # поэтому время до первого байта и загрузка тела замеряются по отдельности.
+        # Параметр stream - для open_stream: тогда тело не читается вовсе
+        timing.attempts += 1
+        connection_time = timing.acquire + timing.connect
+        started = time.perf_counter()
+        try:
+            raw = self.transport.request(method, full_url, stream=True, **kwargs)
+        finally:
+            timing.add("ttfb", time.perf_counter() - started - (timing.acquire + timing.connect - connection_time))
+        if stream:
+            timing.status = raw.status_code
+            return raw
+        started = time.perf_counter()
+        try:
+            raw.content
+        finally:
+            timing.add("download", time.perf_counter() - started)
+        timing.status = raw.status_code
+        return ApiResponse(raw)
 
-        # Логирование запроса
-        logger.info(f"→ HTTP {method} {full_url}")
-        
-        # Логирование тела запроса, если есть
+    @staticmethod
+    def _record_attempt(deadline, call, started, outcome):
+        if deadline is not None:
+            deadline.record(call.key, time.monotonic() - started, outcome)
+
+    @staticmethod
+    def _pause(deadline, delay):
+        time.sleep(delay)
+        if deadline is not None:
+            deadline.record(PAUSE, delay)
+        timing = current_timing()
+        if timing is not None:
+            timing.add("retry_wait", delay)
+
+    def _build_headers(self, headers):
+        headers = dict(headers or {})
+        token = credentials.get()
+        if token:
+            headers["Authorization"] = f'{token}'
+        return headers
+
+    @staticmethod
+    def _log_request(method, endpoint, full_url, kwargs):
+        # Логирование запроса: аргументы форматируются, только если уровень включен.
+        # Шаблон эндпоинта попадает в структурированный лог и индекс сегментов логов
+        extra = {"endpoint": f"{method.upper()} {endpoint_template(endpoint)}"}
+        logger.info("→ HTTP %s %s", method, full_url, extra=extra)
+
+        # Логирование тела запроса, если есть (LazyBody сериализует с обрезкой)
         if 'json' in kwargs and kwargs['json']:
-            logger.debug(f"Request body: {json.dumps(kwargs['json'], ensure_ascii=False, indent=2)}")
+            logger.debug("Request body: %s", LazyBody(kwargs['json']), extra=extra)
         elif 'data' in kwargs:
-            logger.debug(f"Request data: {kwargs['data']}")
-
-        for attempt in range(1, retries + 1):
-            try:
-                r = requests.request(method, full_url, headers=headers, **kwargs)
-                self.response = r
-
-                # Логирование ответа
-                logger.info(f"← Response: {r.status_code} {r.reason}")
-                
-                if 500 <= r.status_code < 600 and attempt < retries:
-                    logger.warning(f"[Retry] Ошибка {r.status_code}, попытка {attempt}/{retries}")
-                    time.sleep(backoff * attempt)
-                    continue
+            logger.debug("Request data: %s", LazyBody(kwargs['data']), extra=extra)
+
+    @staticmethod
+    def _is_connect_error(ex):
+        # Соединение не установлено - запрос точно не дошел до сервера
+        reason = getattr(ex.args[0], "reason", None) if ex.args else None
+        return isinstance(ex, requests.ConnectTimeout) or isinstance(reason, NewConnectionError)
+
+    def _check_schema(self, r, schema, many=False):
+        """В строгом режиме проверяет JSON успешного ответа на схему и сообщает все нарушения сразу"""
+        if not self.strict_schemas or r.status_code != 200:
+            return r
+        try:
+            data = r.json()
+        except ValueError:
+            raise SchemaError(schema.name, ["$: тело ответа не является JSON"])
+        if many:
+            schema.validate_many(data)
+        else:
+            schema.validate(data)
+        return r
+
+    @staticmethod
+    def _log_response(r):
+        logger.info("← Response: %s %s", r.status_code, r.reason, extra={"status": r.status_code})
+
+    @staticmethod
+    def _handle_response(r):
+        # Состояние ответа живет только в ApiResponse: экземпляры можно делить между потоками
+        if not r.is_json:
+            logger.debug("Content-Type не JSON: %s", r.headers.get('Content-Type', 'unknown'))
+            return
+        # JSON декодируется один раз, дальше все берут его из кэша ApiResponse
+        started = time.perf_counter()
+        try:
+            data = r.json()
+        except ValueError:
+            logger.error("Ошибка: ответ не является валидным JSON!")
+            return
+        finally:
+            timing = current_timing()
+            if timing is not None:
+                timing.add("decode", time.perf_counter() - started)
+        logger.debug("Response JSON: %s", LazyBody(data))
 
-                if "application/json" in r.headers.get("Content-Type", "").lower():
-                    try: 
-                        self.json_response = r.json()
-                        logger.debug(f"Response JSON: {json.dumps(self.json_response, ensure_ascii=False, indent=2)[:500]}...")
-                    except ValueError:
-                        self.json_response = None
-                        logger.error("Ошибка: ответ не является валидным JSON!")
-                else:
-                    self.json_response = None
-                    logger.debug(f"Content-Type не JSON: {r.headers.get('Content-Type', 'unknown')}")
-
-                if self.json_response is not None:
-                    allure.attach(
-                        json.dumps(self.json_response, indent=2, ensure_ascii=False),
-                        name="Response JSON",
-                        attachment_type=allure.attachment_type.JSON
-                    )
-                
-                return r
-
-            except (requests.Timeout, requests.ConnectionError) as ex:
-                logger.error(f"[Retry] Сетевая ошибка '{ex}', попытка {attempt}/{retries}")
-                if attempt < retries: 
-                    time.sleep(backoff * attempt)
-                else: 
-                    raise
-
-        raise Exception("Запрос не удался после всех retry")
+        if data is not None:
+            # Вложение - исходное тело ответа: без повторной сериализации, с лимитом размера
+            attachments.attach(r.content, name="Response JSON", attachment_type="json")
@@ -0,0 +1,190 @@
+import glob
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+import logging
+
+from endpoints.credentials import credentials
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "strict")
+
+# Заголовки ответа, которые меняются от запуска к запуску и не нужны при воспроизведении
+_VOLATILE_HEADERS = {"date", "server", "connection", "keep-alive", "content-length", "transfer-encoding"}
+
+
+class CassetteMiss(Exception):
+    """В режиме strict запрос не найден в кассете"""
+
+
+class Cassette:
+    """Запись и воспроизведение трафика BaseAPI.send_request
+
+    Кассета - два файла: <path>.data с пожатыми zlib записями подряд и
+    <path>.index.json с ключом запроса -> [[смещение, длина], ...]. При
+    воспроизведении индекс читается при первом запросе, а .data отображается
+    в память (mmap), так что запись распаковывается только когда нужна.
+
+    Ключ запроса - метод, путь и тело, в которых id мемов заменены на
+    псевдонимы #1, #2, ... в порядке появления, а текущий токен - на {token}.
+    Одинаковые ключи воспроизводятся по порядку записи, после последней
+    записи повторяется последняя.
+
+    Режимы: record - запросы идут в сеть и записываются; replay - ответы
+    берутся из кассеты, ненайденные запросы идут в сеть; strict - ненайденный
+    запрос завершается CassetteMiss.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.mode = None
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._record_base = None
+        self._aliases = {}
+        self._cursors = {}
+        self._index = None
+        self._maps = []
+        self._files = []
+        self._data = None
+        self._offset = 0
+
+    @property
+    def active(self):
+        return self.mode is not None
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode in ("replay", "strict")
+
+    def open(self, path, mode, shard=None):
+        """shard - суффикс файлов при записи из нескольких процессов (воркеры xdist)"""
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим кассеты: {mode}")
+        self.close()
+        self.path = path
+        self.mode = mode
+        if self.recording:
+            base = f"{path}.{shard}" if shard else path
+            os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+            self._record_base = base
+            self._data = open(f"{base}.data", "wb")
+            self._index = {}
+        logger.info("Кассета %s открыта в режиме %s", path, mode)
+
+    def close(self):
+        with self._lock:
+            if self.recording and self._data is not None:
+                self._data.close()
+                tmp_path = f"{self._record_base}.index.json.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    json.dump(self._index, fh, ensure_ascii=False)
+                os.replace(tmp_path, f"{self._record_base}.index.json")
+            for mapped in self._maps:
+                if isinstance(mapped, mmap.mmap):
+                    mapped.close()
+            for fh in self._files:
+                fh.close()
+            if self.mode is not None:
+                logger.info("Кассета %s закрыта: %s", self.path, self.stats)
+            self.mode = None
+            self._reset()
+
+    def key(self, method, endpoint, headers, kwargs):
+        token = credentials.get()
+        with self._lock:
+            segments = []
+            for segment in endpoint.split("?", 1)[0].strip("/").split("/"):
+                if token and segment == token:
+                    segments.append("{token}")
+                elif segment.isdigit():
+                    segments.append(self._alias(int(segment)))
+                else:
+                    segments.append(segment)
+            body = kwargs.get("json")
+            body = self._normalize(body) if body is not None else kwargs.get("data")
+        auth = headers.get("Authorization")
+        auth = "none" if auth is None else "token" if auth == token else f"other:{auth}"
+        payload = json.dumps([body, kwargs.get("params"), auth], sort_keys=True, default=str, ensure_ascii=False)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{method.upper()} /{'/'.join(segments)} {digest}"
+
+    def play(self, key):
+        """Записанный ответ {status, reason, headers, content} или None"""
+        with self._lock:
+            if self._index is None:
+                self._load()
+            entries = self._index.get(key)
+            if not entries:
+                self.stats["missed"] += 1
+                if self.mode == "strict":
+                    raise CassetteMiss(f"Запрос {key} не найден в кассете {self.path}")
+                logger.warning("Кассета: запрос %s не найден, отправляется в сеть", key)
+                return None
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+            shard, offset, length = entries[min(position, len(entries) - 1)]
+            self.stats["replayed"] += 1
+            blob = self._maps[shard][offset:offset + length]
+        meta, _, content = zlib.decompress(blob).partition(b"\n")
+        recorded = json.loads(meta)
+        recorded["content"] = content
+        return recorded
+
+    def record(self, key, response):
+        meta = json.dumps({
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in _VOLATILE_HEADERS},
+        }, ensure_ascii=False).encode("utf-8")
+        blob = zlib.compress(meta + b"\n" + response.content)
+        with self._lock:
+            self._data.write(blob)
+            self._index.setdefault(key, []).append([0, self._offset, len(blob)])
+            self._offset += len(blob)
+            self.stats["recorded"] += 1
+
+    def _load(self):
+        # Основной файл и файлы воркеров xdist: <path>.index.json, <path>.gw0.index.json, ...
+        index_paths = sorted(glob.glob(f"{glob.escape(self.path)}.index.json")
+                             + glob.glob(f"{glob.escape(self.path)}.gw*.index.json"))
+        if not index_paths:
+            raise FileNotFoundError(f"Кассета {self.path} не найдена")
+        self._index = {}
+        for shard, index_path in enumerate(index_paths):
+            data_path = index_path[:-len(".index.json")] + ".data"
+            fh = open(data_path, "rb")
+            self._files.append(fh)
+            self._maps.append(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(data_path) else b"")
+            with open(index_path, encoding="utf-8") as index_fh:
+                for key, entries in json.load(index_fh).items():
+                    self._index.setdefault(key, []).extend([shard, offset, length] for _, offset, length in entries)
+
+    def _alias(self, meme_id):
+        alias = self._aliases.get(meme_id)
+        if alias is None:
+            alias = self._aliases[meme_id] = f"#{len(self._aliases) + 1}"
+        return alias
+
+    def _normalize(self, body):
+        if isinstance(body, dict):
+            return {name: self._alias(value) if name == "id" and isinstance(value, int) and not isinstance(value, bool)
+                    else self._normalize(value) for name, value in body.items()}
+        if isinstance(body, list):
+            return [self._normalize(value) for value in body]
+        return body
+
+
+cassette = Cassette()
@@ -0,0 +1,68 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class CleanupRegistry:
+    """Мемы, созданные за сессию и еще не удаленные
+
+    CreateMeme записывает сюда id каждого созданного мема, DeleteMeme
+    вычеркивает удаленные. В конце сессии drain() удаляет оставшиеся
+    параллельно, поэтому тестам не нужно удалять свои мемы сразу.
+    """
+
+    def __init__(self):
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+    def add(self, meme_id):
+        with self._lock:
+            self._ids.add(meme_id)
+
+    def discard(self, meme_id):
+        with self._lock:
+            self._ids.discard(meme_id)
+
+    def pending(self):
+        with self._lock:
+            return sorted(self._ids)
+
+    def drain(self, delete, max_workers=8):
+        """Удаляет все записанные мемы; delete(meme_id) возвращает ответ DELETE"""
+        with self._lock:
+            meme_ids, self._ids = sorted(self._ids), set()
+        return delete_concurrently(meme_ids, delete, max_workers)
+
+
+def delete_concurrently(meme_ids, delete, max_workers=8):
+    """Удаляет мемы не более чем в max_workers потоков, возвращает {"deleted", "failed"}"""
+    result = {"deleted": 0, "failed": 0}
+    if not meme_ids:
+        return result
+
+    def delete_one(meme_id):
+        try:
+            response = delete(meme_id)
+        except Exception as ex:
+            logger.error(f"Не удалось удалить мем {meme_id}: {ex}")
+            return False
+        # 404 - мем уже удален кем-то другим, это тоже успех
+        if response.status_code not in (200, 404):
+            logger.error(f"Не удалось удалить мем {meme_id}: статус {response.status_code}")
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(meme_ids)), thread_name_prefix="cleanup") as pool:
+        for ok in pool.map(delete_one, meme_ids):
+            result["deleted" if ok else "failed"] += 1
+    logger.info(f"Очистка мемов: удалено {result['deleted']}, ошибок {result['failed']}")
+    return result
+
+
+created_memes = CleanupRegistry()
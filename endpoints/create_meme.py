@@ -1,9 +1,31 @@
-import allure
 from endpoints.baseapi import BaseAPI
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.cleanup import created_memes
+from endpoints.meme_cache import meme_cache
+from endpoints.schemas import MEME
+from endpoints.steps import async_step, step
+
+
+def _register_created(response):
+    # Каждый созданный мем попадает в реестр и будет удален в конце сессии
+    if response.status_code == 200:
+        created_memes.add(response.json()["id"])
+        # Список мемов изменился
+        meme_cache.invalidate(response.json()["id"])
+    return response
 
 
 class CreateMeme(BaseAPI):
 
-    @allure.step("Create a new meme")
+    @step("Create a new meme")
     def create_new_meme(self, payload):
-        return self.send_request(method="POST", endpoint="/meme", json=payload)
+        response = _register_created(self.send_request(method="POST", endpoint="/meme", json=payload))
+        return self._check_schema(response, MEME)
+
+
+class AsyncCreateMeme(AsyncBaseAPI):
+
+    @async_step("Create a new meme")
+    async def create_new_meme(self, payload):
+        response = _register_created(await self.send_request(method="POST", endpoint="/meme", json=payload))
+        return self._check_schema(response, MEME)
@@ -0,0 +1,56 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+
+class CredentialHolder:
+    """Хранилище токена авторизации с учетом контекста выполнения
+
+    Токен, сохраненный через set(), виден всем потокам процесса (токен сессии).
+    Внутри use(token) текущий поток или asyncio-задача работает со своим токеном
+    и не мешает остальным.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._default = None
+        self._override = contextvars.ContextVar("memes_api_token", default=None)
+
+    def get(self):
+        token = self._override.get()
+        return token if token is not None else self._default
+
+    def set(self, token):
+        if self._override.get() is not None:
+            self._override.set(token)
+            return
+        with self._lock:
+            self._default = token
+
+    def clear(self):
+        with self._lock:
+            self._default = None
+
+    @contextmanager
+    def use(self, token):
+        reset_token = self._override.set(token)
+        try:
+            yield token
+        finally:
+            self._override.reset(reset_token)
+
+
+class TokenAttribute:
+    """Атрибут класса, который читает токен из CredentialHolder (BaseAPI.token)"""
+
+    def __init__(self, holder):
+        self.holder = holder
+
+    def __get__(self, instance, owner):
+        return self.holder.get()
+
+    def __set__(self, instance, value):
+        self.holder.set(value)
+
+
+credentials = CredentialHolder()
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Таймауты по умолчанию: (подключение, чтение ответа), секунд
+DEFAULT_TIMEOUT = (5.0, 30.0)
+
+PAUSE = "пауза перед повтором"
+
+_deadline = ContextVar("memes_api_deadline", default=None)
+_timeout_override = ContextVar("memes_api_timeout", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Время, отведенное тесту на HTTP-вызовы, истекло"""
+
+
+def normalize_timeout(timeout):
+    """Число или пара (connect, read) -> пара (connect, read)"""
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+        return connect, read
+    return timeout, timeout
+
+
+class Deadline:
+    """Момент, к которому должны завершиться все HTTP-вызовы теста
+
+    Пока дедлайн активен (set_deadline или use_deadline), send_request
+    ограничивает таймауты оставшимся временем, не начинает повторы, которые
+    не успеют завершиться, и записывает, на что ушло время.
+    """
+
+    def __init__(self, seconds, name="", clock=time.monotonic):
+        self.seconds = seconds
+        self.name = name
+        self.clock = clock
+        self.started = clock()
+        self.expires_at = self.started + seconds
+        self._spent = defaultdict(lambda: [0, 0.0, set()])
+        self._last_attempt = {}
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return self.expires_at - self.clock()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def record(self, label, duration, outcome=None):
+        """Учитывает попытку запроса (label - 'GET /meme/{id}') или паузу (PAUSE)"""
+        with self._lock:
+            spent = self._spent[label]
+            spent[0] += 1
+            spent[1] += duration
+            if outcome is not None:
+                spent[2].add(str(outcome))
+                self._last_attempt[label] = duration
+
+    def can_fit(self, label, delay):
+        """Успеет ли повтор label после паузы delay, если он займет столько же, сколько прошлая попытка"""
+        return self.remaining() > delay + self._last_attempt.get(label, 0.0)
+
+    def check(self, label):
+        if self.expired:
+            raise self.exceeded(label)
+
+    def clip(self, timeout):
+        """Таймаут (connect, read), урезанный до оставшегося времени"""
+        remaining = max(self.remaining(), 0.001)
+        connect, read = timeout
+        return (remaining if connect is None else min(connect, remaining),
+                remaining if read is None else min(read, remaining))
+
+    def exceeded(self, label):
+        return DeadlineExceeded(f"Запрос {label} не уложился в дедлайн\n{self.breakdown()}")
+
+    def breakdown(self):
+        elapsed = self.clock() - self.started
+        title = f"Дедлайн {self.name} " if self.name else "Дедлайн "
+        lines = [f"{title}{self.seconds:.2f} с, прошло {elapsed:.2f} с:"]
+        accounted = 0.0
+        with self._lock:
+            spent = sorted(self._spent.items(), key=lambda item: -item[1][1])
+        for label, (count, duration, outcomes) in spent:
+            accounted += duration
+            details = f" ({', '.join(sorted(outcomes))})" if outcomes else ""
+            lines.append(f"  {label}: {duration:.2f} с, {count} шт.{details}")
+        lines.append(f"  вне HTTP (код теста и фикстур): {max(elapsed - accounted, 0.0):.2f} с")
+        return "\n".join(lines)
+
+
+def current_deadline():
+    return _deadline.get()
+
+
+def set_deadline(deadline):
+    """Активирует дедлайн в текущем контексте; вернуть прежний - reset_deadline(token)"""
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+@contextmanager
+def use_deadline(seconds, name=""):
+    deadline = Deadline(seconds, name)
+    token = set_deadline(deadline)
+    try:
+        yield deadline
+    finally:
+        reset_deadline(token)
+
+
+def set_timeout_override(connect=None, read=None):
+    """Таймауты для всех запросов в текущем контексте (например, на время теста)"""
+    return _timeout_override.set((connect, read))
+
+
+def reset_timeout_override(token):
+    _timeout_override.reset(token)
+
+
+def resolve_timeout(call_timeout, class_timeout, deadline=None):
+    """Таймаут попытки: аргумент вызова, затем переопределение теста, затем атрибут класса"""
+    connect, read = normalize_timeout(class_timeout)
+    override = _timeout_override.get()
+    if override is not None:
+        connect = override[0] if override[0] is not None else connect
+        read = override[1] if override[1] is not None else read
+    if call_timeout is not None:
+        connect, read = normalize_timeout(call_timeout)
+    if deadline is not None:
+        connect, read = deadline.clip((connect, read))
+    return connect, read
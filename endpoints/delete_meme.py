@@ -1,9 +1,26 @@
-import allure
 from endpoints.baseapi import BaseAPI
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.cleanup import created_memes
+from endpoints.meme_cache import meme_cache
+from endpoints.steps import async_step, step
+
+
+def _unregister_deleted(meme_id, response):
+    if response.status_code in (200, 404):
+        created_memes.discard(meme_id)
+        meme_cache.invalidate(meme_id)
+    return response
 
 
 class DeleteMeme(BaseAPI):
 
-    @allure.step("Delete meme by id")
+    @step("Delete meme by id")
     def delete_meme_by_id(self, meme_id):
-        return self.send_request(method="DELETE", endpoint=f"/meme/{meme_id}")
+        return _unregister_deleted(meme_id, self.send_request(method="DELETE", endpoint=f"/meme/{meme_id}"))
+
+
+class AsyncDeleteMeme(AsyncBaseAPI):
+
+    @async_step("Delete meme by id")
+    async def delete_meme_by_id(self, meme_id):
+        return _unregister_deleted(meme_id, await self.send_request(method="DELETE", endpoint=f"/meme/{meme_id}"))
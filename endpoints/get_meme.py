@@ -1,13 +1,125 @@
-import allure
+from contextlib import closing
+
 from endpoints.baseapi import BaseAPI
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.cassette import cassette
+from endpoints.json_stream import iter_json_array
+from endpoints.meme_cache import meme_cache
+from endpoints.schemas import LISTED_MEME, MEME, MEME_LIST, SchemaError
+from endpoints.steps import async_step, step
+
+# Размер куска, читаемого из сокета при потоковом разборе списка мемов
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _cache_response(key, response, validators):
+    if response.status_code == 200:
+        meme_cache.store(key, response, refreshed=validators is not None)
+    else:
+        meme_cache.discard(key)
+    return response
 
 
 class GetMeme(BaseAPI):
 
-    @allure.step("Get all memes")
+    @step("Get all memes")
     def get_all_memes_endpoint(self):
-        return self.send_request(method="GET", endpoint="/meme")
+        return self._check_schema(self._get("/meme"), MEME_LIST)
 
-    @allure.step("Get meme by id")
+    @step("Get meme by id")
     def get_meme_by_id_endpoint(self, meme_id):
-        return self.send_request(method="GET", endpoint=f"/meme/{meme_id}")
+        return self._check_schema(self._get(f"/meme/{meme_id}"), MEME)
+
+    def _get(self, endpoint):
+        # С включенным meme_cache свежий ответ берется из кэша, устаревший перепроверяется
+        if not meme_cache.enabled:
+            return self.send_request(method="GET", endpoint=endpoint)
+        key = (self.url, endpoint)
+        cached, validators = meme_cache.lookup(key)
+        if cached is not None:
+            return cached
+        response = self.send_request(method="GET", endpoint=endpoint, headers=validators)
+        if response.status_code == 304:
+            cached = meme_cache.revalidated(key)
+            if cached is not None:
+                return cached
+            response = self.send_request(method="GET", endpoint=endpoint)
+        return _cache_response(key, response, validators)
+
+    def iter_memes(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Мемы из GET /meme по одному, по мере чтения ответа из сокета
+
+        Список целиком в памяти не собирается, ответ не логируется и не
+        прикладывается к Allure. Если перебор прервать (break, закрытие
+        генератора), соединение закрывается, остаток ответа не читается.
+        Ответ 4xx/5xx - requests.HTTPError. При активной кассете ответ берется
+        через send_request целиком и разбирается так же по кускам.
+        """
+        if cassette.active:
+            response = self.send_request(method="GET", endpoint="/meme")
+            response.raise_for_status()
+            content = response.content
+            chunks = (content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+            yield from self._check_memes(iter_json_array(chunks, key="data"))
+            return
+        response = self.open_stream(method="GET", endpoint="/meme")
+        with closing(response):
+            response.raise_for_status()
+            yield from self._check_memes(iter_json_array(response.iter_content(chunk_size), key="data"))
+
+    @step("Find meme by id in the meme list")
+    def find_meme(self, meme_id):
+        """Первый мем с данным id из потока GET /meme или None; чтение останавливается на найденном"""
+        with closing(self.iter_memes()) as memes:
+            for meme in memes:
+                if meme.get("id") == meme_id:
+                    return meme
+        return None
+
+    @step("Count memes in the meme list")
+    def count_memes(self, updated_by=None, predicate=None):
+        """Сколько мемов в GET /meme (создано пользователем updated_by и/или подходит под predicate)"""
+        count = 0
+        with closing(self.iter_memes()) as memes:
+            for meme in memes:
+                if updated_by is not None and meme.get("updated_by") != updated_by:
+                    continue
+                if predicate is not None and not predicate(meme):
+                    continue
+                count += 1
+        return count
+
+    def _check_memes(self, memes):
+        # В строгом режиме каждый мем проверяется на схему по мере разбора
+        for index, meme in enumerate(memes):
+            if self.strict_schemas:
+                errors = LISTED_MEME.errors(meme, f"$.data[{index}]")
+                if errors:
+                    raise SchemaError(LISTED_MEME.name, errors)
+            yield meme
+
+
+class AsyncGetMeme(AsyncBaseAPI):
+
+    @async_step("Get all memes")
+    async def get_all_memes_endpoint(self):
+        return self._check_schema(await self._get("/meme"), MEME_LIST)
+
+    @async_step("Get meme by id")
+    async def get_meme_by_id_endpoint(self, meme_id):
+        return self._check_schema(await self._get(f"/meme/{meme_id}"), MEME)
+
+    async def _get(self, endpoint):
+        if not meme_cache.enabled:
+            return await self.send_request(method="GET", endpoint=endpoint)
+        key = (self.url, endpoint)
+        cached, validators = meme_cache.lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.send_request(method="GET", endpoint=endpoint, headers=validators)
+        if response.status_code == 304:
+            cached = meme_cache.revalidated(key)
+            if cached is not None:
+                return cached
+            response = await self.send_request(method="GET", endpoint=endpoint)
+        return _cache_response(key, response, validators)
@@ -0,0 +1,169 @@
+import socket
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from endpoints.timing import current_timing
+from endpoints.transport_base import Transport
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedConnectMixin:
+    # Время установки TCP (и TLS) соединения попадает в фазу connect текущего запроса
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            timing = current_timing()
+            if timing is not None:
+                timing.add("connect", time.perf_counter() - started)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _CountingPoolMixin:
+    stats = None
+
+    def _get_conn(self, timeout=None):
+        started = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        timing = current_timing()
+        if timing is not None:
+            timing.add("acquire", time.perf_counter() - started)
+        if self.stats is not None:
+            # Соединение без сокета будет открыто заново при отправке запроса
+            self.stats.record(is_new=getattr(conn, "sock", None) is None)
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _CountingPoolManager(PoolManager):
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.stats = self.stats
+        return pool
+
+
+class _CountingAdapter(HTTPAdapter):
+
+    def __init__(self, stats, keep_alive=True, **kwargs):
+        self.stats = stats
+        self.keep_alive = keep_alive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        if self.keep_alive:
+            pool_kwargs.setdefault(
+                "socket_options",
+                HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+            )
+        self.poolmanager = _CountingPoolManager(
+            self.stats, num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+
+class HttpPool(Transport):
+    """Общий пул keep-alive соединений для всех эндпоинтов
+
+    pool_connections - сколько хостов держать в пуле,
+    pool_maxsize - лимит соединений на один хост,
+    pool_block - ждать свободное соединение вместо открытия лишнего сверх лимита.
+
+    Каждый поток получает свою requests.Session (cookies и заголовки не смешиваются),
+    а соединения берутся из одного общего адаптера. Транспорт BaseAPI по
+    умолчанию (см. endpoints/transports.py).
+    """
+
+    name = "requests"
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        super().__init__()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self._adapter = None
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def adapter(self):
+        if self._adapter is None:
+            with self._lock:
+                if self._adapter is None:
+                    self._adapter = self._build_adapter()
+        return self._adapter
+
+    @property
+    def session(self):
+        adapter = self.adapter
+        session = getattr(self._local, "session", None)
+        if session is None or self._local.generation != self._generation:
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+            self._local.session = session
+            self._local.generation = self._generation
+        return session
+
+    def _build_adapter(self):
+        logger.debug(
+            f"Создан пул соединений: хостов={self.pool_connections}, "
+            f"соединений на хост={self.pool_maxsize}, keep-alive={self.keep_alive}"
+        )
+        return _CountingAdapter(
+            self.stats,
+            keep_alive=self.keep_alive,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, stream=False):
+        return self.session.request(method, url, params=params, data=data, json=json, headers=headers,
+                                    timeout=timeout, stream=stream)
+
+    def close(self):
+        with self._lock:
+            adapter, self._adapter = self._adapter, None
+            # Сессии потоков пересоздаются при следующем запросе
+            self._generation += 1
+        if adapter is not None:
+            adapter.close()
+            logger.debug(f"Пул соединений закрыт. Статистика: {self.stats.as_dict()}")
@@ -0,0 +1,112 @@
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Символы, которыми может продолжаться число: "0." или "1e" в конце куска - еще не все число
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JsonStreamError(ValueError):
+    """Поток не является ожидаемым JSON-документом"""
+
+
+class _Reader:
+    """Буфер над потоком байтов: хранит только еще не разобранный хвост"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self, min_chars=1):
+        """Дочитывает не меньше min_chars символов; False, если поток закончился"""
+        added = []
+        size = 0
+        while size < min_chars and not self.exhausted:
+            chunk = next(self._chunks, None)
+            text = self._utf8.decode(chunk or b"", final=chunk is None)
+            if chunk is None:
+                self.exhausted = True
+            added.append(text)
+            size += len(text)
+        if not added:
+            return False
+        self.buf = self.buf[self.pos:] + "".join(added)
+        self.pos = 0
+        return size > 0
+
+    def peek(self):
+        """Следующий значимый символ (без пробелов) или None в конце потока"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char):
+        actual = self.peek()
+        if actual != char:
+            raise JsonStreamError(f"Ожидался {char!r}, получен {actual!r}")
+        self.pos += 1
+
+    def value(self):
+        """Следующее JSON-значение целиком"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as ex:
+                # Значение еще не дочитано: буфер растет вдвое, чтобы большое значение
+                # не разбиралось заново на каждом маленьком куске
+                if not self.fill(max(len(self.buf) - self.pos, 1)):
+                    raise JsonStreamError(f"Некорректный JSON: {ex}") from None
+                continue
+            # Число в конце буфера может продолжаться в следующем куске, даже если
+            # разобралось короче ("0." разбирается как 0)
+            tail = end
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                tail = _NUMBER_TAIL.match(self.buf, end).end()
+            if tail == len(self.buf) and not self.exhausted and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key=None):
+    """Элементы JSON-массива по одному, по мере чтения кусков байтов chunks
+
+    Документ - сам массив или объект, в котором массив лежит под ключом key
+    ({"data": [...]}). В памяти одновременно только текущий элемент и
+    непрочитанный хвост куска, поэтому память не зависит от длины массива.
+    Остаток документа после массива не читается.
+    """
+    reader = _Reader(chunks)
+    first = reader.peek()
+    if first == "{" and key is not None:
+        reader.pos += 1
+        if reader.peek() == "}":
+            return
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.peek() == "}":
+                return
+            reader.expect(",")
+    elif first != "[":
+        raise JsonStreamError(f"Ожидался массив{f' или объект с ключом {key!r}' if key else ''}, получен {first!r}")
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == "]":
+            return
+        reader.expect(",")
@@ -0,0 +1,44 @@
+import json
+
+# Сколько символов тела запроса/ответа попадает в лог
+LOG_BODY_LIMIT = 500
+
+
+class LazyBody:
+    """Тело запроса или ответа для логирования через %s
+
+    Сериализуется только если запись лога действительно форматируется
+    и обрезается прямо во время сериализации: большой JSON никогда
+    не форматируется целиком.
+    """
+
+    __slots__ = ("body", "limit", "indent")
+
+    def __init__(self, body, limit=LOG_BODY_LIMIT, indent=2):
+        self.body = body
+        self.limit = limit
+        # None - JSON одной строкой (структурированный лог, --log-format=jsonl)
+        self.indent = indent
+
+    def __str__(self):
+        body = self.body
+        if isinstance(body, (dict, list)):
+            return truncated_json(body, self.limit, indent=self.indent)
+        if isinstance(body, bytes):
+            body = body[:self.limit * 4].decode("utf-8", errors="replace")
+        text = str(body)
+        return text if len(text) <= self.limit else text[:self.limit] + "..."
+
+
+def truncated_json(data, limit=LOG_BODY_LIMIT, indent=2):
+    """json.dumps(data, indent=indent) с остановкой после limit символов"""
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+    parts = []
+    size = 0
+    for chunk in encoder.iterencode(data):
+        parts.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return "".join(parts)[:limit] + "..."
+    return "".join(parts)
+
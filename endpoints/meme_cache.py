@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_MEME_PATH = re.compile(r"^/meme/(?P<meme_id>\d+)$")
+
+
+class _Entry:
+    __slots__ = ("response", "etag", "last_modified", "expires_at", "size")
+
+    def __init__(self, response, expires_at):
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.expires_at = expires_at
+        self.size = len(response.content)
+
+    def validators(self):
+        """Заголовки условного запроса или None, если сервер не дал ни ETag, ни Last-Modified"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers or None
+
+
+class MemeCache:
+    """Кэш ответов GET /meme и GET /meme/{id} с вытеснением LRU и сроком жизни
+
+    Свежая запись (моложе ttl) возвращается без запроса. Устаревшая запись с
+    ETag или Last-Modified перепроверяется условным запросом: 304 продлевает
+    ее, 200 заменяет. Объем ограничен числом записей и суммарным размером тел.
+    UpdateMeme, DeleteMeme и CreateMeme сбрасывают затронутые записи.
+    По умолчанию выключен: функциональные тесты должны видеть сервер.
+    """
+
+    def __init__(self, enabled=False, max_entries=256, max_bytes=8 * 1024 * 1024, ttl=30.0, clock=time.monotonic):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.stats = {}
+        self.reset_stats()
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if name not in ("enabled", "max_entries", "max_bytes", "ttl"):
+                raise TypeError(f"Неизвестная настройка кэша: {name}")
+            if name != "enabled" and value <= 0:
+                raise ValueError(f"{name} должен быть больше 0: {value}")
+            setattr(self, name, value)
+        with self._lock:
+            self._evict()
+
+    def reset_stats(self):
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "refreshed": 0, "evictions": 0, "invalidations": 0}
+
+    def lookup(self, key):
+        """(ответ, None) для свежей записи, (None, заголовки условного запроса или None) иначе"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if self.clock() < entry.expires_at:
+                self.stats["hits"] += 1
+                return entry.response, None
+            validators = entry.validators()
+            if validators is None:
+                self._remove(key)
+                self.stats["misses"] += 1
+            return None, validators
+
+    def revalidated(self, key):
+        """Сервер ответил 304: запись снова свежая; ответ из кэша или None, если ее уже вытеснили"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = self.clock() + self.ttl
+            self.stats["revalidated"] += 1
+            return entry.response
+
+    def store(self, key, response, refreshed=False):
+        entry = _Entry(response, self.clock() + self.ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if refreshed:
+                self.stats["refreshed"] += 1
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.stats["invalidations"] += 1
+
+    def invalidate(self, meme_id=None):
+        """Сбрасывает список мемов и мем meme_id (или все мемы, если id не задан)"""
+        with self._lock:
+            for key in list(self._entries):
+                match = _MEME_PATH.match(key[1])
+                if match is None or meme_id is None or int(match.group("meme_id")) == meme_id:
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.stats["evictions"] += 1
+
+
+meme_cache = MemeCache()
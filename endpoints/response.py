@@ -0,0 +1,87 @@
+import json
+
+_UNSET = object()
+
+
+class ApiResponse:
+    """Ответ API, тело которого декодируется не больше одного раза
+
+    Распарсенный JSON, его форматированное представление и тело запроса
+    кэшируются при первом обращении. Остальные атрибуты (status_code, headers,
+    request, reason, url, ...) берутся из исходного ответа.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._text = None
+        self._json = _UNSET
+        self._json_error = None
+        self._pretty_json = None
+        self._request_json = _UNSET
+        self._request_pretty = None
+
+    @classmethod
+    def wrap(cls, response):
+        return response if isinstance(response, cls) else cls(response)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __bool__(self):
+        return self.raw.status_code < 400
+
+    def __repr__(self):
+        return f"<ApiResponse [{self.raw.status_code}]>"
+
+    @property
+    def is_json(self):
+        return "application/json" in self.raw.headers.get("Content-Type", "").lower()
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.raw.text
+        return self._text
+
+    def json(self):
+        if self._json is _UNSET:
+            try:
+                self._json = json.loads(self.raw.content)
+            except ValueError as ex:
+                self._json = None
+                self._json_error = ex
+        if self._json_error is not None:
+            raise self._json_error
+        return self._json
+
+    @property
+    def pretty_json(self):
+        """JSON ответа с отступами (для логов и Allure) или None, если тело не JSON"""
+        if self._pretty_json is None:
+            try:
+                data = self.json()
+            except ValueError:
+                return None
+            self._pretty_json = json.dumps(data, indent=2, ensure_ascii=False)
+        return self._pretty_json
+
+    @property
+    def request_json(self):
+        """Тело запроса, декодированное из JSON, иначе исходное тело"""
+        if self._request_json is _UNSET:
+            body = getattr(self.raw.request, "body", None)
+            try:
+                self._request_json = json.loads(body) if isinstance(body, (str, bytes)) else body
+            except ValueError:
+                self._request_json = body
+        return self._request_json
+
+    @property
+    def request_pretty(self):
+        if self._request_pretty is None:
+            body = self.request_json
+            if isinstance(body, (dict, list)):
+                self._request_pretty = json.dumps(body, ensure_ascii=False, indent=2)
+            else:
+                self._request_pretty = str(body)
+        return self._request_pretty
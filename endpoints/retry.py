@@ -0,0 +1,315 @@
+import random
+import re
+import threading
+import time
+import logging
+from collections import Counter, defaultdict, deque
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Методы, повтор которых не меняет результат (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"})
+
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$)")
+_TOKEN_SEGMENT = re.compile(r"(?<=/authorize/)[^/]+")
+
+
+class CircuitOpenError(Exception):
+    """Запрос не отправлен: автомат для эндпоинта разомкнут"""
+
+
+def endpoint_template(endpoint):
+    """Шаблон эндпоинта для метрик и автомата: /meme/17 -> /meme/{id}"""
+    path = "/" + re.sub(r"/{2,}", "/", endpoint.split("?", 1)[0]).lstrip("/")
+    path = _TOKEN_SEGMENT.sub("{token}", path)
+    return _ID_SEGMENT.sub("{id}", path)
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After в секундах: число секунд или HTTP-дата; None, если заголовок некорректен"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class RetryBudget:
+    """Общий на процесс лимит повторов
+
+    Каждый запрос добавляет в бюджет ratio повтора, каждый повтор забирает
+    один. Запас min_retries позволяет повторять первые запросы сессии.
+    Когда сервер деградирует, повторы быстро исчерпывают бюджет, и нагрузка
+    на сервер растет не больше чем в (1 + ratio) раз.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+
+    def deposit(self):
+        with self._lock:
+            self._requests += 1
+
+    def withdraw(self):
+        with self._lock:
+            if self._retries + 1 > self.min_retries + self.ratio * self._requests:
+                return False
+            self._retries += 1
+            return True
+
+    def as_dict(self):
+        with self._lock:
+            return {"requests": self._requests, "retries": self._retries,
+                    "available": round(self.min_retries + self.ratio * self._requests - self._retries, 2)}
+
+
+class CircuitBreaker:
+    """Автомат для одного эндпоинта: closed -> open -> half_open -> closed
+
+    Размыкается, когда среди последних window исходов (не меньше
+    min_requests) доля ошибок достигает threshold. Через cooldown секунд
+    пропускает один пробный запрос: успех замыкает автомат, ошибка снова
+    размыкает его. Если исход пробного запроса не пришел за cooldown,
+    пропускается следующий. threshold=None - автомат никогда не размыкается.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=0.5, window=20, min_requests=10, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True, если запрос можно отправить; второй элемент - новое состояние или None"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True, None
+            now = self.clock()
+            if self.state == self.OPEN and now - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_started = now
+                return True, self.HALF_OPEN
+            if self.state == self.HALF_OPEN and (self._probe_started is None
+                                                 or now - self._probe_started >= self.cooldown):
+                self._probe_started = now
+                return True, None
+            return False, None
+
+    def record(self, failed):
+        """Учитывает исход запроса; возвращает новое состояние, если оно изменилось"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_started = None
+                self._outcomes.clear()
+                return self._open() if failed else self._set(self.CLOSED)
+            self._outcomes.append(failed)
+            if self.threshold is None:
+                return None
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_requests:
+                if sum(self._outcomes) / len(self._outcomes) >= self.threshold:
+                    return self._open()
+            return None
+
+    def _open(self):
+        self._opened_at = self.clock()
+        return self._set(self.OPEN)
+
+    def _set(self, state):
+        changed = state != self.state
+        self.state = state
+        return state if changed else None
+
+
+class RetryMetrics:
+    """Счетчики событий повторов и автоматов по эндпоинтам (потокобезопасно)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = defaultdict(Counter)
+
+    def increment(self, key, event):
+        with self._lock:
+            self._events[key][event] += 1
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+
+    def as_dict(self):
+        with self._lock:
+            total = Counter()
+            for events in self._events.values():
+                total.update(events)
+            return {"total": dict(total), "endpoints": {key: dict(events) for key, events in sorted(self._events.items())}}
+
+
+class RetryPolicy:
+    """Когда и через сколько повторять запрос
+
+    - экспоненциальная задержка с полным джиттером:
+      uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)));
+    - Retry-After сервера имеет приоритет; если он больше max_delay, повтора нет;
+    - неидемпотентные методы (POST, PATCH) повторяются только при ошибке
+      установки соединения, когда запрос точно не дошел до сервера;
+    - общий бюджет повторов (RetryBudget) и автомат на каждый шаблон эндпоинта.
+
+    Отправку и паузы выполняет вызывающий код (sync или async), политика
+    только принимает решения через объект RetryCall из start().
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0,
+                 retry_statuses=(429, 500, 502, 503, 504), budget_ratio=0.2, budget_min_retries=10,
+                 breaker_threshold=0.5, breaker_window=20, breaker_min_requests=10, breaker_cooldown=30.0,
+                 seed=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.budget_ratio = budget_ratio
+        self.budget_min_retries = budget_min_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_window = breaker_window
+        self.breaker_min_requests = breaker_min_requests
+        self.breaker_cooldown = breaker_cooldown
+        self.metrics = RetryMetrics()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def configure(self, **settings):
+        """Меняет настройки и сбрасывает бюджет, автоматы и метрики"""
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise AttributeError(f"Неизвестная настройка политики повторов: {name}")
+            setattr(self, name, frozenset(value) if name == "retry_statuses" else value)
+        self._reset_state()
+        self.metrics.reset()
+
+    def breaker(self, key):
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(
+                    self.breaker_threshold, self.breaker_window, self.breaker_min_requests, self.breaker_cooldown)
+            return breaker
+
+    def breaker_states(self):
+        with self._lock:
+            return {key: breaker.state for key, breaker in sorted(self._breakers.items())}
+
+    def start(self, method, endpoint, max_attempts=None, base_delay=None, deadline=None):
+        """Начинает запрос; CircuitOpenError, если автомат эндпоинта разомкнут"""
+        call = RetryCall(self, method.upper(), endpoint_template(endpoint),
+                         max_attempts or self.max_attempts,
+                         self.base_delay if base_delay is None else base_delay, deadline)
+        call.acquire()
+        self.budget.deposit()
+        return call
+
+    def backoff(self, attempt, base_delay):
+        ceiling = min(self.max_delay, base_delay * 2 ** (attempt - 1))
+        return self._random.uniform(0, ceiling)
+
+    def _reset_state(self):
+        with self._lock:
+            self.budget = RetryBudget(self.budget_ratio, self.budget_min_retries)
+            self._breakers = {}
+
+
+class RetryCall:
+    """Состояние одного вызова send_request: номер попытки и решения о повторе"""
+
+    def __init__(self, policy, method, template, max_attempts, base_delay, deadline=None):
+        self.policy = policy
+        self.deadline = deadline
+        self.method = method
+        self.key = f"{method} {template}"
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.attempt = 1
+        self._breaker = policy.breaker(self.key)
+
+    def acquire(self):
+        allowed, state = self._breaker.allow()
+        self._breaker_event(state)
+        if not allowed:
+            self.policy.metrics.increment(self.key, "breaker_rejected")
+            raise CircuitOpenError(f"Автомат для {self.key} разомкнут: запрос не отправлен")
+
+    def on_response(self, response):
+        """Задержка перед повтором или None, если ответ нужно вернуть"""
+        status = response.status_code
+        self._record(failed=status >= 500)
+        if status not in self.policy.retry_statuses:
+            return None
+        if self.method not in IDEMPOTENT_METHODS:
+            self.policy.metrics.increment(self.key, "not_retried_non_idempotent")
+            return None
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        return self._next_delay(f"status_{status}", retry_after)
+
+    def on_error(self, error, connect_error=False):
+        """Задержка перед повтором или None, если ошибку нужно пробросить"""
+        self._record(failed=True)
+        if self.method not in IDEMPOTENT_METHODS and not connect_error:
+            self.policy.metrics.increment(self.key, "not_retried_non_idempotent")
+            return None
+        return self._next_delay(type(error).__name__, None)
+
+    def _next_delay(self, reason, retry_after):
+        metrics = self.policy.metrics
+        if self.attempt >= self.max_attempts:
+            metrics.increment(self.key, "gave_up")
+            return None
+        if retry_after is not None and retry_after > self.policy.max_delay:
+            logger.warning("[Retry] %s: Retry-After %.0f с больше max_delay, повтора не будет", self.key, retry_after)
+            metrics.increment(self.key, "gave_up_retry_after")
+            return None
+        delay = retry_after if retry_after is not None else self.policy.backoff(self.attempt, self.base_delay)
+        if self.deadline is not None and not self.deadline.can_fit(self.key, delay):
+            logger.warning("[Retry] %s: повтор не успеет до дедлайна теста, попыток больше не будет", self.key)
+            metrics.increment(self.key, "skipped_deadline")
+            return None
+        try:
+            # Автомат мог разомкнуться, пока шли предыдущие попытки
+            self.acquire()
+        except CircuitOpenError:
+            return None
+        if not self.policy.budget.withdraw():
+            logger.warning("[Retry] %s: бюджет повторов исчерпан", self.key)
+            metrics.increment(self.key, "budget_exhausted")
+            return None
+
+        logger.warning("[Retry] %s: %s, попытка %s/%s, пауза %.2f с",
+                       self.key, reason, self.attempt, self.max_attempts, delay)
+        metrics.increment(self.key, "retry")
+        metrics.increment(self.key, f"retry_{reason}")
+        self.attempt += 1
+        return delay
+
+    def _record(self, failed):
+        self._breaker_event(self._breaker.record(failed))
+
+    def _breaker_event(self, state):
+        if state is None:
+            return
+        log = logger.warning if state == CircuitBreaker.OPEN else logger.info
+        log("[Breaker] %s: %s", self.key, state)
+        self.policy.metrics.increment(self.key, f"breaker_{state}")
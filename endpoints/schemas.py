@@ -0,0 +1,201 @@
+import itertools
+
+_MISSING = object()
+
+# Сколько нарушений показывать в сообщении SchemaError
+MAX_REPORTED = 50
+
+_JSON_TYPES = {dict: "object", list: "array", str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+class SchemaError(AssertionError):
+    """Ответ не соответствует схеме; errors - все найденные нарушения"""
+
+    def __init__(self, schema_name, errors):
+        self.errors = errors
+        shown = "\n".join(f"  {error}" for error in errors[:MAX_REPORTED])
+        more = f"\n  ... и еще {len(errors) - MAX_REPORTED}" if len(errors) > MAX_REPORTED else ""
+        super().__init__(f"Ответ не соответствует схеме {schema_name}: нарушений {len(errors)}\n{shown}{more}")
+
+
+class Field:
+    """Поле объекта: тип JSON, обязательность, null, схема элементов массива или вложенного объекта"""
+
+    def __init__(self, type_, required=True, nullable=False, items=None, schema=None):
+        self.types = type_ if isinstance(type_, tuple) else (type_,)
+        # В JSON целое число - тоже number
+        if float in self.types and int not in self.types:
+            self.types += (int,)
+        self.required = required
+        self.nullable = nullable
+        self.items = items
+        self.schema = schema
+
+
+class Schema:
+    """Объявленная схема JSON-объекта, при первом использовании компилируемая в Python-код
+
+    Быстрая проверка - одно логическое выражение на объект, сгенерированное по
+    схеме (без циклов по полям и без вызовов isinstance). Массив проверяется
+    одним list comprehension с этим выражением, подробные сообщения
+    собираются только для объектов, которые проверку не прошли.
+    """
+
+    _counter = itertools.count()
+
+    def __init__(self, name, fields, allow_extra=False):
+        self.name = name
+        self.fields = fields
+        self.allow_extra = allow_extra
+        self._compiled = None
+
+    def errors(self, obj, path="$"):
+        """Все нарушения схемы в объекте"""
+        if self._compiled is None:
+            self._compile()
+        if self._is_valid(obj):
+            return []
+        errors = []
+        self._collect(obj, path, errors)
+        return errors
+
+    def errors_many(self, items, path="$"):
+        """Все нарушения в массиве объектов - один проход быстрой проверки"""
+        if self._compiled is None:
+            self._compile()
+        if not isinstance(items, list):
+            return [f"{path}: ожидался array, получен {_type_name(items)}"]
+        errors = []
+        for index in self._invalid_indexes(items):
+            self._collect(items[index], f"{path}[{index}]", errors)
+        return errors
+
+    def validate(self, obj):
+        errors = self.errors(obj)
+        if errors:
+            raise SchemaError(self.name, errors)
+        return obj
+
+    def validate_many(self, items):
+        errors = self.errors_many(items)
+        if errors:
+            raise SchemaError(f"array<{self.name}>", errors)
+        return items
+
+    def _compile(self):
+        namespace = {"_MISSING": _MISSING}
+        expression = self._expression("o", namespace)
+        source = (
+            f"def is_valid(o):\n"
+            f"    return {expression}\n"
+            f"def invalid_indexes(items):\n"
+            f"    return [i for i, o in enumerate(items) if not ({expression})]\n"
+        )
+        exec(compile(source, f"<schema {self.name}>", "exec"), namespace)
+        self._is_valid = namespace["is_valid"]
+        self._invalid_indexes = namespace["invalid_indexes"]
+        self._source = source
+        self._compiled = True
+
+    def _expression(self, var, namespace):
+        parts = [f"type({var}) is dict"]
+        required = [name for name, field in self.fields.items() if field.required]
+        if not self.allow_extra and len(required) == len(self.fields):
+            keys = f"_keys_{next(self._counter)}"
+            namespace[keys] = frozenset(self.fields)
+            parts.append(f"{var}.keys() == {keys}")
+        else:
+            parts.extend(f"{name!r} in {var}" for name in required)
+            if not self.allow_extra:
+                keys = f"_keys_{next(self._counter)}"
+                namespace[keys] = frozenset(self.fields)
+                parts.append(f"{var}.keys() <= {keys}")
+        for name, field in self.fields.items():
+            value = f"{var}[{name!r}]" if field.required else f"{var}.get({name!r})"
+            check = self._value_expression(value, field, namespace)
+            if field.nullable or not field.required:
+                check = f"({value} is None or {check})"
+            parts.append(check)
+        return " and ".join(parts)
+
+    def _value_expression(self, value, field, namespace):
+        if len(field.types) == 1:
+            check = f"type({value}) is {field.types[0].__name__}"
+        else:
+            check = f"type({value}) in ({', '.join(t.__name__ for t in field.types)},)"
+        if field.schema is not None:
+            validator = f"_nested_{next(self._counter)}"
+            namespace[validator] = field.schema._fast()
+            check = f"{validator}({value})"
+        if field.items is not None:
+            validator = f"_items_{next(self._counter)}"
+            namespace[validator] = field.items._fast_all()
+            check = f"({check} and {validator}({value}))"
+        return check
+
+    def _fast(self):
+        if self._compiled is None:
+            self._compile()
+        return self._is_valid
+
+    def _fast_all(self):
+        self._fast()
+        invalid_indexes = self._invalid_indexes
+        return lambda items: not invalid_indexes(items)
+
+    def _collect(self, obj, path, errors):
+        # Медленный путь: только для объектов, не прошедших быструю проверку
+        if type(obj) is not dict:
+            errors.append(f"{path}: ожидался object, получен {_type_name(obj)}")
+            return
+        for name, field in self.fields.items():
+            value = obj.get(name, _MISSING)
+            field_path = f"{path}.{name}"
+            if value is _MISSING:
+                if field.required:
+                    errors.append(f"{field_path}: обязательное поле отсутствует")
+                continue
+            if value is None:
+                if not (field.nullable or not field.required):
+                    errors.append(f"{field_path}: null не допускается")
+                continue
+            if type(value) not in field.types:
+                expected = " | ".join(dict.fromkeys(_JSON_TYPES[t] for t in field.types))
+                errors.append(f"{field_path}: ожидался {expected}, получен {_type_name(value)}")
+                continue
+            if field.schema is not None:
+                field.schema._collect(value, field_path, errors)
+            if field.items is not None:
+                errors.extend(field.items.errors_many(value, field_path))
+        if not self.allow_extra:
+            for name in obj.keys() - self.fields.keys():
+                errors.append(f"{path}.{name}: лишнее поле")
+
+
+def _type_name(value):
+    return "null" if value is None else _JSON_TYPES.get(type(value), type(value).__name__)
+
+
+_MEME_FIELDS = {
+    "id": Field(int),
+    "text": Field(str),
+    "url": Field(str),
+    "tags": Field(list),
+    "info": Field(dict),
+    "updated_by": Field(str),
+}
+
+MEME = Schema("meme", _MEME_FIELDS)
+
+# Мем в общем списке GET /meme: на стенде там и мемы других клиентов, поэтому
+# проверяются только обязательные поля и их типы, лишние поля допускаются
+LISTED_MEME = Schema("listed_meme", _MEME_FIELDS, allow_extra=True)
+
+MEME_LIST = Schema("meme_list", {
+    "data": Field(list, items=LISTED_MEME),
+})
+
+TOKEN = Schema("token", {
+    "token": Field(str),
+    "user": Field(str),
+})
@@ -0,0 +1,56 @@
+import functools
+
+
+class StepReporter:
+    """Шаги Allure для методов эндпоинтов
+
+    Пока отчет Allure не включен (enable вызывается из tests/conftest.py только
+    при --alluredir), декораторы просто вызывают метод: allure не импортируется,
+    шаги не создаются. Так же работают скрипты tools/ и benchmarks/.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._allure = None
+
+    def enable(self):
+        import allure
+
+        self._allure = allure
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def step(self, title):
+        """Аналог allure.step для обычных методов; параметры вызова попадают в шаг"""
+        def decorator(func):
+            reported = None
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                nonlocal reported
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                if reported is None:
+                    reported = self._allure.step(title)(func)
+                return reported(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def async_step(self, title):
+        """Аналог allure.step для корутин: шаг длится до завершения await"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                with self._allure.step(title):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+steps = StepReporter()
+step = steps.step
+async_step = steps.async_step
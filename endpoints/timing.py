@@ -0,0 +1,240 @@
+import heapq
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Фазы запроса в порядке выполнения; overhead - все, что не попало в остальные
+# (формирование запроса, логирование, вложения Allure, проверка retry)
+PHASES = ("acquire", "connect", "ttfb", "download", "decode", "retry_wait", "overhead")
+
+_current = ContextVar("memes_api_request_timing", default=None)
+
+
+def current_timing():
+    """RequestTiming запроса, который сейчас выполняется в этом потоке или задаче"""
+    return _current.get()
+
+
+class RequestTiming:
+    """Время одного вызова send_request по фазам, секунд (по всем попыткам)"""
+
+    __slots__ = ("key", "status", "attempts", "total", "test") + PHASES
+
+    def __init__(self, key, test=None):
+        self.key = key
+        self.test = test
+        self.status = None
+        self.attempts = 0
+        self.total = 0.0
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    def add(self, phase, seconds):
+        setattr(self, phase, getattr(self, phase) + seconds)
+
+    def as_dict(self):
+        return {
+            "key": self.key, "test": self.test, "status": self.status, "attempts": self.attempts,
+            "total_ms": round(self.total * 1000, 3),
+            "phases_ms": {phase: round(getattr(self, phase) * 1000, 3) for phase in PHASES},
+        }
+
+
+class Histogram:
+    """Гистограмма с логарифмическими корзинами (относительная ошибка ~ (gamma - 1) / 2)
+
+    Хранит только счетчики корзин, поэтому компактна и складывается
+    с другими гистограммами (merge) без потери точности.
+    """
+
+    def __init__(self, gamma=1.05):
+        self.gamma = gamma
+        self._log_gamma = math.log(gamma)
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        index = math.ceil(math.log(value) / self._log_gamma) if value > 1e-6 else None
+        key = "zero" if index is None else index
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = self.buckets.get("zero", 0)
+        if seen >= rank:
+            return 0.0
+        for index in sorted(key for key in self.buckets if key != "zero"):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Середина корзины (gamma^(i-1), gamma^i] с поправкой на реальные min/max
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self):
+        return {"gamma": self.gamma, "count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "buckets": {str(key): count for key, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["gamma"])
+        histogram.buckets = {key if key == "zero" else int(key): count for key, count in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class TimingRecorder:
+    """Гистограммы фаз по эндпоинтам (значения в мс) и самые медленные вызовы"""
+
+    def __init__(self, slowest=10):
+        self.slowest_limit = slowest
+        self.current_test = None
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._slowest = []
+        self._captures = []
+
+    @contextmanager
+    def capture(self):
+        """Список RequestTiming всех вызовов (из любых потоков), завершившихся внутри блока"""
+        calls = []
+        with self._lock:
+            self._captures.append(calls)
+        try:
+            yield calls
+        finally:
+            with self._lock:
+                self._captures.remove(calls)
+
+    @contextmanager
+    def measure(self, key):
+        """Замер вызова send_request: фазы добавляют пул соединений, клиент и _handle_response"""
+        timing = RequestTiming(key, self.current_test)
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            yield timing
+        except BaseException as ex:
+            if timing.status is None:
+                timing.status = type(ex).__name__
+            raise
+        finally:
+            _current.reset(token)
+            timing.total = time.perf_counter() - started
+            timing.overhead = max(timing.total - sum(getattr(timing, phase) for phase in PHASES), 0.0)
+            self.record(timing)
+
+    def record(self, timing):
+        total = timing.total
+        with self._lock:
+            # Сами RequestTiming хранятся, только пока открыт capture()
+            for calls in self._captures:
+                calls.append(timing)
+            phases = self._histograms.get(timing.key)
+            if phases is None:
+                phases = self._histograms[timing.key] = _new_phases()
+            for phase, histogram in phases.items():
+                histogram.add(getattr(timing, phase) * 1000)
+            # Словарь для отчета строится, только если вызов попадает в самые медленные
+            if len(self._slowest) < self.slowest_limit:
+                heapq.heappush(self._slowest, (total, id(timing), timing.as_dict()))
+            elif total > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (total, id(timing), timing.as_dict()))
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._slowest = []
+
+    def slowest(self):
+        with self._lock:
+            return [item for _, _, item in sorted(self._slowest, key=lambda entry: -entry[0])]
+
+    def endpoints(self):
+        """{ключ эндпоинта: {фаза: Histogram}}"""
+        with self._lock:
+            return {key: dict(phases) for key, phases in sorted(self._histograms.items())}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "endpoints": {key: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                              for key, phases in self._histograms.items()},
+                "slowest": [item for _, _, item in self._slowest],
+            }
+
+    def merge(self, data):
+        """Добавляет результаты другого процесса (to_dict воркера xdist)"""
+        with self._lock:
+            for key, phases in data["endpoints"].items():
+                own = self._histograms.get(key)
+                if own is None:
+                    own = self._histograms[key] = _new_phases()
+                for phase, histogram in phases.items():
+                    own[phase].merge(Histogram.from_dict(histogram))
+            for item in data["slowest"]:
+                total = item["total_ms"] / 1000
+                entry = (total, id(item), item)
+                if len(self._slowest) < self.slowest_limit:
+                    heapq.heappush(self._slowest, entry)
+                elif entry > self._slowest[0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def report(self):
+        """Сводка для JSON-артефакта: перцентили по эндпоинтам и самые медленные вызовы"""
+        endpoints = {}
+        for key, phases in self.endpoints().items():
+            total = phases["total"]
+            endpoints[key] = {
+                "count": total.count,
+                "total_ms": {name: _round(total.percentile(pct)) for name, pct in
+                             (("p50", 50), ("p95", 95), ("p99", 99))},
+                "phases_mean_ms": {phase: _round(phases[phase].mean) for phase in PHASES},
+            }
+            endpoints[key]["total_ms"]["max"] = _round(total.max)
+        return {"endpoints": endpoints, "slowest": self.slowest()}
+
+    def write(self, path):
+        report = self.report()
+        report["histograms"] = self.to_dict()["endpoints"]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+
+
+def _new_phases():
+    return {phase: Histogram() for phase in ("total",) + PHASES}
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+timings = TimingRecorder()
@@ -0,0 +1,57 @@
+import threading
+from abc import ABC, abstractmethod
+
+
+class ConnectionStats:
+    """Счетчики новых и переиспользованных соединений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def record(self, is_new):
+        with self._lock:
+            if is_new:
+                self.opened += 1
+            else:
+                self.reused += 1
+
+    def reset(self):
+        with self._lock:
+            self.opened = 0
+            self.reused = 0
+
+    def as_dict(self):
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused}
+
+
+class Transport(ABC):
+    """Транспорт BaseAPI: чем отправляется HTTP-запрос (реализации - в endpoints/transports.py)
+
+    request возвращает requests.Response (или объект с тем же интерфейсом),
+    при stream=True - сразу после заголовков. Сетевые ошибки - исключения
+    requests (Timeout, ConnectionError). stats - счетчики соединений.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.stats = ConnectionStats()
+
+    @abstractmethod
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, stream=False):
+        """Отправляет запрос и возвращает ответ"""
+
+    @abstractmethod
+    def close(self):
+        """Закрывает соединения; следующий запрос откроет новые"""
+
+    def configure(self, **settings):
+        """Меняет настройки транспорта; текущие соединения закрываются"""
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise AttributeError(f"Неизвестная настройка транспорта {self.name}: {name}")
+            setattr(self, name, value)
+        self.close()
@@ -0,0 +1,209 @@
+"""Транспорты BaseAPI: чем отправляется HTTP-запрос
+
+Транспорт - подкласс Transport (endpoints/transport_base.py) с методами request
+и close. request(method, url, params=None, data=None, json=None,
+headers=None, timeout=None, stream=False) возвращает requests.Response (или
+объект с тем же интерфейсом), при stream=True - сразу после заголовков.
+Сетевые ошибки - исключения requests (Timeout, ConnectionError), поэтому
+повторы, логирование и шаги Allure в BaseAPI от транспорта не зависят.
+
+    requests - HttpPool: requests.Session на поток поверх общего пула (по умолчанию);
+    urllib3  - напрямую PoolManager urllib3, без Session, хуков и cookies;
+    memory   - вызывает Python-обработчик (например, MemesApp.handle) без сети.
+"""
+import json as jsonlib
+import logging
+import socket
+import threading
+from http import HTTPStatus
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3 import Retry, Timeout
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import (ClosedPoolError, ConnectTimeoutError, MaxRetryError, NewConnectionError,
+                                ProtocolError, ReadTimeoutError, SSLError)
+
+from endpoints.http_pool import HttpPool, _CountingPoolManager
+from endpoints.transport_base import Transport
+
+logger = logging.getLogger(__name__)
+
+
+class Urllib3Transport(Transport):
+    """Запросы напрямую через PoolManager urllib3 с теми же счетчиками соединений, что у HttpPool
+
+    Настройки пула - как у HttpPool. Тело запроса кодируется так же, как в
+    requests (json, data, params); редиректы не выполняются.
+    """
+
+    name = "urllib3"
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        super().__init__()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self._manager = None
+        self._lock = threading.Lock()
+        # Одинаковый для всех запросов Retry: ошибки отдаются сразу, повторяет BaseAPI
+        self._retries = Retry(0, read=False, redirect=False)
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    self._manager = self._build_manager()
+        return self._manager
+
+    def _build_manager(self):
+        logger.debug(
+            f"Создан пул соединений urllib3: хостов={self.pool_connections}, "
+            f"соединений на хост={self.pool_maxsize}, keep-alive={self.keep_alive}"
+        )
+        pool_kwargs = {}
+        if self.keep_alive:
+            pool_kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        return _CountingPoolManager(self.stats, num_pools=self.pool_connections, maxsize=self.pool_maxsize,
+                                    block=self.pool_block, **pool_kwargs)
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, stream=False):
+        url = _with_params(url, params)
+        headers = CaseInsensitiveDict(headers or {})
+        body = _encode_body(data, json, headers)
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        try:
+            raw = self.manager.urlopen(method, url, body=body, headers=headers, retries=self._retries,
+                                       redirect=False, timeout=_timeout(timeout), preload_content=False)
+        except (MaxRetryError, ReadTimeoutError, ProtocolError, ClosedPoolError, SSLError, OSError) as ex:
+            raise _translate_error(ex) from ex
+        response = _response(method, url, headers, body, raw.status, raw.reason, raw.headers)
+        # Тело читается из urllib3 потоком (iter_content), как в requests
+        response.raw = raw
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        with self._lock:
+            manager, self._manager = self._manager, None
+        if manager is not None:
+            manager.clear()
+            logger.debug(f"Пул соединений urllib3 закрыт. Статистика: {self.stats.as_dict()}")
+
+
+class InMemoryTransport(Transport):
+    """Запрос обрабатывает Python-функция в том же процессе, без сокетов
+
+    handler(method, path, headers, body) -> (status, headers, body), как
+    MemesApp.handle: path - путь с query-строкой, body и тело ответа - bytes.
+    Хост из URL не используется, таймауты не действуют. Подходит для
+    быстрых тестов самого клиента.
+    """
+
+    name = "memory"
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, stream=False):
+        url = _with_params(url, params)
+        headers = CaseInsensitiveDict(headers or {})
+        body = _encode_body(data, json, headers)
+        parts = urlsplit(url)
+        # Как http.server: ведущие "//" (BaseAPI.url + "/meme") схлопываются, иначе путь прочитается как хост
+        path = "/" + parts.path.lstrip("/")
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        status, response_headers, content = self.handler(method.upper(), path, headers, body or b"")
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        response = _response(method, url, headers, body, status, reason, response_headers)
+        response._content = b"" if method.upper() == "HEAD" else content
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        # Соединений нет
+        pass
+
+
+# Реализации по имени опции --transport
+TRANSPORTS = {
+    HttpPool.name: HttpPool,
+    Urllib3Transport.name: Urllib3Transport,
+    InMemoryTransport.name: InMemoryTransport,
+}
+
+
+def _with_params(url, params):
+    if not params:
+        return url
+    query = params if isinstance(params, (str, bytes)) else urlencode(params, doseq=True)
+    if isinstance(query, bytes):
+        query = query.decode("utf-8")
+    return f"{url}{'&' if urlsplit(url).query else '?'}{query}"
+
+
+def _encode_body(data, json, headers):
+    # Те же правила, что у requests.PreparedRequest: data важнее json, Content-Type ставится, если его нет
+    if not data and json is not None:
+        try:
+            body = jsonlib.dumps(json, allow_nan=False).encode("utf-8")
+        except ValueError as ex:
+            raise requests.exceptions.InvalidJSONError(ex)
+        headers.setdefault("Content-Type", "application/json")
+        return body
+    if not data:
+        return None
+    if isinstance(data, (dict, list, tuple)):
+        headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        return urlencode(data, doseq=True).encode("utf-8")
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def _timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return Timeout(connect=connect, read=read)
+    return Timeout(connect=timeout, read=timeout)
+
+
+def _translate_error(ex):
+    """Ошибка urllib3 -> исключение requests, как в requests.adapters.HTTPAdapter.send"""
+    if isinstance(ex, MaxRetryError):
+        reason = ex.reason
+        if isinstance(reason, ConnectTimeoutError) and not isinstance(reason, NewConnectionError):
+            return requests.ConnectTimeout(ex)
+        if isinstance(reason, SSLError):
+            return requests.exceptions.SSLError(ex)
+        return requests.ConnectionError(ex)
+    if isinstance(ex, ReadTimeoutError):
+        return requests.ReadTimeout(ex)
+    if isinstance(ex, SSLError):
+        return requests.exceptions.SSLError(ex)
+    return requests.ConnectionError(ex)
+
+
+def _response(method, url, headers, body, status, reason, response_headers):
+    request = requests.PreparedRequest()
+    request.method = method.upper()
+    request.url = url
+    request.headers = headers
+    request.body = body
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(response_headers)
+    response.url = url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
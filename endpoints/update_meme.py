@@ -1,9 +1,30 @@
-import allure
 from endpoints.baseapi import BaseAPI
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.meme_cache import meme_cache
+from endpoints.schemas import MEME
+from endpoints.steps import async_step, step
+
+
+def _invalidate_updated(meme_id, response):
+    # Мем и список мемов в кэше GetMeme больше не актуальны
+    if response.status_code == 200:
+        meme_cache.invalidate(meme_id)
+    return response
 
 
 class UpdateMeme(BaseAPI):
 
-    @allure.step("Update a new meme")
+    @step("Update a new meme")
     def update_meme_endpoint(self, meme_id, payload):
-        return self.send_request(method="PUT", endpoint=f"/meme/{meme_id}", json=payload)
+        response = _invalidate_updated(meme_id, self.send_request(method="PUT", endpoint=f"/meme/{meme_id}",
+                                                                  json=payload))
+        return self._check_schema(response, MEME)
+
+
+class AsyncUpdateMeme(AsyncBaseAPI):
+
+    @async_step("Update a new meme")
+    async def update_meme_endpoint(self, meme_id, payload):
+        response = _invalidate_updated(meme_id, await self.send_request(method="PUT", endpoint=f"/meme/{meme_id}",
+                                                                        json=payload))
+        return self._check_schema(response, MEME)
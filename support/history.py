@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import statistics
+import time
+from collections import defaultdict
+
+import pytest
+
+from endpoints.timing import timings
+from support.latency_budget import percentile
+from support.scheduler import setup_group
+
+SCHEMA_VERSION = 2
+# По скольким последним прогонам считается стоимость теста для планировщика
+COST_RUNS = 20
+
+# Имена тестов и эндпоинтов хранятся один раз, в результатах - только их id.
+# Результаты и сводки по эндпоинтам лежат по первичному ключу (объект, прогон),
+# поэтому история одного теста или эндпоинта читается диапазоном по индексу
+# независимо от того, сколько лет прогонов накопилось.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    exitstatus INTEGER,
+    workers INTEGER NOT NULL DEFAULT 0,
+    tests INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+CREATE TABLE IF NOT EXISTS tests (id INTEGER PRIMARY KEY, nodeid TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS endpoints (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS results (
+    test_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    http_calls INTEGER NOT NULL,
+    PRIMARY KEY (test_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE TABLE IF NOT EXISTS calls (
+    endpoint_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    test_id INTEGER,
+    total_ms REAL NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_endpoint_run ON calls (endpoint_id, run_id);
+CREATE INDEX IF NOT EXISTS calls_run ON calls (run_id);
+CREATE TABLE IF NOT EXISTS endpoint_runs (
+    endpoint_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    p50_ms REAL NOT NULL,
+    p95_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    mean_ms REAL NOT NULL,
+    PRIMARY KEY (endpoint_id, run_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS test_groups (test_id INTEGER PRIMARY KEY, fixtures TEXT NOT NULL);
+"""
+
+
+class HistoryStore:
+    """История прогонов в SQLite: результаты тестов, отдельные HTTP-вызовы и сводки по эндпоинтам
+
+    Отдельные вызовы старше keep_calls_days удаляются (prune_calls), сводки
+    по эндпоинтам и результаты тестов хранятся всегда.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{path}: версия схемы {version} новее поддерживаемой {SCHEMA_VERSION}")
+        self.db.executescript(_SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def record_run(self, started_at, duration, results, calls, exitstatus=None, workers=0):
+        """Записывает прогон одной транзакцией
+
+        results - {nodeid: {"outcome", "duration", "http_calls", "group"}}, где group -
+        общие фикстуры теста (support/scheduler.py) или None,
+        calls - [(nodeid, ключ эндпоинта, total_ms, статус)].
+        """
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (started_at, duration, exitstatus, workers, tests, failed) VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at, duration, exitstatus, workers, len(results),
+                 sum(result["outcome"] in ("failed", "error") for result in results.values())),
+            ).lastrowid
+            test_ids = self._ids("tests", "nodeid", set(results) | {nodeid for nodeid, *_ in calls})
+            endpoint_ids = self._ids("endpoints", "key", {key for _, key, *_ in calls})
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results (test_id, run_id, outcome, duration, http_calls) VALUES (?, ?, ?, ?, ?)",
+                [(test_ids[nodeid], run_id, result["outcome"], result["duration"], result["http_calls"])
+                 for nodeid, result in results.items()],
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO test_groups (test_id, fixtures) VALUES (?, ?)",
+                [(test_ids[nodeid], json.dumps(result["group"])) for nodeid, result in results.items()
+                 if result.get("group") is not None],
+            )
+            self.db.executemany(
+                "INSERT INTO calls (endpoint_id, run_id, test_id, total_ms, status) VALUES (?, ?, ?, ?, ?)",
+                [(endpoint_ids[key], run_id, test_ids.get(nodeid), total_ms, None if status is None else str(status))
+                 for nodeid, key, total_ms, status in calls],
+            )
+            by_endpoint = defaultdict(list)
+            for _, key, total_ms, _ in calls:
+                by_endpoint[key].append(total_ms)
+            self.db.executemany(
+                "INSERT INTO endpoint_runs (endpoint_id, run_id, count, p50_ms, p95_ms, max_ms, mean_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(endpoint_ids[key], run_id, len(values), percentile(values, 50), percentile(values, 95),
+                  values[-1], statistics.fmean(values))
+                 for key, values in ((key, sorted(values)) for key, values in by_endpoint.items())],
+            )
+        return run_id
+
+    def prune_calls(self, keep_days, now=None):
+        """Удаляет отдельные вызовы прогонов старше keep_days дней; возвращает число удаленных"""
+        cutoff = (now or time.time()) - keep_days * 86400
+        row = self.db.execute("SELECT max(id) FROM runs WHERE started_at < ?", (cutoff,)).fetchone()
+        if row[0] is None:
+            return 0
+        with self.db:
+            return self.db.execute("DELETE FROM calls WHERE run_id <= ?", (row[0],)).rowcount
+
+    def runs(self, limit):
+        """Последние limit прогонов, от старых к новым"""
+        rows = self.db.execute(
+            "SELECT id, started_at, duration, exitstatus, workers, tests, failed FROM runs ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        columns = ("id", "started_at", "duration", "exitstatus", "workers", "tests", "failed")
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+    def results(self, first_run):
+        """{nodeid: [(run_id, outcome, duration, http_calls), ...]} начиная с прогона first_run"""
+        history = defaultdict(list)
+        for nodeid, run_id, outcome, duration, http_calls in self.db.execute(
+                "SELECT tests.nodeid, run_id, outcome, duration, http_calls FROM results "
+                "JOIN tests ON tests.id = results.test_id WHERE run_id >= ? ORDER BY run_id", (first_run,)):
+            history[nodeid].append((run_id, outcome, duration, http_calls))
+        return history
+
+    def test_costs(self, runs=COST_RUNS):
+        """{nodeid: {"duration", "http_calls", "group"}}: медианы по последним runs прогонам, без пропусков"""
+        first_run = self.db.execute(
+            "SELECT min(id) FROM (SELECT id FROM runs ORDER BY id DESC LIMIT ?)", (runs,)).fetchone()[0]
+        if first_run is None:
+            return {}
+        samples = defaultdict(list)
+        for nodeid, duration, http_calls in self.db.execute(
+                "SELECT tests.nodeid, duration, http_calls FROM results JOIN tests ON tests.id = results.test_id "
+                "WHERE run_id >= ? AND outcome != 'skipped'", (first_run,)):
+            samples[nodeid].append((duration, http_calls))
+        groups = dict(self.db.execute(
+            "SELECT tests.nodeid, fixtures FROM test_groups JOIN tests ON tests.id = test_groups.test_id"))
+        return {
+            nodeid: {
+                "duration": statistics.median(duration for duration, _ in values),
+                "http_calls": statistics.median(http_calls for _, http_calls in values),
+                "group": json.loads(groups[nodeid]) if nodeid in groups else [],
+            }
+            for nodeid, values in samples.items()
+        }
+
+    def endpoint_summaries(self, first_run):
+        """{ключ эндпоинта: [(run_id, count, p50, p95, max, mean), ...]} начиная с прогона first_run"""
+        history = defaultdict(list)
+        for key, *row in self.db.execute(
+                "SELECT endpoints.key, run_id, count, p50_ms, p95_ms, max_ms, mean_ms FROM endpoint_runs "
+                "JOIN endpoints ON endpoints.id = endpoint_runs.endpoint_id WHERE run_id >= ? ORDER BY run_id",
+                (first_run,)):
+            history[key].append(tuple(row))
+        return history
+
+    def call_samples(self, key, first_run, last_run):
+        """Время отдельных вызовов эндпоинта в прогонах [first_run, last_run], мс"""
+        return [row[0] for row in self.db.execute(
+            "SELECT total_ms FROM calls JOIN endpoints ON endpoints.id = calls.endpoint_id "
+            "WHERE endpoints.key = ? AND run_id BETWEEN ? AND ?", (key, first_run, last_run))]
+
+    def _ids(self, table, column, names):
+        self.db.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(name,) for name in names])
+        ids = {}
+        names = list(names)
+        # Ограничение SQLite на число параметров запроса
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(self.db.execute(f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})", chunk))
+        return ids
+
+
+class HistoryRecorder:
+    """Плагин: замеряет HTTP-вызовы каждого этапа теста и по окончании сессии пишет их в HistoryStore
+
+    Это единственное место, где вызовы этапов собираются через
+    timings.capture(): они приходят в отчете (http_call_timings) вместе с
+    общими фикстурами теста (setup_group), поэтому под pytest-xdist все
+    пишет контроллер, а воркеры только замеряют. Результаты сессии (results)
+    читает и планировщик (support/scheduler.py). С record=False
+    (--no-history) история не пишется, но замеры собираются.
+    """
+
+    def __init__(self, config, path, keep_calls_days, record=True):
+        self.config = config
+        self.path = path
+        self.keep_calls_days = keep_calls_days
+        self.record = record
+        self.is_worker = hasattr(config, "workerinput")
+        self.started_at = time.time()
+        self.results = {}
+        self.calls = []
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_setup(self, item):
+        return (yield from self._capture(item))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item):
+        return (yield from self._capture(item))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        return (yield from self._capture(item))
+
+    @staticmethod
+    def _capture(item):
+        with timings.capture() as calls:
+            try:
+                return (yield)
+            finally:
+                item._memes_history_calls = [(timing.key, round(timing.total * 1000, 3), timing.status)
+                                             for timing in calls]
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        # Атрибуты отчета передаются с воркеров xdist вместе с отчетом
+        report = yield
+        report.http_call_timings = getattr(item, "_memes_history_calls", [])
+        if call.when == "setup":
+            report.setup_group = setup_group(item)
+        return report
+
+    def pytest_runtest_logreport(self, report):
+        if self.is_worker:
+            return
+        result = self.results.setdefault(report.nodeid, {"outcome": "passed", "duration": 0.0, "http_calls": 0,
+                                                         "group": None, "worker": "main"})
+        result["duration"] += report.duration
+        calls = getattr(report, "http_call_timings", None) or []
+        result["http_calls"] += len(calls)
+        self.calls.extend((report.nodeid, key, total_ms, status) for key, total_ms, status in calls)
+        if getattr(report, "setup_group", None) is not None:
+            result["group"] = report.setup_group
+        node = getattr(report, "node", None)
+        if node is not None:
+            result["worker"] = node.gateway.id
+        if report.failed:
+            result["outcome"] = "failed" if report.when == "call" else "error"
+        elif report.skipped and result["outcome"] == "passed":
+            result["outcome"] = "skipped"
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session, exitstatus):
+        if self.is_worker or not self.record or not self.results:
+            return
+        store = HistoryStore(self.path)
+        try:
+            store.record_run(self.started_at, time.time() - self.started_at, self.results, self.calls,
+                             exitstatus=int(exitstatus), workers=getattr(self.config.option, "numprocesses", 0) or 0)
+            store.prune_calls(self.keep_calls_days)
+        finally:
+            store.close()
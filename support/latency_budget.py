@@ -0,0 +1,89 @@
+import json
+import math
+import re
+from collections import defaultdict
+
+from endpoints.timing import PHASES
+
+_LIMIT = re.compile(r"^(p\d{1,2}(?:\.\d+)?|max)_ms$")
+
+
+class LatencyBudgetWarning(UserWarning):
+    """Бюджет задержки превышен в режиме warn"""
+
+
+def percentile(sorted_values, pct):
+    """Перцентиль по методу nearest-rank для отсортированного списка"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_limits(limits, source):
+    """{'p95_ms': 500, 'max_ms': 2000} -> {'p95': 500.0, 'max': 2000.0}"""
+    parsed = {}
+    for name, value in limits.items():
+        match = _LIMIT.match(name)
+        if match is None:
+            raise ValueError(f"{source}: неизвестный лимит {name!r}, ожидается pNN_ms или max_ms")
+        parsed[match.group(1)] = float(value)
+    return parsed
+
+
+def load_budgets(path):
+    """Бюджеты по эндпоинтам из JSON-файла
+
+    {
+        "GET /meme/{id}": {"p95_ms": 300, "max_ms": 1000},
+        "POST /meme": {"max_ms": 1500}
+    }
+    """
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return {key: parse_limits(limits, f"{path}: {key}") for key, limits in data.items()}
+
+
+def _statistic(values, name):
+    return values[-1] if name == "max" else percentile(values, float(name[1:]))
+
+
+def evaluate(calls, limits=None, endpoint_limits=None):
+    """Проверяет вызовы теста (RequestTiming) на бюджеты
+
+    limits - для всех вызовов теста вместе (из маркера), endpoint_limits -
+    по эндпоинтам (из файла). Возвращает (список нарушений, разбивка по эндпоинтам).
+    """
+    by_endpoint = defaultdict(list)
+    for timing in calls:
+        by_endpoint[timing.key].append(timing)
+
+    violations = []
+    checks = []
+    if limits:
+        checks.append(("все вызовы теста", calls, limits, "маркер"))
+    for key, limits_for_key in (endpoint_limits or {}).items():
+        if key in by_endpoint:
+            checks.append((key, by_endpoint[key], limits_for_key, "файл бюджетов"))
+    for label, timings_, check_limits, source in checks:
+        values = sorted(timing.total * 1000 for timing in timings_)
+        if not values:
+            continue
+        for name, limit in check_limits.items():
+            actual = _statistic(values, name)
+            if actual is not None and actual > limit:
+                violations.append(f"{label} (N={len(values)}): {name} {actual:.1f} мс > {limit:g} мс ({source})")
+    return violations, breakdown(by_endpoint)
+
+
+def breakdown(by_endpoint):
+    lines = []
+    for key, timings_ in sorted(by_endpoint.items()):
+        values = sorted(timing.total * 1000 for timing in timings_)
+        phases = ", ".join(
+            f"{phase} {sum(getattr(timing, phase) for timing in timings_) * 1000 / len(timings_):.1f}"
+            for phase in PHASES
+        )
+        lines.append(f"  {key}: N={len(values)}, p50 {percentile(values, 50):.1f}, "
+                     f"p95 {percentile(values, 95):.1f}, max {values[-1]:.1f} мс; в среднем: {phases}")
+    return "\n".join(lines)
@@ -0,0 +1,93 @@
+import copy
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+
+from endpoints.cleanup import delete_concurrently
+
+logger = logging.getLogger(__name__)
+
+
+class MemePool:
+    """Пул заранее созданных мемов для тестов
+
+    lease() выдает мем в эксклюзивное пользование, release() возвращает его
+    в исходное состояние одним PUT. Если тест удалил мем, PUT вернет 404 и
+    вместо него создается новый. shared_id() - один мем на всех для тестов,
+    которые его не меняют, missing_id() - id заведомо несуществующего мема.
+
+    Каждый процесс (воркер xdist) держит свой пул, внутри процесса пул
+    потокобезопасен.
+    """
+
+    def __init__(self, create_api, update_api, delete_api, payload, size=2):
+        self.create_api = create_api
+        self.update_api = update_api
+        self.delete_api = delete_api
+        self.payload = copy.deepcopy(payload)
+        self.size = size
+        self._free = queue.SimpleQueue()
+        self._owned = set()
+        self._lock = threading.RLock()
+        self._shared_id = None
+        self._missing_id = None
+
+    def fill(self):
+        for _ in range(self.size):
+            self._free.put(self._create())
+        logger.debug(f"Пул мемов заполнен: {self.size} шт.")
+
+    def lease(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            # Все мемы заняты (например, параллельные потоки) - пул растет
+            return self._create()
+
+    def release(self, meme_id):
+        response = self.update_api.update_meme_endpoint(meme_id, {"id": meme_id, **copy.deepcopy(self.payload)})
+        if response.status_code == 200:
+            self._free.put(meme_id)
+            return
+        logger.debug(f"Мем {meme_id} не восстановлен (статус {response.status_code}), создается новый")
+        with self._lock:
+            self._owned.discard(meme_id)
+        self._free.put(self._create())
+
+    @contextmanager
+    def leased(self):
+        meme_id = self.lease()
+        try:
+            yield meme_id
+        finally:
+            self.release(meme_id)
+
+    def shared_id(self):
+        with self._lock:
+            if self._shared_id is None:
+                self._shared_id = self._create()
+            return self._shared_id
+
+    def missing_id(self):
+        with self._lock:
+            if self._missing_id is None:
+                meme_id = self._create()
+                self.delete_api.delete_meme_by_id(meme_id)
+                self._owned.discard(meme_id)
+                self._missing_id = meme_id
+            return self._missing_id
+
+    def close(self, max_workers=8):
+        with self._lock:
+            owned, self._owned = self._owned, set()
+        delete_concurrently(sorted(owned), self.delete_api.delete_meme_by_id, max_workers)
+        logger.debug(f"Пул мемов очищен: {len(owned)} шт.")
+
+    def _create(self):
+        response = self.create_api.create_new_meme(copy.deepcopy(self.payload))
+        assert response.status_code == 200, f"Не удалось создать мем для пула: {response.status_code}"
+        meme_id = response.json()["id"]
+        with self._lock:
+            self._owned.add(meme_id)
+        return meme_id
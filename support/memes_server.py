@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import itertools
+import json
+import re
+import secrets
+import threading
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MEME_FIELDS = {"text": str, "url": str, "tags": list, "info": dict}
+JSON_HEADERS = {"Content-Type": "application/json"}
+TEXT_HEADERS = {"Content-Type": "text/html; charset=utf-8"}
+# Как часто поток сервера проверяет запрос на остановку, секунд
+SHUTDOWN_POLL = 0.05
+
+_AUTHORIZE_TOKEN = re.compile(r"^/authorize/(?P<token>.*)$")
+_MEME_ID = re.compile(r"^/meme/(?P<meme_id>[^/]+)$")
+
+
+class MemesApp:
+    """Локальная реализация контракта Memes API (/authorize и CRUD /meme)
+
+    Коды ответов и валидация совпадают с тем, что проверяет tests/test_memes.py.
+    handle() не зависит от HTTP-сервера и может вызываться напрямую.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._memes = {}
+        self._ids = itertools.count(1)
+        # Чужой мем: попытка изменить его дает 403
+        self._add_meme({"text": "Seed meme", "url": "https://example.com/seed.jpg",
+                        "tags": ["seed"], "info": {"owner": "admin"}}, "admin")
+
+    def handle(self, method, path, headers, body):
+        """Возвращает (status, headers, body) для запроса"""
+        path = re.sub(r"/+", "/", unquote(urlsplit(path).path))
+
+        if path == "/authorize":
+            if method != "POST":
+                return self._text(405, "Method Not Allowed")
+            return self._authorize(body)
+
+        match = _AUTHORIZE_TOKEN.match(path)
+        if match:
+            if method != "GET":
+                return self._text(405, "Method Not Allowed")
+            user = self._tokens.get(match.group("token"))
+            if user is None:
+                return self._text(404, "Token not found")
+            return self._text(200, f"Token is alive. Username is {user}")
+
+        if path == "/meme":
+            user = self._current_user(headers)
+            if method not in ("GET", "POST"):
+                return self._text(405, "Method Not Allowed")
+            if user is None:
+                return self._text(401, "Not authorized")
+            if method == "GET":
+                with self._lock:
+                    memes = list(self._memes.values())
+                return self._conditional(headers, self._json(200, {"data": memes}))
+            return self._create_meme(body, user)
+
+        match = _MEME_ID.match(path)
+        if match:
+            user = self._current_user(headers)
+            if method not in ("GET", "PUT", "DELETE"):
+                return self._text(405, "Method Not Allowed")
+            if user is None:
+                return self._text(401, "Not authorized")
+            try:
+                meme_id = int(match.group("meme_id"))
+            except ValueError:
+                return self._text(404, "Not Found")
+            return self._meme_by_id(method, meme_id, headers, body, user)
+
+        return self._text(404, "Not Found")
+
+    def _authorize(self, body):
+        payload = self._parse_json(body)
+        if not isinstance(payload, dict) or set(payload) != {"name"}:
+            return self._text(400, "Invalid parameters")
+        name = payload["name"]
+        if not isinstance(name, str) or not name:
+            return self._text(400, "Invalid parameters")
+        token = secrets.token_urlsafe(12)
+        with self._lock:
+            self._tokens[token] = name
+        return self._json(200, {"token": token, "user": name})
+
+    def _create_meme(self, body, user):
+        payload = self._parse_json(body)
+        if not self._valid_meme(payload, set(MEME_FIELDS)):
+            return self._text(400, "Invalid parameters")
+        return self._json(200, self._add_meme(payload, user))
+
+    def _meme_by_id(self, method, meme_id, headers, body, user):
+        with self._lock:
+            meme = self._memes.get(meme_id)
+            if meme is None:
+                return self._text(404, "Not Found")
+            if method == "GET":
+                return self._conditional(headers, self._json(200, dict(meme)))
+            if meme["updated_by"] != user:
+                return self._text(403, "You are not the meme owner")
+            if method == "DELETE":
+                del self._memes[meme_id]
+                return self._text(200, f"Meme with id {meme_id} successfully deleted")
+
+            payload = self._parse_json(body)
+            if not self._valid_meme(payload, set(MEME_FIELDS) | {"id"}) or payload["id"] != meme_id:
+                return self._text(400, "Invalid parameters")
+            meme.update({field: payload[field] for field in MEME_FIELDS})
+            return self._json(200, dict(meme))
+
+    def _add_meme(self, payload, user):
+        meme = {"id": next(self._ids), **{field: payload[field] for field in MEME_FIELDS}, "updated_by": user}
+        with self._lock:
+            self._memes[meme["id"]] = meme
+        return dict(meme)
+
+    def _current_user(self, headers):
+        return self._tokens.get(headers.get("Authorization", ""))
+
+    @staticmethod
+    def _valid_meme(payload, keys):
+        if not isinstance(payload, dict) or set(payload) != keys:
+            return False
+        if "id" in keys and (not isinstance(payload["id"], int) or isinstance(payload["id"], bool)):
+            return False
+        # Все поля обязательны и не могут быть пустыми
+        return all(isinstance(payload[field], kind) and payload[field] for field, kind in MEME_FIELDS.items())
+
+    @staticmethod
+    def _parse_json(body):
+        try:
+            return json.loads(body) if body else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _conditional(headers, response):
+        # ETag - хэш тела; совпавший If-None-Match дает 304 без тела
+        status, response_headers, payload = response
+        etag = f'"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return status, {**response_headers, "ETag": etag}, payload
+
+    @staticmethod
+    def _json(status, data):
+        return status, JSON_HEADERS, json.dumps(data).encode("utf-8")
+
+    @staticmethod
+    def _text(status, text):
+        return status, TEXT_HEADERS, text.encode("utf-8")
+
+
+class _MemesRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    app = None
+
+    def __getattr__(self, name):
+        # Любой метод (включая невалидные вроде OPTION) обрабатывается приложением
+        if name.startswith("do_"):
+            return self._dispatch
+        raise AttributeError(name)
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, payload = self.app.handle(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"[memes-server] {format % args}")
+
+
+class MemesServer:
+    """HTTP-сервер с MemesApp в фоновом потоке"""
+
+    def __init__(self, host="127.0.0.1", port=0, app=None):
+        self.app = app or MemesApp()
+        handler = type("MemesRequestHandler", (_MemesRequestHandler,), {"app": self.app})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        # stop() ждет, пока serve_forever заметит shutdown: с интервалом опроса по
+        # умолчанию (0.5 с) это добавляло до полсекунды к каждому запуску pytest
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": SHUTDOWN_POLL},
+                                        name="memes-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Локальный Memes API запущен: {self.url}")
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        logger.info("Локальный Memes API остановлен")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный Memes API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    server = MemesServer(args.host, args.port)
+    print(f"Memes API: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
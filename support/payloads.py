@@ -0,0 +1,11 @@
+# Эталонные тела запросов, общие для фикстур и вспомогательных инструментов
+
+SAMPLE_MEME_PAYLOAD = {
+    "text": "Test meme text",
+    "url": "https://example.com/meme.jpg",
+    "tags": ["funny", "test"],
+    "info": {
+        "colors": ["red", "blue"],
+        "objects": ["text", "image"]
+    }
+}
@@ -0,0 +1,360 @@
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+
+from endpoints.log_utils import LazyBody
+from endpoints.timing import current_timing, timings
+
+logger = logging.getLogger(__name__)
+
+# Расширение сегмента лога по формату и суффикс сжатого сегмента
+FORMATS = {"text": ".log", "jsonl": ".jsonl"}
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+INDEX_SUFFIX = ".idx.json"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Буферизованные записи доходят до диска не реже раза в FLUSH_INTERVAL секунд,
+# WARNING и выше - сразу
+FLUSH_INTERVAL = 1.0
+WRITE_BUFFER = 64 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_DATA_FILE = re.compile(r"^(?P<stem>test_run_.+?)(?P<ext>\.log|\.jsonl)(?P<compression>\.gz|\.zst)?$")
+
+_STOP = object()
+
+
+class LogContext(logging.Filter):
+    """Дописывает в запись лога текущий тест, эндпоинт и статус HTTP-вызова
+
+    Ставится на обработчик, который работает в потоке теста (QueueHandler):
+    только там известны timings.current_test и RequestTiming текущего вызова.
+    С compact=True тела запросов и ответов (LazyBody) сериализуются одной строкой.
+    """
+
+    def __init__(self, compact=False):
+        super().__init__()
+        self.compact = compact
+
+    def filter(self, record):
+        if not hasattr(record, "test"):
+            record.test = timings.current_test
+        timing = current_timing()
+        if timing is not None:
+            if not hasattr(record, "endpoint"):
+                record.endpoint = timing.key
+            if not hasattr(record, "status") and timing.status is not None:
+                record.status = timing.status
+        if self.compact and isinstance(record.args, tuple):
+            for arg in record.args:
+                if isinstance(arg, LazyBody):
+                    arg.indent = None
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Запись лога - одна строка JSON: время, уровень, логгер, сообщение, тест, эндпоинт, статус"""
+
+    def format(self, record):
+        entry = {
+            "ts": f"{self.formatTime(record, DATE_FORMAT)}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in ("test", "endpoint", "status"):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SegmentIndex:
+    """Что есть в сегменте лога: тесты, эндпоинты, статусы, уровни и интервал времени
+
+    Сохраняется рядом с сегментом (<сегмент>.idx.json); tools/query_logs.py по
+    нему пропускает сегменты, не распаковывая их.
+    """
+
+    def __init__(self, log_format):
+        self.log_format = log_format
+        self.tests = set()
+        self.endpoints = set()
+        self.statuses = set()
+        self.levels = Counter()
+        self.first = None
+        self.last = None
+
+    def add(self, record):
+        test = getattr(record, "test", None)
+        if test is not None:
+            self.tests.add(test)
+        endpoint = getattr(record, "endpoint", None)
+        if endpoint is not None:
+            self.endpoints.add(endpoint)
+        status = getattr(record, "status", None)
+        if status is not None:
+            self.statuses.add(str(status))
+        self.levels[record.levelname] += 1
+        if self.first is None:
+            self.first = record.created
+        self.last = record.created
+
+    def to_dict(self):
+        return {
+            "format": self.log_format,
+            "records": sum(self.levels.values()),
+            "first": self.first,
+            "last": self.last,
+            "levels": dict(self.levels),
+            "tests": sorted(self.tests),
+            "endpoints": sorted(self.endpoints),
+            "statuses": sorted(self.statuses),
+        }
+
+
+class BackgroundTasks:
+    """Один фоновый поток для сжатия сегментов и удаления старых логов
+
+    Поток запускается при первой задаче и работает с пониженным приоритетом,
+    чтобы сжатие не отнимало процессор и диск у тестов.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def submit(self, func, *args):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="run-logs", daemon=True)
+            self._thread.start()
+        self._queue.put((func, args))
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            # В Linux приоритет задается отдельно для каждого потока
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            func, args = task
+            try:
+                func(*args)
+            except Exception as ex:
+                logger.error("Фоновая задача логов %s не выполнена: %s", func.__name__, ex)
+
+
+class RunLogHandler(logging.Handler):
+    """Файловый лог запуска: сегменты с ротацией по размеру и времени, сжатие, индекс
+
+    Сегменты называются <name>.001.log, <name>.002.log, ... (.jsonl для
+    --api-log-format=jsonl). Каталог и первый сегмент создаются при первой записи.
+    Завершенный сегмент (превышен max_bytes или прошло rotate_seconds, либо
+    закрытие обработчика) получает индекс и сжимается в фоне.
+    """
+
+    def __init__(self, directory, name, log_format="text", max_bytes=50 * 1024 * 1024, rotate_seconds=3600,
+                 compression="gzip"):
+        if log_format not in FORMATS:
+            raise ValueError(f"Неизвестный формат лога: {log_format}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        if compression == "zstd":
+            import zstandard  # noqa: F401 - проверяем зависимость до первой записи
+        super().__init__()
+        self.directory = directory
+        self.name = name
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+        self.tasks = BackgroundTasks()
+        self.path = None
+        self.segments = 0
+        self._stream = None
+        self._bytes = 0
+        self._opened_at = 0.0
+        self._flushed_at = 0.0
+        self._index = None
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + "\n").encode("utf-8", "backslashreplace")
+            if self._stream is not None and self._should_rotate(len(data)):
+                self._complete()
+            if self._stream is None:
+                self._open()
+            self._stream.write(data)
+            self._bytes += len(data)
+            self._index.add(record)
+            now = time.monotonic()
+            if record.levelno >= logging.WARNING or now - self._flushed_at >= FLUSH_INTERVAL:
+                self._stream.flush()
+                self._flushed_at = now
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            if self._stream is not None:
+                self._stream.flush()
+
+    def close(self):
+        with self.lock:
+            if self._stream is not None:
+                self._complete()
+        self.tasks.close()
+        super().close()
+
+    def enforce_retention(self, keep_days, max_total_bytes):
+        """Удаляет в фоне старые логи прошлых запусков (логи этого запуска не трогает)"""
+        self.tasks.submit(enforce_retention, self.directory, keep_days, max_total_bytes, self.name)
+
+    def _should_rotate(self, size):
+        if self.max_bytes and self._bytes and self._bytes + size > self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments += 1
+        self.path = os.path.join(self.directory, f"{self.name}.{self.segments:03d}{FORMATS[self.log_format]}")
+        self._stream = open(self.path, "ab", buffering=WRITE_BUFFER)
+        self._bytes = 0
+        self._opened_at = self._flushed_at = time.monotonic()
+        self._index = SegmentIndex(self.log_format)
+
+    def _complete(self):
+        self._stream.close()
+        self._stream = None
+        write_index(self.path, self._index.to_dict())
+        if self.compression != "none":
+            self.tasks.submit(compress_segment, self.path, self.compression)
+
+
+def index_path(path):
+    match = _DATA_FILE.match(os.path.basename(path))
+    stem = match.group("stem") if match else os.path.basename(path)
+    return os.path.join(os.path.dirname(path), stem + INDEX_SUFFIX)
+
+
+def write_index(path, index):
+    target = index_path(path)
+    tmp = f"{target}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False)
+    os.replace(tmp, target)
+
+
+def read_index(path):
+    """Индекс сегмента или None, если его нет (старые логи, аварийно прерванный запуск)"""
+    try:
+        with open(index_path(path), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def compress_segment(path, compression):
+    target = path + COMPRESSIONS[compression]
+    tmp = f"{target}.tmp"
+    with open(path, "rb") as src:
+        if compression == "zstd":
+            import zstandard
+
+            with open(tmp, "wb") as dst:
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, dst)
+        else:
+            with gzip.open(tmp, "wb", compresslevel=GZIP_LEVEL) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp, target)
+    os.remove(path)
+
+
+def open_segment(path):
+    """Строки сегмента (сжатого или нет) потоком, без распаковки файла целиком"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        import zstandard
+
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def list_segments(directory):
+    """Файлы сегментов логов (без индексов) в порядке запусков и номеров сегментов"""
+    paths = [path for path in glob.glob(os.path.join(directory, "test_run_*"))
+             if _DATA_FILE.match(os.path.basename(path))]
+    return sorted(paths)
+
+
+def segment_format(path):
+    match = _DATA_FILE.match(os.path.basename(path))
+    return "jsonl" if match and match.group("ext") == ".jsonl" else "text"
+
+
+def enforce_retention(directory, keep_days, max_total_bytes, current_run=None, now=None):
+    """Удаляет сегменты старше keep_days дней, затем самые старые, пока логи больше max_total_bytes
+
+    Сегмент удаляется вместе с индексом. Файлы, имя которых начинается с
+    current_run (этот запуск и его воркеры xdist), не удаляются.
+    """
+    now = now or time.time()
+    segments = {}
+    for path in glob.glob(os.path.join(directory, "test_run_*")):
+        name = os.path.basename(path)
+        if current_run and name.startswith(current_run):
+            continue
+        match = _DATA_FILE.match(name)
+        stem = match.group("stem") if match else name[:-len(INDEX_SUFFIX)] if name.endswith(INDEX_SUFFIX) else None
+        if stem is None:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entry = segments.setdefault(stem, {"paths": [], "size": 0, "mtime": 0.0})
+        entry["paths"].append(path)
+        entry["size"] += stat.st_size
+        entry["mtime"] = max(entry["mtime"], stat.st_mtime)
+
+    ordered = sorted(segments.values(), key=lambda entry: entry["mtime"])
+    total = sum(entry["size"] for entry in ordered)
+    removed = freed = 0
+    for entry in ordered:
+        expired = keep_days and entry["mtime"] < now - keep_days * 86400
+        if not expired and (not max_total_bytes or total <= max_total_bytes):
+            continue
+        for path in entry["paths"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= entry["size"]
+        freed += entry["size"]
+        removed += 1
+    if removed:
+        logger.debug("Удалено старых сегментов логов: %s (%s байт)", removed, freed)
+    return removed, freed
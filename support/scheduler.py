@@ -0,0 +1,257 @@
+import heapq
+import os
+import statistics
+from collections import defaultdict, deque
+
+import pytest
+
+# Стоимость теста без истории, секунд (если история пуста)
+DEFAULT_COST = 0.1
+
+
+def setup_group(item):
+    """Общие (не function) фикстуры теста: тесты с одинаковым набором делят их настройку"""
+    fixtureinfo = getattr(item, "_fixtureinfo", None)
+    if fixtureinfo is None:
+        return []
+    return sorted(name for name in fixtureinfo.names_closure
+                  if name in fixtureinfo.name2fixturedefs
+                  and fixtureinfo.name2fixturedefs[name][-1].scope != "function")
+
+
+def group_keys(groups):
+    """{nodeid: [фикстуры]} -> {nodeid: ключ группы} без фикстур, общих для всех тестов"""
+    known = [set(group) for group in groups.values() if group]
+    common = set.intersection(*known) if known else set()
+    return {nodeid: tuple(name for name in group if name not in common) for nodeid, group in groups.items()}
+
+
+def plan_lpt(nodeids, costs, keys, workers):
+    """Раскладывает тесты по workers воркерам: группы целиком, самые дорогие первыми (LPT)
+
+    Группа дороже средней загрузки воркера делится на части, чтобы один воркер
+    не получил ее целиком; внутри части сохраняется порядок сбора.
+    Возвращает (индексы тестов по воркерам, предсказанная загрузка воркеров).
+    """
+    total = sum(costs[nodeid] for nodeid in nodeids)
+    limit = max(total / max(workers, 1), max((costs[nodeid] for nodeid in nodeids), default=0.0))
+    groups = {}
+    for index, nodeid in enumerate(nodeids):
+        groups.setdefault(keys.get(nodeid, ()), []).append(index)
+
+    units = []
+    for indices in groups.values():
+        unit, unit_cost = [], 0.0
+        for index in indices:
+            cost = costs[nodeids[index]]
+            if unit and unit_cost + cost > limit:
+                units.append((unit_cost, unit))
+                unit, unit_cost = [], 0.0
+            unit.append(index)
+            unit_cost += cost
+        units.append((unit_cost, unit))
+    units.sort(key=lambda item: (-item[0], item[1][0]))
+
+    assignment = [[] for _ in range(workers)]
+    loads = [(0.0, worker) for worker in range(workers)]
+    for unit_cost, unit in units:
+        load, worker = heapq.heappop(loads)
+        assignment[worker].extend(unit)
+        heapq.heappush(loads, (load + unit_cost, worker))
+    predicted = [0.0] * workers
+    for load, worker in loads:
+        predicted[worker] = load
+    return assignment, predicted
+
+
+class CostScheduler:
+    """Плагин: стоимость тестов из прошлых прогонов, группировка по общей настройке, LPT для xdist
+
+    Стоимость теста - время setup + call + teardown (включая фикстуры вроде
+    created_meme_id и auth_token), медиана по последним прогонам из истории
+    (support/history.py). Сам планировщик ничего не замеряет и не хранит:
+    замеры текущего прогона собирает HistoryRecorder (recorder.results), он
+    же пишет их в историю вместе с общими фикстурами теста.
+    """
+
+    def __init__(self, config, recorder, history_path):
+        self.config = config
+        self.enabled = config.getoption("--schedule")
+        self.is_worker = hasattr(config, "workerinput")
+        self.recorder = recorder
+        self.history_path = history_path
+        self._history = None
+        self.predicted = None
+
+    @property
+    def history(self):
+        """{nodeid: {"duration", "http_calls", "group"}} из истории; читается один раз, при первом обращении"""
+        if self._history is None:
+            self._history = {}
+            if os.path.exists(self.history_path):
+                from support.history import HistoryStore
+
+                store = HistoryStore(self.history_path)
+                try:
+                    self._history = store.test_costs()
+                finally:
+                    store.close()
+        return self._history
+
+    def cost(self, nodeid):
+        entry = self.history.get(nodeid)
+        if entry is not None:
+            return entry["duration"]
+        known = [entry["duration"] for entry in self.history.values()]
+        return statistics.median(known) if known else DEFAULT_COST
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not self.enabled:
+            return
+        # Тесты с одинаковыми общими фикстурами идут подряд; порядок групп и
+        # порядок внутри группы - как при сборе
+        keys = group_keys({item.nodeid: setup_group(item) for item in items})
+        first_seen = {}
+        for item in items:
+            first_seen.setdefault(keys[item.nodeid], len(first_seen))
+        items.sort(key=lambda item: first_seen[keys[item.nodeid]])
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_make_scheduler(self, config, log):
+        if self.enabled and config.getvalue("dist") == "load":
+            return _make_lpt_scheduling(config, log, self)
+        return None
+
+    def plan(self, nodeids, workers):
+        keys = group_keys({nodeid: self.history.get(nodeid, {}).get("group") or [] for nodeid in nodeids})
+        costs = {nodeid: self.cost(nodeid) for nodeid in nodeids}
+        return plan_lpt(nodeids, costs, keys, workers)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.enabled or self.is_worker:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.section("Планировщик тестов")
+        if not self.history:
+            write(f"История стоимости пуста ({self.history_path}): всем тестам назначена стоимость {DEFAULT_COST} с")
+        observed = self.recorder.results
+        actual = defaultdict(float)
+        for result in observed.values():
+            actual[result["worker"]] += result["duration"]
+        if self.predicted is None:
+            predicted = {"main": sum(self.cost(nodeid) for nodeid in observed)}
+        else:
+            predicted = self.predicted
+        write(f"Makespan: предсказано {max(predicted.values(), default=0.0):.2f} с, "
+              f"фактически {max(actual.values(), default=0.0):.2f} с (воркеров: {len(predicted)})")
+        for worker in sorted(set(predicted) | set(actual)):
+            write(f"  {worker}: предсказано {predicted.get(worker, 0.0):.2f} с, "
+                  f"фактически {actual.get(worker, 0.0):.2f} с")
+        costly = sorted(observed.items(), key=lambda item: -item[1]["duration"])[:5]
+        if costly:
+            write("Самые дорогие тесты:")
+            for nodeid, result in costly:
+                write(f"  {result['duration']:.3f} с, HTTP-вызовов {result['http_calls']}: {nodeid}")
+
+
+def _make_lpt_scheduling(config, log, scheduler):
+    from xdist.scheduler import LoadScheduling
+
+    class LptScheduling(LoadScheduling):
+        """Тесты раздаются воркерам по плану CostScheduler.plan, порциями
+
+        Сначала каждый воркер получает первую половину своего плана, остальное -
+        по мере выполнения (mark_test_complete -> check_schedule), как в
+        LoadScheduling. Воркер, закончивший свой план, забирает хвост (самые
+        дешевые тесты в порядке LPT) у воркера с наибольшим остатком плана.
+        Воркеры останавливаются, только когда неразданных тестов не осталось.
+        """
+
+        def __init__(self, config, log=None):
+            super().__init__(config, log)
+            self.node2plan = {}
+            # Тесты упавшего воркера (remove_node) и возвращенные в очередь (mark_test_pending)
+            self.unplanned = deque()
+
+        def schedule(self):
+            assert self.collection_is_completed
+            if self.collection is not None:
+                for node in self.nodes:
+                    self.check_schedule(node)
+                return
+            if not self._check_nodes_have_same_collection():
+                self.log("**Different tests collected, aborting run**")
+                return
+            self.collection = next(iter(self.node2collection.values()))
+            self.pending[:] = range(len(self.collection))
+            if not self.collection:
+                return
+            nodes = self.nodes
+            assignment, predicted = scheduler.plan(self.collection, len(nodes))
+            scheduler.predicted = {node.gateway.id: load for node, load in zip(nodes, predicted)}
+            for node, indices in zip(nodes, assignment):
+                self.node2plan[node] = deque(indices)
+                self._send_planned(node, max(2, (len(indices) + 1) // 2))
+            if not self.pending:
+                for node in nodes:
+                    node.shutdown()
+
+        def check_schedule(self, node, duration=0):
+            if node.shutting_down:
+                return
+            if not self.pending:
+                node.shutdown()
+            elif len(self.node2pending[node]) < 2:
+                if self.unplanned:
+                    self._send(node, [self.unplanned.popleft() for _ in range(min(2, len(self.unplanned)))])
+                elif self.node2plan.get(node):
+                    # Вторая половина остатка своего плана, но не меньше двух тестов в очереди воркера
+                    plan = self.node2plan[node]
+                    self._send_planned(node, max(2 - len(self.node2pending[node]), (len(plan) + 1) // 2))
+                else:
+                    self._steal(node)
+            self.log("num items waiting for node:", len(self.pending))
+
+        def mark_test_pending(self, item):
+            index = self.collection.index(item)
+            self.pending.insert(0, index)
+            self.unplanned.appendleft(index)
+            for node in self.node2pending:
+                self.check_schedule(node)
+
+        def remove_node(self, node):
+            pending = self.node2pending.pop(node)
+            # Неразданный остаток плана упавшего воркера забирают остальные
+            self.unplanned.extend(self.node2plan.pop(node, ()))
+            if not pending:
+                return None
+            crashitem = self.collection[pending.pop(0)]
+            self.pending.extend(pending)
+            self.unplanned.extend(pending)
+            for other in self.node2pending:
+                self.check_schedule(other)
+            return crashitem
+
+        def _steal(self, node):
+            plans = [plan for plan in self.node2plan.values() if plan]
+            if not plans:
+                return
+            victim = max(plans, key=lambda plan: sum(scheduler.cost(self.collection[index]) for index in plan))
+            stolen = [victim.pop() for _ in range(max(1, len(victim) // 2))]
+            stolen.reverse()
+            self._send(node, stolen)
+
+        def _send_planned(self, node, count):
+            plan = self.node2plan[node]
+            self._send(node, [plan.popleft() for _ in range(min(count, len(plan)))])
+
+        def _send(self, node, indices):
+            if not indices:
+                return
+            sent = set(indices)
+            self.pending[:] = [index for index in self.pending if index not in sent]
+            self.node2pending[node].extend(indices)
+            node.send_runtest_some(indices)
+
+    return LptScheduling(config, log)
@@ -0,0 +1,98 @@
+import json
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path):
+    """Эксклюзивная блокировка файла, общая для процессов (воркеров xdist и CI-джоб)"""
+    with open(path, "a+") as fh:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class TokenCache:
+    """Файловый кэш токенов авторизации с TTL
+
+    Пока токен моложе ttl - refresh_margin, он берется из кэша без запросов к API.
+    Ближе к истечению TTL токен проверяется через is_alive и продлевается,
+    а просроченный или невалидный токен заменяется новым через /authorize.
+    Все операции выполняются под файловой блокировкой, поэтому при одновременном
+    старте воркеров авторизуется только первый, остальные читают его токен.
+    При каждой записи из файла удаляются просроченные токены.
+    """
+
+    def __init__(self, path, ttl=3600, refresh_margin=300):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl)
+
+    def get_token(self, base_url, user_name, auth):
+        key = f"{base_url}|{user_name}"
+        with file_lock(self.lock_path):
+            entries = self._read()
+            entry = entries.get(key)
+            now = time.time()
+
+            if entry:
+                age = now - entry["validated_at"]
+                if age < self.ttl - self.refresh_margin:
+                    logger.info(f"Токен взят из кэша (возраст {age:.0f} c)")
+                    return entry["token"]
+                if age < self.ttl:
+                    response = auth.is_alive(entry["token"])
+                    if response.status_code == 200:
+                        logger.info("Токен из кэша подтвержден через is_alive, TTL продлен")
+                        entry["validated_at"] = now
+                        self._write(entries)
+                        return entry["token"]
+
+            logger.info("Получение нового токена авторизации...")
+            response = auth.authorization({"name": user_name})
+            assert response.status_code == 200, "Не удалось получить токен авторизации"
+            token = response.json()["token"]
+            entries[key] = {"token": token, "obtained_at": now, "validated_at": now}
+            self._write(entries)
+            return token
+
+    def invalidate(self, base_url, user_name):
+        key = f"{base_url}|{user_name}"
+        with file_lock(self.lock_path):
+            entries = self._read()
+            if entries.pop(key, None) is not None:
+                self._write(entries)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        # Просроченные записи (в том числе других URL и пользователей) больше не нужны
+        now = time.time()
+        entries = {key: entry for key, entry in entries.items() if now - entry["validated_at"] < self.ttl}
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(entries, fh)
+        os.replace(tmp_path, self.path)
@@ -1,28 +1,60 @@
 import pytest
-import allure
+import pytest_asyncio
+from _pytest.runner import runtestprotocol
 import json
-import requests
 import logging
 import os
+import copy
+import queue
+import warnings
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from endpoints.authorization import Authorization
 from endpoints.baseapi import BaseAPI
 from endpoints.create_meme import CreateMeme
 from endpoints.delete_meme import DeleteMeme
 from endpoints.get_meme import GetMeme
 from endpoints.update_meme import UpdateMeme
+from endpoints.async_baseapi import AsyncBaseAPI
+from endpoints.authorization import AsyncAuthorization
+from endpoints.create_meme import AsyncCreateMeme
+from endpoints.delete_meme import AsyncDeleteMeme
+from endpoints.get_meme import AsyncGetMeme
+from endpoints.update_meme import AsyncUpdateMeme
+from endpoints.attachments import attachments
+from endpoints.cassette import MODES as CASSETTE_MODES, cassette
+from endpoints.cleanup import created_memes
+from endpoints.credentials import credentials
+from endpoints.deadline import Deadline, set_deadline, reset_deadline, set_timeout_override, reset_timeout_override
+from endpoints.log_utils import LazyBody
+from endpoints.meme_cache import meme_cache
+from endpoints.response import ApiResponse
+from endpoints.steps import steps
+from endpoints.timing import PHASES, timings
+from endpoints.transports import TRANSPORTS, InMemoryTransport
+from support.history import HistoryRecorder
+from support.latency_budget import LatencyBudgetWarning, evaluate, load_budgets, parse_limits
+from support.meme_pool import MemePool
+from support.payloads import SAMPLE_MEME_PAYLOAD
+from support.run_logs import (COMPRESSIONS as LOG_COMPRESSIONS, FORMATS as RUN_LOG_FORMATS, JsonLinesFormatter,
+                              LogContext, RunLogHandler, enforce_retention as enforce_log_retention)
+from support.scheduler import CostScheduler
+from support.token_cache import TokenCache
 
 # Настройка логирования
-def setup_logging():
-    """Настройка логирования для тестов"""
-    # Создаем директорию для логов, если её нет
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # Имя файла лога с датой и временем
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"test_run_{timestamp}.log")
+def setup_logging(config, file_log=True):
+    """Настройка логирования для тестов
+
+    Вызывается из pytest_configure, а не при импорте conftest; каталог logs/
+    и файл лога создаются при первой записи. Лог делится на сегменты по
+    размеру и времени, завершенные сегменты сжимаются в фоне. С file_log=False
+    (контроллер pytest-xdist, сам тесты не выполняет) - только консоль.
+    """
+    # Имя лога с датой и временем; у воркеров xdist - свой файл
+    run_name = f"test_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        run_name = f"{run_name}_{workerinput['workerid']}"
     
     # Настройка формата логирования
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -30,17 +62,38 @@ def setup_logging():
     
     # Настройка root logger
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
     
     # Очистка существующих обработчиков
     logger.handlers.clear()
     
-    # Обработчик для файла
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(log_format, date_format)
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    if file_log:
+        # Обработчик для файла
+        structured = config.getoption("--api-log-format") == "jsonl"
+        try:
+            file_handler = RunLogHandler(
+                "logs", run_name,
+                log_format=config.getoption("--api-log-format"),
+                max_bytes=int(config.getoption("--api-log-max-mb") * 1024 * 1024),
+                rotate_seconds=config.getoption("--api-log-rotate-minutes") * 60,
+                compression=config.getoption("--api-log-compression"),
+            )
+        except ImportError:
+            raise pytest.UsageError("--api-log-compression=zstd требует пакет zstandard: pip install zstandard")
+        file_handler.setFormatter(JsonLinesFormatter() if structured
+                                  else logging.Formatter(log_format, date_format))
+        if workerinput is None:
+            file_handler.enforce_retention(config.getoption("--api-log-keep-days"),
+                                           int(config.getoption("--api-log-max-total-mb") * 1024 * 1024))
+
+        # Запись в файл идет в фоновом потоке: запрос не ждет дисковый I/O
+        global log_listener
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(LogContext(compact=structured))
+        logger.addHandler(queue_handler)
+        log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        log_listener.start()
+        set_file_log_level(getattr(logging, config.getoption("--api-log-level")))
     
     # Обработчик для консоли
     console_handler = logging.StreamHandler()
@@ -55,8 +108,243 @@ def setup_logging():
     
     return logger
 
-# Инициализация логирования при импорте модуля
-logger = setup_logging()
+log_listener = None
+logger = logging.getLogger()
+
+
+def is_xdist_controller(config):
+    """Процесс-контроллер pytest-xdist (-n N): тесты выполняют воркеры"""
+    return config.pluginmanager.has_plugin("dsession")
+
+
+def set_file_log_level(level):
+    """Уровень файлового лога; при уровне выше DEBUG тела запросов не сериализуются вовсе"""
+    for handler in log_listener.handlers:
+        handler.setLevel(level)
+    logging.getLogger().setLevel(min(level, logging.INFO))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("memes-api", "Настройки клиента Memes API")
+    group.addoption("--pool-connections", type=int, default=10,
+                    help="Сколько хостов держать в пуле соединений")
+    group.addoption("--pool-maxsize", type=int, default=10,
+                    help="Лимит соединений на один хост")
+    group.addoption("--pool-block", action="store_true", default=False,
+                    help="Ждать свободное соединение вместо превышения лимита на хост")
+    group.addoption("--no-keep-alive", action="store_true", default=False,
+                    help="Закрывать соединение после каждого запроса")
+    group.addoption("--transport", default="requests", choices=sorted(TRANSPORTS),
+                    help="Чем отправлять запросы BaseAPI: requests, urllib3 или memory - вызов локального "
+                         "Memes API в том же процессе, без сети")
+    group.addoption("--retry-attempts", type=int, default=3,
+                    help="Сколько раз всего отправлять запрос при 429/5xx и сетевых ошибках")
+    group.addoption("--retry-base-delay", type=float, default=1.0,
+                    help="Базовая пауза экспоненциального backoff с джиттером, секунд")
+    group.addoption("--retry-max-delay", type=float, default=30.0,
+                    help="Максимальная пауза между попытками (и максимальный Retry-After), секунд")
+    group.addoption("--retry-budget", type=float, default=0.2,
+                    help="Бюджет повторов: допустимая доля повторов от числа запросов")
+    group.addoption("--breaker-threshold", type=float, default=0.5,
+                    help="Доля ошибок, при которой автомат эндпоинта размыкается")
+    group.addoption("--breaker-cooldown", type=float, default=30.0,
+                    help="Через сколько секунд разомкнутый автомат пропускает пробный запрос")
+    group.addoption("--connect-timeout", type=float, default=None,
+                    help="Таймаут подключения для всех запросов, секунд (по умолчанию BaseAPI.timeout)")
+    group.addoption("--read-timeout", type=float, default=None,
+                    help="Таймаут чтения ответа для всех запросов, секунд (по умолчанию BaseAPI.timeout)")
+    group.addoption("--deadline", type=float, default=None,
+                    help="Дедлайн на HTTP-вызовы каждого теста и его фикстур, секунд (маркер deadline важнее)")
+    group.addoption("--token-ttl", type=int, default=3600,
+                    help="Сколько секунд токен из кэша считается валидным")
+    group.addoption("--token-cache", default=None,
+                    help="Путь к файлу кэша токенов (по умолчанию в .pytest_cache)")
+    group.addoption("--no-token-cache", action="store_true", default=False,
+                    help="Не использовать кэш токенов, авторизоваться заново")
+    group.addoption("--local-server", action="store_true", default=False,
+                    help="Запустить локальный Memes API в фоновом потоке и тестировать его")
+    group.addoption("--cassette", default=None,
+                    help="Путь к кассете (без расширения) для записи или воспроизведения трафика")
+    group.addoption("--cassette-mode", default="replay", choices=CASSETTE_MODES,
+                    help="record - записать трафик, replay - воспроизвести (ненайденное - в сеть), "
+                         "strict - воспроизвести, ненайденный запрос - ошибка")
+    group.addoption("--meme-cache", action="store_true", default=False,
+                    help="Кэшировать ответы GetMeme (LRU + TTL, перепроверка по ETag/Last-Modified)")
+    group.addoption("--meme-cache-ttl", type=float, default=30.0,
+                    help="Сколько секунд ответ в кэше GetMeme считается свежим")
+    group.addoption("--meme-cache-entries", type=int, default=256,
+                    help="Сколько ответов хранит кэш GetMeme")
+    group.addoption("--schedule", action="store_true", default=False,
+                    help="Группировать тесты по общим фикстурам и распределять по воркерам xdist по стоимости "
+                         "из прошлых прогонов (LPT)")
+    group.addoption("--history-db", default=os.path.join("logs", "history.sqlite3"),
+                    help="SQLite-файл истории прогонов: время и результаты тестов и HTTP-вызовов")
+    group.addoption("--no-history", action="store_true", default=False,
+                    help="Не записывать прогон в историю")
+    group.addoption("--history-keep-calls-days", type=float, default=180,
+                    help="Сколько дней хранить отдельные HTTP-вызовы (сводки по эндпоинтам хранятся всегда)")
+    group.addoption("--strict-schemas", action="store_true", default=False,
+                    help="Проверять успешные ответы эндпоинтов мемов и авторизации на схемы (endpoints/schemas.py)")
+    group.addoption("--meme-pool-size", type=int, default=2,
+                    help="Сколько мемов заранее создать для фикстуры created_meme_id")
+    group.addoption("--cleanup-workers", type=int, default=8,
+                    help="Сколько мемов удалять параллельно при очистке в конце сессии")
+    group.addoption("--attach-max-kb", type=int, default=256,
+                    help="Максимальный размер одного вложения Allure, КБ")
+    group.addoption("--attach-test-budget-kb", type=int, default=2048,
+                    help="Суммарный размер вложений Allure на один тест, КБ")
+    group.addoption("--attach-sample-rate", type=float, default=1.0,
+                    help="Доля прошедших тестов, для которых сохраняются вложения (упавшие - всегда)")
+    group.addoption("--http-timings", action="store_true", default=False,
+                    help="Показать в конце прогона время запросов по эндпоинтам и фазам и сохранить его в JSON")
+    group.addoption("--http-timings-json", default=os.path.join("logs", "http_timings.json"),
+                    help="Куда сохранить JSON с временем запросов (при --http-timings)")
+    group.addoption("--latency-budgets", default=None,
+                    help="JSON-файл с бюджетами задержки по эндпоинтам, применяется ко всем тестам")
+    group.addoption("--latency-budget-mode", default=None, choices=["fail", "warn"],
+                    help="Что делать при превышении бюджета задержки: провалить тест или предупредить; "
+                         "заданный явно, перекрывает mode маркера (по умолчанию - mode маркера или fail)")
+    group.addoption("--latency-repeat", type=int, default=1,
+                    help="Сколько раз выполнять тест с маркером latency_budget (каждый раз с новыми фикстурами) "
+                         "для стабильной выборки")
+    group.addoption("--api-log-level", default="DEBUG", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                    help="Уровень логирования в файл logs/test_run_*.log")
+    group.addoption("--api-log-format", default="text", choices=sorted(RUN_LOG_FORMATS),
+                    help="Формат файлового лога: text - как в консоли, jsonl - запись на строку JSON "
+                         "с тестом, эндпоинтом и статусом")
+    group.addoption("--api-log-max-mb", type=float, default=50,
+                    help="Размер сегмента лога, после которого начинается новый, МБ (0 - без ограничения)")
+    group.addoption("--api-log-rotate-minutes", type=float, default=60,
+                    help="Через сколько минут начинать новый сегмент лога (0 - не ротировать по времени)")
+    group.addoption("--api-log-compression", default="gzip", choices=sorted(LOG_COMPRESSIONS),
+                    help="Сжатие завершенных сегментов лога в фоне (zstd требует пакет zstandard)")
+    group.addoption("--api-log-keep-days", type=float, default=14,
+                    help="Сколько дней хранить логи прошлых запусков (0 - без ограничения)")
+    group.addoption("--api-log-max-total-mb", type=float, default=1024,
+                    help="Общий объем логов прошлых запусков, сверх которого удаляются самые старые, МБ "
+                         "(0 - без ограничения)")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    config.addinivalue_line("markers", "deadline(seconds): дедлайн на все HTTP-вызовы теста и его фикстур")
+    config.addinivalue_line("markers", "http_timeout(connect=None, read=None): таймауты запросов теста, секунд")
+    config.addinivalue_line("markers", "latency_budget(p95_ms=None, max_ms=None, mode=None, repeat=None): "
+                                       "бюджет задержки HTTP-вызовов теста")
+    path = config.getoption("--latency-budgets")
+    config._latency_budgets = load_budgets(path) if path else {}
+    # --collect-only, --help, --markers, --fixtures: тесты не выполняются, поэтому ни логов,
+    # ни локального сервера, ни истории с планировщиком
+    if any(getattr(config.option, name, False)
+           for name in ("collectonly", "help", "markers", "showfixtures", "show_fixtures_per_test")):
+        return
+    # Контроллер pytest-xdist только раздает тесты и собирает отчеты: ему нужны история
+    # и планировщик, а файловый лог, сервер, кассета и транспорт - только воркерам
+    controller = is_xdist_controller(config)
+    setup_logging(config, file_log=not controller)
+
+    # HTTP-вызовы этапов тестов замеряет только HistoryRecorder; с --no-history он не пишет историю
+    history_path = config.getoption("--history-db")
+    recorder = HistoryRecorder(config, history_path, config.getoption("--history-keep-calls-days"),
+                               record=not config.getoption("--no-history"))
+    config.pluginmanager.register(recorder, "memes-api-history")
+    config.pluginmanager.register(CostScheduler(config, recorder, history_path), "memes-api-scheduler")
+    if controller:
+        return
+
+    # trylast: к этому моменту allure-pytest уже зарегистрировал свой listener
+    allure_listener = config.pluginmanager.get_plugin("allure_listener")
+    if allure_listener is not None:
+        steps.enable()
+        attachments.bind(
+            os.path.abspath(config.option.allure_report_dir),
+            max_attachment_bytes=config.getoption("--attach-max-kb") * 1024,
+            max_test_bytes=config.getoption("--attach-test-budget-kb") * 1024,
+            sample_rate=config.getoption("--attach-sample-rate"),
+        )
+
+    if config.getoption("--cassette"):
+        workerinput = getattr(config, "workerinput", None)
+        cassette.open(config.getoption("--cassette"), config.getoption("--cassette-mode"),
+                      shard=workerinput["workerid"] if workerinput else None)
+
+    transport = config.getoption("--transport")
+    # С транспортом memory синхронные запросы идут в MemesApp напрямую, а асинхронный
+    # клиент (aiohttp) - в тот же MemesApp через локальный сервер
+    if config.getoption("--local-server") or transport == InMemoryTransport.name:
+        from support.memes_server import MemesServer
+
+        config._memes_server = MemesServer().start()
+        BaseAPI.url = config._memes_server.url
+
+    BaseAPI.strict_schemas = config.getoption("--strict-schemas")
+    meme_cache.configure(
+        enabled=config.getoption("--meme-cache"),
+        ttl=config.getoption("--meme-cache-ttl"),
+        max_entries=config.getoption("--meme-cache-entries"),
+    )
+    if transport == InMemoryTransport.name:
+        BaseAPI.transport = InMemoryTransport(config._memes_server.app.handle)
+    else:
+        BaseAPI.transport = TRANSPORTS[transport](
+            pool_connections=config.getoption("--pool-connections"),
+            pool_maxsize=config.getoption("--pool-maxsize"),
+            pool_block=config.getoption("--pool-block"),
+            keep_alive=not config.getoption("--no-keep-alive"),
+        )
+    connect_timeout, read_timeout = config.getoption("--connect-timeout"), config.getoption("--read-timeout")
+    if connect_timeout is not None or read_timeout is not None:
+        default_connect, default_read = BaseAPI.timeout
+        BaseAPI.timeout = (connect_timeout or default_connect, read_timeout or default_read)
+    BaseAPI.retry_policy.configure(
+        max_attempts=config.getoption("--retry-attempts"),
+        base_delay=config.getoption("--retry-base-delay"),
+        max_delay=config.getoption("--retry-max-delay"),
+        budget_ratio=config.getoption("--retry-budget"),
+        breaker_threshold=config.getoption("--breaker-threshold"),
+        breaker_cooldown=config.getoption("--breaker-cooldown"),
+    )
+
+
+def pytest_unconfigure(config):
+    server = getattr(config, "_memes_server", None)
+    if server is not None:
+        server.stop()
+    attachments.close()
+    steps.disable()
+    cassette.close()
+    # Дописываем в файл все, что осталось в очереди логов, и дожимаем последний сегмент
+    if log_listener is not None:
+        log_listener.stop()
+        for handler in log_listener.handlers:
+            handler.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def transport():
+    transport = BaseAPI.transport
+    yield transport
+    stats = transport.stats.as_dict()
+    logger.info(f"Соединения ({transport.name}): открыто новых={stats['opened']}, "
+                f"переиспользовано={stats['reused']}")
+    transport.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def retry_policy():
+    policy = BaseAPI.retry_policy
+    yield policy
+    logger.info(f"Повторы: {policy.metrics.as_dict()['total']}, бюджет: {policy.budget.as_dict()}")
+    opened = {key: state for key, state in policy.breaker_states().items() if state != "closed"}
+    if opened:
+        logger.warning(f"Разомкнутые автоматы в конце сессии: {opened}")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def get_meme_cache():
+    yield meme_cache
+    if meme_cache.enabled:
+        logger.info(f"Кэш GetMeme: {meme_cache.stats}, записей {len(meme_cache)}, {meme_cache.size_bytes} байт")
 
 
 @pytest.fixture(scope="session")
@@ -65,14 +353,39 @@ def sample_user_name():
     return user_name
 
 
-@pytest.fixture(scope="session", autouse=True)
-def auth_token(sample_user_name):
+@pytest.fixture(scope="session")
+def token_cache(request):
+    config = request.config
+    if config.getoption("--no-token-cache") or config.getoption("--cassette"):
+        # С кассетой токен получается через /authorize, чтобы запрос попал в запись
+        return None
+    if getattr(config, "_memes_server", None) is not None:
+        # Локальный Memes API (--local-server, --transport memory) живет один запуск на случайном
+        # порту: его токены бесполезны потом и опасны, если порт достанется новому серверу
+        return None
+    path = config.getoption("--token-cache")
+    if path is None:
+        if getattr(config, "cache", None) is None:
+            return None
+        path = str(config.cache.mkdir("memes_api") / "tokens.json")
+    return TokenCache(path, ttl=config.getoption("--token-ttl"))
+
+
+# Авторизация и очистка подключаются в модулях API-тестов (pytestmark), модульным
+# тестам в tests/unit сеть не нужна
+@pytest.fixture(scope="session")
+def auth_token(sample_user_name, token_cache):
     logger.info("=" * 80)
     logger.info("НАЧАЛО ТЕСТОВОЙ СЕССИИ")
     logger.info("=" * 80)
     
     auth = Authorization()
 
+    if token_cache is not None:
+        # Общий для воркеров и запусков кэш: /authorize вызывается, только если токена нет
+        credentials.set(token_cache.get_token(BaseAPI.url, sample_user_name, auth))
+        return BaseAPI.token
+
     if BaseAPI.token:
         resp = auth.is_alive(BaseAPI.token)
         if resp.status_code == 200:
@@ -86,6 +399,14 @@ def auth_token(sample_user_name):
     return BaseAPI.token
 
 
+@pytest.fixture(scope="session")
+def cleanup_created_memes(request, auth_token, delete_meme):
+    """Удаляет в конце сессии все мемы, созданные тестами и фикстурами"""
+    yield created_memes
+    logger.info(f"Очистка: осталось неудаленных мемов: {len(created_memes)}")
+    created_memes.drain(delete_meme.delete_meme_by_id, request.config.getoption("--cleanup-workers"))
+
+
 @pytest.fixture(scope="session")
 def create_meme():
     return CreateMeme()
@@ -93,27 +414,36 @@ def create_meme():
 
 @pytest.fixture()
 def sample_meme_payload():
-    return {
-        "text": "Test meme text",
-        "url": "https://example.com/meme.jpg",
-        "tags": ["funny", "test"],
-        "info": {
-            "colors": ["red", "blue"],
-            "objects": ["text", "image"]
-        }
-    }
+    return copy.deepcopy(SAMPLE_MEME_PAYLOAD)
+
+
+@pytest.fixture(scope="session")
+def meme_pool(request, auth_token, create_meme, update_meme, delete_meme):
+    pool = MemePool(create_meme, update_meme, delete_meme, SAMPLE_MEME_PAYLOAD,
+                    size=request.config.getoption("--meme-pool-size"))
+    pool.fill()
+    yield pool
+    pool.close(request.config.getoption("--cleanup-workers"))
 
 
 @pytest.fixture()
-def created_meme_id(create_meme, sample_meme_payload, delete_meme):
-    logger.debug("Создание тестового мема для теста...")
-    response = create_meme.create_new_meme(sample_meme_payload)
-    meme_id = response.json()['id']
-    logger.debug(f"Мем создан с ID: {meme_id}")
-    yield meme_id
-    logger.debug(f"Удаление тестового мема с ID: {meme_id}")
-    delete_meme.delete_meme_by_id(meme_id)
-    logger.debug(f"Мем с ID {meme_id} успешно удален")
+def created_meme_id(meme_pool):
+    """Мем в эксклюзивном пользовании теста; после теста восстанавливается одним PUT"""
+    with meme_pool.leased() as meme_id:
+        logger.debug(f"Мем из пула выдан тесту: {meme_id}")
+        yield meme_id
+
+
+@pytest.fixture()
+def shared_meme_id(meme_pool):
+    """Общий мем для тестов, которые его не изменяют"""
+    return meme_pool.shared_id()
+
+
+@pytest.fixture()
+def missing_meme_id(meme_pool):
+    """id мема, который был создан и удален, то есть гарантированно не существует"""
+    return meme_pool.missing_id()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -131,20 +461,74 @@ def delete_meme():
     return DeleteMeme()
 
 
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_http_pool():
+    pool = AsyncBaseAPI.async_pool
+    yield pool
+    await pool.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_auth_token(async_http_pool, sample_user_name):
+    auth = AsyncAuthorization()
+
+    if BaseAPI.token:
+        resp = await auth.is_alive(BaseAPI.token)
+        if resp.status_code == 200:
+            logger.info("Используется существующий валидный токен")
+            return BaseAPI.token
+
+    logger.info("Получение нового токена авторизации (async)...")
+    response = await auth.authorization({"name": sample_user_name})
+    assert response.status_code == 200, "Не удалось получить токен авторизации"
+    return BaseAPI.token
+
+
+@pytest.fixture(scope="session")
+def async_create_meme():
+    return AsyncCreateMeme()
+
+
+@pytest.fixture(scope="session")
+def async_get_meme():
+    return AsyncGetMeme()
+
+
+@pytest.fixture(scope="session")
+def async_update_meme():
+    return AsyncUpdateMeme()
+
+
+@pytest.fixture(scope="session")
+def async_delete_meme():
+    return AsyncDeleteMeme()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def async_created_meme_id(async_auth_token, async_create_meme, sample_meme_payload):
+    logger.debug("Создание тестового мема для async теста...")
+    response = await async_create_meme.create_new_meme(sample_meme_payload)
+    meme_id = response.json()['id']
+    logger.debug(f"Мем создан с ID: {meme_id}, будет удален при очистке в конце сессии")
+    return meme_id
+
+
 @pytest.fixture()
 def attach_response():
     def attach(response, name="Request/Response"):
-        allure.attach(
+        response = ApiResponse.wrap(response)
+        body = response.request.body
+        attachments.attach(
             f"{response.request.method} {response.request.url}\n\n"
-            f"Request body:\n{response.request.body}",
+            f"Request body:\n{body.decode('utf-8', errors='replace') if isinstance(body, bytes) else body}",
             name=f"{name} - Request",
-            attachment_type=allure.attachment_type.JSON
         )
 
-        allure.attach(
-            f"Status code: {response.status_code}\n\nResponse body:\n{response.text}",
-            name=f"{name} - Response",
-            attachment_type=allure.attachment_type.JSON
+        # Тело ответа уже приложено в send_request: дедупликация сохранит его один раз
+        attachments.attach(
+            response.content,
+            name=f"{name} - Response ({response.status_code})",
+            attachment_type="json" if response.is_json else "text"
         )
 
         try:
@@ -157,16 +541,13 @@ def attach_response():
 @pytest.fixture
 def check_status_code():
     def check(response, expected_status=200):
-        logger.debug(f"Проверка статус кода. Ожидается: {expected_status}, Получен: {response.status_code}")
-        logger.debug(f"URL запроса: {response.request.method} {response.request.url}")
+        response = ApiResponse.wrap(response)
+        logger.debug("Проверка статус кода. Ожидается: %s, Получен: %s", expected_status, response.status_code)
+        logger.debug("URL запроса: %s %s", response.request.method, response.request.url)
         
-        if response.request.body:
-            try:
-                import json
-                body = json.loads(response.request.body) if isinstance(response.request.body, (str, bytes)) else response.request.body
-                logger.debug(f"Тело запроса: {json.dumps(body, ensure_ascii=False, indent=2)}")
-            except:
-                logger.debug(f"Тело запроса: {response.request.body}")
+        if response.request.body and logger.isEnabledFor(logging.DEBUG):
+            # Тело запроса декодируется один раз и кэшируется в ApiResponse
+            logger.debug("Тело запроса: %s", LazyBody(response.request_json))
         
         assert response.status_code == expected_status, (
             f"Ожидался статус {expected_status}, получен {response.status_code}"
@@ -174,23 +555,171 @@ def check_status_code():
         
         logger.info(f"✓ Статус код корректен: {response.status_code}")
 
-        if response.text:
-            logger.debug(f"Тело ответа: {response.text[:500]}...")  # Первые 500 символов
-            allure.attach(
-                f"Status code: {response.status_code}\n\nResponse body:\n{response.text}",
-                name="Response",
-                attachment_type=allure.attachment_type.TEXT
+        if response.content:
+            logger.debug("Тело ответа: %s", LazyBody(response.content))  # Первые 500 символов
+            attachments.attach(
+                response.content,
+                name=f"Response ({response.status_code})",
+                attachment_type="json" if response.is_json else "text"
             )
 
     return check
 
 
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    timings.current_test = item.nodeid
+    attachments.start_test(item.nodeid)
+    # Дедлайн и таймауты действуют с начала настройки фикстур до конца тела теста
+    tokens = []
+    marker = item.get_closest_marker("deadline")
+    seconds = item.config.getoption("--deadline")
+    if marker is not None:
+        seconds = marker.args[0] if marker.args else marker.kwargs["seconds"]
+    if seconds:
+        tokens.append((reset_deadline, set_deadline(Deadline(seconds, item.name))))
+    marker = item.get_closest_marker("http_timeout")
+    if marker is not None:
+        tokens.append((reset_timeout_override, set_timeout_override(**marker.kwargs)))
+    item._memes_api_tokens = tokens
+
+
+def _latency_repeat(item):
+    marker = item.get_closest_marker("latency_budget")
+    if marker is None:
+        return 1
+    return marker.kwargs.get("repeat") or item.config.getoption("--latency-repeat")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    repeat = _latency_repeat(item)
+    if repeat <= 1:
+        return None
+
+    # Каждый повтор - полный цикл setup/call/teardown: фикстуры уровня функции создаются заново,
+    # фикстуры модуля и сессии (уровень item.parent и выше) живут до последнего повтора.
+    # В отчет попадает первый упавший повтор или, если все прошли, последний
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    item._latency_calls = []
+    reported = None
+    for index in range(repeat):
+        item._latency_last_repeat = index == repeat - 1
+        reports = runtestprotocol(item, log=False,
+                                  nextitem=nextitem if item._latency_last_repeat else item.parent)
+        if reported is None and (item._latency_last_repeat or any(rep.failed for rep in reports)):
+            reported = reports
+    for rep in reported:
+        item.ihook.pytest_runtest_logreport(report=rep)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("latency_budget")
+    endpoint_limits = item.config._latency_budgets
+    if marker is None and not endpoint_limits:
+        return (yield)
+
+    with timings.capture() as calls:
+        result = yield
+    # При повторах (pytest_runtest_protocol) бюджет проверяется по вызовам всех повторов после последнего
+    collected = getattr(item, "_latency_calls", None)
+    if collected is not None:
+        collected.extend(calls)
+        if not item._latency_last_repeat:
+            return result
+        calls = collected
+
+    options = dict(marker.kwargs) if marker is not None else {}
+    options.pop("repeat", None)
+    mode = item.config.getoption("--latency-budget-mode") or options.pop("mode", None) or "fail"
+    options.pop("mode", None)
+    limits = parse_limits(options, item.nodeid)
+    violations, details = evaluate(calls, limits, endpoint_limits)
+    if violations:
+        message = "Бюджет задержки превышен:\n  " + "\n  ".join(violations) + "\nВызовы теста, мс:\n" + details
+        attachments.attach(message, name="Latency budget")
+        if mode == "warn":
+            warnings.warn(LatencyBudgetWarning(message))
+        else:
+            pytest.fail(message, pytrace=False)
+    return result
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_teardown(item):
+    # Очистка после теста не ограничена его дедлайном
+    for reset, token in reversed(getattr(item, "_memes_api_tokens", [])):
+        reset(token)
+    item._memes_api_tokens = []
+
+
 # Pytest hooks для логирования
+def pytest_sessionstart(session):
+    config = session.config
+    if is_xdist_controller(config):
+        # Файлового лога у контроллера нет (см. pytest_configure), но старые логи удаляет он,
+        # а не каждый воркер; без xdist это делает setup_logging в фоне
+        enforce_log_retention("logs", config.getoption("--api-log-keep-days"),
+                              int(config.getoption("--api-log-max-total-mb") * 1024 * 1024))
+
+
+def pytest_sessionfinish(session):
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        # Воркер pytest-xdist передает гистограммы контроллеру
+        workeroutput["http_timings"] = timings.to_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    data = getattr(node, "workeroutput", {}).get("http_timings")
+    if data is not None:
+        timings.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.getoption("--http-timings") or hasattr(config, "workerinput"):
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section("HTTP: время запросов, мс")
+    endpoints = timings.endpoints()
+    if not endpoints:
+        write("Запросов не было")
+        return
+
+    width = max(len(key) for key in endpoints)
+    write(f"{'эндпоинт':<{width}} {'N':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}   "
+          + " ".join(f"{phase:>10}" for phase in PHASES))
+    for key, phases in endpoints.items():
+        total = phases["total"]
+        values = [total.percentile(50), total.percentile(95), total.percentile(99), total.max]
+        write(f"{key:<{width}} {total.count:>5} " + " ".join(f"{value:>8.1f}" for value in values) + "   "
+              + " ".join(f"{phases[phase].mean:>10.2f}" for phase in PHASES))
+    write("(фазы - среднее по вызовам)")
+
+    write("")
+    write("Самые медленные вызовы:")
+    for item in timings.slowest()[:5]:
+        phases = ", ".join(f"{phase} {value:.1f}" for phase, value in item["phases_ms"].items() if value >= 0.05)
+        write(f"  {item['total_ms']:>9.1f}  {item['key']} -> {item['status']}  {item['test']}  ({phases})")
+
+    path = config.getoption("--http-timings-json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    timings.write(path)
+    write(f"JSON: {path}")
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     """Хук для логирования результатов выполнения тестов"""
     outcome = yield
     rep = outcome.get_result()
+
+    # Вложения тестов вне выборки сохраняются, только если фаза упала
+    attachments.finish_phase(rep.failed)
     
     if rep.when == "call":
         test_name = item.name
@@ -4,10 +4,14 @@ import logging
 
 from endpoints.baseapi import BaseAPI
 from endpoints.authorization import Authorization
+from endpoints.meme_cache import meme_cache
+from endpoints.schemas import MEME
 
 # Получаем logger для тестов
 logger = logging.getLogger(__name__)
 
+pytestmark = pytest.mark.usefixtures("auth_token", "cleanup_created_memes")
+
 
 @allure.epic("Тестирование эндпоинтов")
 @allure.feature("Авторизация")
@@ -176,7 +180,7 @@ def test_token_is_alive_invalid_token(value, sample_user_name, check_status_code
 @allure.title("Создание нового мема с валидными данными")
 @allure.severity(allure.severity_level.CRITICAL)
 @allure.tag("positive", "create", "smoke")
-def test_create_meme_success(auth_token, create_meme, sample_meme_payload, check_status_code, delete_meme, sample_user_name):
+def test_create_meme_success(auth_token, create_meme, sample_meme_payload, check_status_code, sample_user_name):
     logger.info("Тест: Создание нового мема с валидными данными")
     logger.debug(f"Payload для создания мема: {sample_meme_payload}")
     response = create_meme.create_new_meme(sample_meme_payload)
@@ -192,10 +196,6 @@ def test_create_meme_success(auth_token, create_meme, sample_meme_payload, check
     assert response_data["info"] == sample_meme_payload["info"], "Информация должна совпадать"
     assert response_data["updated_by"] == sample_user_name, "Имя должно совпадать"
     logger.debug("Все поля мема успешно проверены")
-    
-    logger.debug(f"Удаление созданного мема с ID: {meme_id}")
-    delete_meme.delete_meme_by_id(meme_id)
-    logger.info("Тестовый мем удален")
 
 
 @allure.epic("Тестирование эндпоинтов")
@@ -204,7 +204,7 @@ def test_create_meme_success(auth_token, create_meme, sample_meme_payload, check
 @allure.title("Создание мема с различными типами данных в tags")
 @allure.severity(allure.severity_level.NORMAL)
 @allure.tag("positive", "create", "data_types")
-def test_create_meme_with_different_tag_types(auth_token, create_meme, check_status_code, delete_meme):
+def test_create_meme_with_different_tag_types(auth_token, create_meme, check_status_code):
     payload = {
         "text": "Test meme with mixed tags",
         "url": "https://example.com/meme.jpg",
@@ -213,8 +213,6 @@ def test_create_meme_with_different_tag_types(auth_token, create_meme, check_sta
     }
     response = create_meme.create_new_meme(payload)
     check_status_code(response, 200)
-    meme_id = response.json()["id"]
-    delete_meme.delete_meme_by_id(meme_id)
 
 
 @allure.epic("Тестирование эндпоинтов")
@@ -347,6 +345,7 @@ def test_create_meme_invalid_method(auth_token, create_meme, sample_meme_payload
 @allure.title("Получение списка всех мемов")
 @allure.severity(allure.severity_level.CRITICAL)
 @allure.tag("positive", "get", "smoke")
+@pytest.mark.latency_budget(p95_ms=1000, max_ms=3000, mode="warn")
 def test_get_all_memes(auth_token, get_meme, check_status_code):
     logger.info("Тест: Получение списка всех мемов")
     response = get_meme.get_all_memes_endpoint()
@@ -357,19 +356,50 @@ def test_get_all_memes(auth_token, get_meme, check_status_code):
     logger.debug(f"Список мемов получен успешно")
 
 
+@allure.epic("Тестирование эндпоинтов")
+@allure.feature("Получение мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Список мемов соответствует схеме")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("positive", "get", "schema")
+def test_get_all_memes_matches_schema(auth_token, get_meme, check_status_code, shared_meme_id, sample_user_name):
+    response = get_meme.get_all_memes_endpoint()
+    check_status_code(response, 200)
+    memes = response.json().get("data")
+    assert isinstance(memes, list), "В ответе нет списка data"
+    # Общий список на стенде содержит чужие мемы, схему проверяем только у своих
+    own_memes = [meme for meme in memes if isinstance(meme, dict) and meme.get("updated_by") == sample_user_name]
+    assert own_memes, f"В списке нет мемов пользователя {sample_user_name}"
+    assert MEME.errors_many(own_memes, "$.data") == []
+
+
+@allure.epic("Тестирование эндпоинтов")
+@allure.feature("Получение мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Потоковый перебор списка мемов")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("positive", "get", "stream")
+def test_iter_memes_finds_meme(auth_token, get_meme, shared_meme_id, sample_user_name):
+    meme = get_meme.find_meme(shared_meme_id)
+    assert meme is not None, f"Мем {shared_meme_id} не найден в потоке GET /meme"
+    assert meme["id"] == shared_meme_id
+    assert get_meme.count_memes(updated_by=sample_user_name) >= 1
+
+
 @allure.epic("Тестирование эндпоинтов")
 @allure.feature("Получение мемов")
 @allure.story("Позитивные сценарии")
 @allure.title("Получение мема по существующему id")
 @allure.severity(allure.severity_level.CRITICAL)
 @allure.tag("positive", "get", "smoke")
-def test_get_meme_by_id_success(auth_token, get_meme, created_meme_id, check_status_code, sample_user_name):
-    logger.info(f"Тест: Получение мема по ID: {created_meme_id}")
-    response = get_meme.get_meme_by_id_endpoint(created_meme_id)
+@pytest.mark.latency_budget(p95_ms=1000, max_ms=3000, mode="warn")
+def test_get_meme_by_id_success(auth_token, get_meme, shared_meme_id, check_status_code, sample_user_name):
+    logger.info(f"Тест: Получение мема по ID: {shared_meme_id}")
+    response = get_meme.get_meme_by_id_endpoint(shared_meme_id)
     check_status_code(response, 200)
     response_data = response.json()
     logger.debug(f"Полученные данные мема: ID={response_data.get('id')}, Text={response_data.get('text')[:50]}...")
-    assert response_data["id"] == created_meme_id, "ID мема должен совпадать"
+    assert response_data["id"] == shared_meme_id, "ID мема должен совпадать"
     assert response_data["updated_by"] == sample_user_name, "Имя должно совпадать"
     logger.info("Мем успешно получен, данные валидированы")
 
@@ -380,8 +410,8 @@ def test_get_meme_by_id_success(auth_token, get_meme, created_meme_id, check_sta
 @allure.title("Получение мема по несуществующему id")
 @allure.severity(allure.severity_level.NORMAL)
 @allure.tag("negative", "get", "not_found")
-def test_get_meme_by_id_not_found(auth_token, get_meme, created_meme_id, check_status_code):
-    response = get_meme.get_meme_by_id_endpoint(created_meme_id + 1)
+def test_get_meme_by_id_not_found(auth_token, get_meme, missing_meme_id, check_status_code):
+    response = get_meme.get_meme_by_id_endpoint(missing_meme_id)
     check_status_code(response, 404)
 
 
@@ -511,7 +541,7 @@ def test_update_meme_missing_fields(missing_field, auth_token, update_meme, crea
 @allure.title("Обновление несуществующего мема")
 @allure.severity(allure.severity_level.NORMAL)
 @allure.tag("negative", "update", "not_found")
-def test_update_meme_not_found(auth_token, update_meme, created_meme_id, check_status_code):
+def test_update_meme_not_found(auth_token, update_meme, created_meme_id, missing_meme_id, check_status_code):
     payload = {
         "id": created_meme_id,
         "text": "Updated text",
@@ -519,7 +549,7 @@ def test_update_meme_not_found(auth_token, update_meme, created_meme_id, check_s
         "tags": ["test"],
         "info": {"key": "value"}
     }
-    response = update_meme.update_meme_endpoint(created_meme_id + 1, payload)
+    response = update_meme.update_meme_endpoint(missing_meme_id, payload)
     check_status_code(response, 404)
 
 
@@ -610,6 +640,28 @@ def test_update_meme_invalid_method(auth_token, update_meme, created_meme_id, sa
     check_status_code(response, 405)
 
 
+@allure.epic("Тестирование эндпоинтов")
+@allure.feature("Обновление мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Обновление мема сбрасывает кэш GetMeme")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("positive", "update", "cache")
+def test_update_meme_invalidates_cache(auth_token, get_meme, update_meme, created_meme_id, sample_meme_payload,
+                                       check_status_code, monkeypatch):
+    monkeypatch.setattr(meme_cache, "enabled", True)
+    try:
+        first = get_meme.get_meme_by_id_endpoint(created_meme_id)
+        check_status_code(first, 200)
+        assert get_meme.get_meme_by_id_endpoint(created_meme_id) is first, "Повторный запрос должен взяться из кэша"
+
+        payload = {**sample_meme_payload, "id": created_meme_id, "text": "Cached meme updated"}
+        check_status_code(update_meme.update_meme_endpoint(created_meme_id, payload), 200)
+        response = get_meme.get_meme_by_id_endpoint(created_meme_id)
+        assert response.json()["text"] == "Cached meme updated", "После обновления кэш должен быть сброшен"
+    finally:
+        meme_cache.clear()
+
+
 @allure.epic("Тестирование эндпоинтов")
 @allure.feature("Удаление мемов")
 @allure.story("Позитивные сценарии")
@@ -634,8 +686,8 @@ def test_delete_meme_success(auth_token, get_meme, created_meme_id, delete_meme,
 @allure.title("Удаление несуществующего мема")
 @allure.severity(allure.severity_level.NORMAL)
 @allure.tag("negative", "delete", "not_found")
-def test_delete_meme_not_found(auth_token, check_status_code, delete_meme, created_meme_id):
-    response = delete_meme.delete_meme_by_id(created_meme_id + 1)
+def test_delete_meme_not_found(auth_token, check_status_code, delete_meme, missing_meme_id):
+    response = delete_meme.delete_meme_by_id(missing_meme_id)
     check_status_code(response, 404)
 
 
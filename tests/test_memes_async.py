@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+import allure
+import logging
+
+from endpoints.authorization import AsyncAuthorization
+
+# Получаем logger для тестов
+logger = logging.getLogger(__name__)
+
+# Все async тесты делят один event loop с сессионными async фикстурами
+pytestmark = [pytest.mark.asyncio(loop_scope="session"),
+              pytest.mark.usefixtures("auth_token", "cleanup_created_memes")]
+
+
+@allure.epic("Асинхронный клиент")
+@allure.feature("Авторизация")
+@allure.story("Позитивные сценарии")
+@allure.title("Проверка валидности токена через async клиент")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("positive", "authorization", "async")
+async def test_async_token_is_alive(async_auth_token, sample_user_name, check_status_code):
+    auth = AsyncAuthorization()
+    response = await auth.is_alive(async_auth_token)
+    check_status_code(response, 200)
+    assert response.text.split()[-1] == sample_user_name, "Имя пользователя не совпадает"
+
+
+@allure.epic("Асинхронный клиент")
+@allure.feature("Создание мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Создание и получение мема через async клиент")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("positive", "create", "get", "async")
+async def test_async_get_created_meme(async_created_meme_id, async_get_meme, check_status_code, sample_meme_payload):
+    response = await async_get_meme.get_meme_by_id_endpoint(async_created_meme_id)
+    check_status_code(response, 200)
+    response_data = response.json()
+    assert response_data["id"] == async_created_meme_id, "ID мема должен совпадать"
+    assert response_data["text"] == sample_meme_payload["text"], "Текст мема должен совпадать"
+
+
+@allure.epic("Асинхронный клиент")
+@allure.feature("Обновление мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Обновление мема через async клиент")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("positive", "update", "async")
+async def test_async_update_meme(async_created_meme_id, async_update_meme, check_status_code):
+    payload = {
+        "id": async_created_meme_id,
+        "text": "Async updated text",
+        "url": "https://example.com/async.jpg",
+        "tags": ["async"],
+        "info": {"mode": "async"}
+    }
+    response = await async_update_meme.update_meme_endpoint(async_created_meme_id, payload)
+    check_status_code(response, 200)
+    assert response.json()["text"] == payload["text"], "Текст должен быть обновлен"
+
+
+@allure.epic("Асинхронный клиент")
+@allure.feature("Получение мемов")
+@allure.story("Позитивные сценарии")
+@allure.title("Параллельные запросы через async клиент")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("positive", "get", "async")
+async def test_async_concurrent_get(async_created_meme_id, async_get_meme, check_status_code):
+    responses = await asyncio.gather(
+        *(async_get_meme.get_meme_by_id_endpoint(async_created_meme_id) for _ in range(10))
+    )
+    for response in responses:
+        check_status_code(response, 200)
@@ -0,0 +1,548 @@
+import json
+import math
+import random
+
+import pytest
+import allure
+import requests
+from types import SimpleNamespace
+
+from endpoints.cassette import Cassette, CassetteMiss
+from endpoints.deadline import (PAUSE, Deadline, DeadlineExceeded, reset_timeout_override, resolve_timeout,
+                                set_timeout_override)
+from endpoints.http_pool import HttpPool
+from endpoints.json_stream import JsonStreamError, iter_json_array
+from endpoints.meme_cache import MemeCache
+from endpoints.retry import CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy
+from endpoints.schemas import MEME, MEME_LIST
+from endpoints.timing import Histogram
+from endpoints.transport_base import Transport
+from endpoints.transports import TRANSPORTS, InMemoryTransport
+
+# Модульные тесты клиента: без сети, с поддельными часами и данными в памяти
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def fake_response(status_code, headers=None):
+    return SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Бюджет повторов: запас min_retries и ratio на каждый запрос")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "retry")
+def test_retry_budget_limits_retries():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    assert budget.withdraw(), "Запас min_retries должен разрешать первый повтор"
+    assert not budget.withdraw(), "Без новых запросов бюджет исчерпан"
+    budget.deposit()
+    assert not budget.withdraw(), "Половина повтора от одного запроса не дает целый повтор"
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.as_dict() == {"requests": 2, "retries": 2, "available": 0.0}
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Исчерпанный бюджет останавливает повторы")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "retry")
+def test_retry_stops_when_budget_exhausted():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.01, budget_ratio=0.0, budget_min_retries=1, seed=1)
+    call = policy.start("GET", "/meme/17")
+    assert call.key == "GET /meme/{id}"
+    assert call.on_response(fake_response(503)) is not None, "Первый повтор оплачен запасом бюджета"
+    assert call.on_response(fake_response(503)) is None, "Второй повтор не помещается в бюджет"
+    assert policy.metrics.as_dict()["endpoints"]["GET /meme/{id}"]["budget_exhausted"] == 1
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Неидемпотентный запрос повторяется только при ошибке соединения")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "retry")
+def test_retry_non_idempotent_only_on_connect_error():
+    policy = RetryPolicy(base_delay=0.01, seed=1)
+    assert policy.start("POST", "/meme").on_response(fake_response(503)) is None
+    assert policy.start("POST", "/meme").on_error(TimeoutError()) is None
+    assert policy.start("POST", "/meme").on_error(ConnectionError(), connect_error=True) is not None
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Автомат размыкается по доле ошибок и замыкается после пробного запроса")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "retry", "breaker")
+def test_circuit_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=0.5, window=4, min_requests=4, cooldown=10.0, clock=clock)
+    for failed in (False, True, False):
+        assert breaker.record(failed) is None
+    assert breaker.record(True) == CircuitBreaker.OPEN, "2 ошибки из 4 достигают порога 0.5"
+    assert breaker.allow() == (False, None)
+
+    clock.advance(9.9)
+    assert breaker.allow() == (False, None), "До конца cooldown запросы не пропускаются"
+    clock.advance(0.1)
+    assert breaker.allow() == (True, CircuitBreaker.HALF_OPEN)
+    assert breaker.allow() == (False, None), "В half_open пропускается только один пробный запрос"
+    assert breaker.record(True) == CircuitBreaker.OPEN, "Ошибка пробного запроса снова размыкает автомат"
+
+    clock.advance(10.0)
+    assert breaker.allow() == (True, CircuitBreaker.HALF_OPEN)
+    assert breaker.record(False) == CircuitBreaker.CLOSED
+    assert breaker.allow() == (True, None)
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Пробный запрос без исхода не блокирует автомат навсегда")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "retry", "breaker")
+def test_circuit_breaker_lost_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1.0, window=1, min_requests=1, cooldown=5.0, clock=clock)
+    breaker.record(True)
+    clock.advance(5.0)
+    assert breaker.allow() == (True, CircuitBreaker.HALF_OPEN)
+    clock.advance(5.0)
+    assert breaker.allow() == (True, None), "Через cooldown пропускается следующий пробный запрос"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Повторы")
+@allure.title("Разомкнутый автомат отклоняет запрос к эндпоинту")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "retry", "breaker")
+def test_open_breaker_rejects_call():
+    policy = RetryPolicy(max_attempts=1, breaker_threshold=1.0, breaker_window=1, breaker_min_requests=1)
+    policy.start("GET", "/meme/1").on_response(fake_response(500))
+    assert policy.breaker_states() == {"GET /meme/{id}": CircuitBreaker.OPEN}
+    with pytest.raises(CircuitOpenError):
+        policy.start("GET", "/meme/2")
+    assert policy.start("GET", "/meme").key == "GET /meme", "Автомат другого эндпоинта не затронут"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Дедлайны")
+@allure.title("Таймауты урезаются до оставшегося времени дедлайна")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "deadline")
+def test_deadline_clips_timeouts():
+    clock = FakeClock(100.0)
+    deadline = Deadline(10.0, clock=clock)
+    assert deadline.clip((5.0, 30.0)) == (5.0, 10.0)
+    assert deadline.clip((None, None)) == (10.0, 10.0), "Без таймаута ждем не дольше дедлайна"
+    clock.advance(8.0)
+    assert deadline.clip((5.0, 30.0)) == (2.0, 2.0)
+    clock.advance(5.0)
+    assert deadline.expired
+    assert deadline.clip((5.0, 30.0)) == (0.001, 0.001), "Истекший дедлайн дает минимальный таймаут, а не 0"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Дедлайны")
+@allure.title("Порядок таймаутов: аргумент вызова, переопределение теста, атрибут класса, затем дедлайн")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "deadline")
+def test_resolve_timeout_precedence():
+    assert resolve_timeout(None, (5.0, 30.0)) == (5.0, 30.0)
+    token = set_timeout_override(read=12.0)
+    try:
+        assert resolve_timeout(None, (5.0, 30.0)) == (5.0, 12.0)
+        assert resolve_timeout(3.0, (5.0, 30.0)) == (3.0, 3.0)
+        deadline = Deadline(1.5, clock=FakeClock())
+        assert resolve_timeout(None, 20.0, deadline) == (1.5, 1.5)
+    finally:
+        reset_timeout_override(token)
+    assert resolve_timeout(None, 20.0) == (20.0, 20.0)
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Дедлайны")
+@allure.title("Повтор не начинается, если не успеет до дедлайна")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "deadline", "retry")
+def test_deadline_skips_retry_that_cannot_fit():
+    clock = FakeClock()
+    deadline = Deadline(3.0, clock=clock)
+    clock.advance(1.0)
+    deadline.record("GET /meme", 1.0, outcome=503)
+    assert deadline.can_fit("GET /meme", 0.5), "Пауза 0.5 с и попытка 1 с укладываются в оставшиеся 2 с"
+    assert not deadline.can_fit("GET /meme", 1.0)
+
+    policy = RetryPolicy(base_delay=10.0, max_delay=10.0, seed=1)
+    call = policy.start("GET", "/meme", deadline=deadline)
+    assert call.on_response(fake_response(503, {"Retry-After": "5"})) is None
+    assert policy.metrics.as_dict()["total"]["skipped_deadline"] == 1
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Дедлайны")
+@allure.title("Ошибка дедлайна показывает, на что ушло время")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "deadline")
+def test_deadline_exceeded_breakdown():
+    clock = FakeClock()
+    deadline = Deadline(2.0, name="test_x", clock=clock)
+    deadline.record("GET /meme/{id}", 1.5, outcome="ReadTimeout")
+    deadline.record(PAUSE, 0.25)
+    clock.advance(2.0)
+    with pytest.raises(DeadlineExceeded) as error:
+        deadline.check("GET /meme/{id}")
+    message = str(error.value)
+    assert "Дедлайн test_x 2.00 с, прошло 2.00 с:" in message
+    assert "GET /meme/{id}: 1.50 с, 1 шт. (ReadTimeout)" in message
+    assert f"{PAUSE}: 0.25 с, 1 шт." in message
+    assert "вне HTTP (код теста и фикстур): 0.25 с" in message
+
+
+def latency_samples(count, seed):
+    # Логнормальные задержки в мс, как у реальных вызовов: много быстрых, длинный хвост
+    rng = random.Random(seed)
+    return [rng.lognormvariate(3.0, 1.0) for _ in range(count)]
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Гистограммы задержек")
+@allure.title("Перцентили гистограммы в пределах относительной ошибки корзины")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "timing")
+@pytest.mark.parametrize("gamma", [1.05, 1.2])
+def test_histogram_percentile_within_gamma_error(gamma):
+    values = latency_samples(5000, seed=7)
+    histogram = Histogram(gamma)
+    for value in values:
+        histogram.add(value)
+    ordered = sorted(values)
+    error = (gamma - 1) / (gamma + 1)
+    for pct in (1, 50, 90, 95, 99, 99.9, 100):
+        exact = ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+        assert abs(histogram.percentile(pct) - exact) <= error * exact + 1e-9, f"p{pct}"
+    assert (histogram.min, histogram.max) == (ordered[0], ordered[-1])
+    assert histogram.count == len(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Гистограммы задержек")
+@allure.title("Сложение гистограмм равно гистограмме всех значений")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "timing")
+def test_histogram_merge_and_roundtrip():
+    first, second = latency_samples(700, seed=1), latency_samples(300, seed=2) + [0.0, 0.0]
+    merged, combined, part = Histogram(), Histogram(), Histogram()
+    for value in first:
+        merged.add(value)
+        combined.add(value)
+    for value in second:
+        part.add(value)
+        combined.add(value)
+    merged.merge(part)
+    merged.merge(Histogram())
+    assert merged.buckets == combined.buckets
+    assert (merged.count, merged.min, merged.max) == (combined.count, 0.0, max(first + second))
+    assert merged.sum == pytest.approx(combined.sum)
+    for pct in (0.1, 50, 95, 99):
+        assert merged.percentile(pct) == combined.percentile(pct)
+    assert merged.percentile(0.1) == 0.0, "Нули попадают в отдельную корзину"
+
+    restored = Histogram.from_dict(merged.to_dict())
+    assert restored.buckets == merged.buckets
+    assert restored.percentile(95) == merged.percentile(95)
+    assert Histogram().percentile(50) is None
+
+
+def recorded_response(status_code, content, **headers):
+    return SimpleNamespace(status_code=status_code, reason="OK", content=content,
+                           headers={"Content-Type": "application/json", "Date": "Mon, 01 Jan 2024", **headers})
+
+
+def record_session(path, meme_ids, shard=None):
+    # Один прогон: создание мема, два чтения одного мема и чтение второго
+    recorder = Cassette()
+    recorder.open(path, "record", shard=shard)
+    first, second = meme_ids
+    recorder.record(recorder.key("POST", "/meme", {}, {"json": {"text": "a"}}), recorded_response(200, b'{"id": 1}'))
+    recorder.record(recorder.key("GET", f"/meme/{first}", {}, {}), recorded_response(200, b"first read"))
+    recorder.record(recorder.key("GET", f"/meme/{first}", {}, {}), recorded_response(200, b"second read"))
+    recorder.record(recorder.key("PUT", f"/meme/{second}", {}, {"json": {"id": second, "text": "b"}}),
+                    recorded_response(200, b"updated"))
+    recorder.close()
+    return recorder.stats
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Кассеты")
+@allure.title("Записанные ответы воспроизводятся по порядку с псевдонимами id")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "cassette")
+def test_cassette_record_and_replay_with_id_aliases(tmp_path):
+    path = str(tmp_path / "memes")
+    assert record_session(path, (17, 42))["recorded"] == 4
+
+    player = Cassette()
+    player.open(path, "replay")
+    try:
+        # В новом прогоне сервер выдал другие id, но в том же порядке появления
+        player.key("POST", "/meme", {}, {"json": {"text": "a"}})
+        get_key = player.key("GET", "/meme/901", {}, {})
+        assert get_key.startswith("GET /meme/#1 ")
+        assert player.play(get_key)["content"] == b"first read"
+        assert player.play(get_key)["content"] == b"second read"
+        assert player.play(get_key)["content"] == b"second read", "После последней записи повторяется последняя"
+
+        put_key = player.key("PUT", "/meme/902", {}, {"json": {"id": 902, "text": "b"}})
+        replayed = player.play(put_key)
+        assert (replayed["status"], replayed["content"]) == (200, b"updated")
+        assert replayed["headers"] == {"Content-Type": "application/json"}, "Изменчивые заголовки не записываются"
+        assert player.play(player.key("GET", "/meme/903", {}, {})) is None, "Незаписанный запрос идет в сеть"
+        assert player.stats == {"recorded": 0, "replayed": 4, "missed": 1}
+    finally:
+        player.close()
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Кассеты")
+@allure.title("Строгий режим читает записи всех воркеров и падает на ненайденном запросе")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "cassette")
+def test_cassette_strict_mode_with_worker_shards(tmp_path):
+    path = str(tmp_path / "memes")
+    record_session(path, (1, 2), shard="gw0")
+    record_session(path, (3, 4), shard="gw1")
+
+    player = Cassette()
+    player.open(path, "strict")
+    try:
+        get_key = player.key("GET", "/meme/5", {}, {})
+        # Одинаковые записи двух воркеров идут подряд
+        assert [player.play(get_key)["content"] for _ in range(4)] == [b"first read", b"second read"] * 2
+        with pytest.raises(CassetteMiss):
+            player.play(player.key("DELETE", "/meme/5", {}, {}))
+    finally:
+        player.close()
+    assert not player.active
+
+
+STREAM_DOCUMENT = json.dumps({
+    "meta": {"skip": [1, {"data": "не этот"}], "note": "скобки ] и } в строке"},
+    "data": [
+        {"id": 12345, "text": "Мем с \"кавычками\" и \\ слэшем", "tags": ["😀", "тег"], "info": {"rate": -1.5e3}},
+        98765,
+        "строка",
+        [True, False, None],
+        {},
+        0.25,
+    ],
+    "after": "не читается",
+}, ensure_ascii=False).encode("utf-8")
+
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Потоковый JSON")
+@allure.title("Элементы массива не зависят от границ кусков, в том числе внутри токенов")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "stream")
+def test_iter_json_array_chunk_boundaries():
+    expected = json.loads(STREAM_DOCUMENT)["data"]
+    # Куски по несколько байтов режут числа, строки, escape-последовательности и символы UTF-8
+    for size in range(1, 8):
+        assert list(iter_json_array(chunked(STREAM_DOCUMENT, size), key="data")) == expected, f"куски по {size} байт"
+    # Два куска с границей в каждой позиции документа
+    for split in range(1, len(STREAM_DOCUMENT)):
+        chunks = [STREAM_DOCUMENT[:split], STREAM_DOCUMENT[split:]]
+        assert list(iter_json_array(chunks, key="data")) == expected, f"граница на байте {split}"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Потоковый JSON")
+@allure.title("Пустые массивы, отсутствующий ключ и некорректный документ")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "stream")
+def test_iter_json_array_edge_cases():
+    assert list(iter_json_array([b" [ ] "])) == []
+    assert list(iter_json_array([b"[1", b"2,", b"3]"])) == [12, 3], "Число на границе куска не обрывается"
+    assert list(iter_json_array([b'{"data": []}'], key="data")) == []
+    assert list(iter_json_array([b'{"other": [1]}'], key="data")) == []
+    assert list(iter_json_array([b"{}"], key="data")) == []
+    with pytest.raises(JsonStreamError):
+        list(iter_json_array([b'{"data": [1]}']))
+    with pytest.raises(JsonStreamError):
+        list(iter_json_array([b"[1, 2"]))
+    with pytest.raises(JsonStreamError):
+        list(iter_json_array([b"[1 2]"]))
+
+
+URL = "http://memes.test"
+
+
+def cached_response(content=b"{}", **headers):
+    return SimpleNamespace(status_code=200, content=content, headers=headers)
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Кэш мемов")
+@allure.title("Запись свежая до истечения TTL, затем перепроверяется или удаляется")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "cache")
+def test_meme_cache_ttl_expiry():
+    clock = FakeClock()
+    cache = MemeCache(enabled=True, ttl=10.0, clock=clock)
+    with_etag, plain = cached_response(ETag='"v1"'), cached_response()
+    cache.store((URL, "/meme/1"), with_etag)
+    cache.store((URL, "/meme/2"), plain)
+
+    clock.advance(9.9)
+    assert cache.lookup((URL, "/meme/1")) == (with_etag, None)
+    clock.advance(0.1)
+    assert cache.lookup((URL, "/meme/1")) == (None, {"If-None-Match": '"v1"'}), "Устаревшая запись с ETag"
+    assert cache.revalidated((URL, "/meme/1")) is with_etag, "304 продлевает запись еще на ttl"
+    clock.advance(9.9)
+    assert cache.lookup((URL, "/meme/1")) == (with_etag, None)
+
+    assert cache.lookup((URL, "/meme/2")) == (None, None), "Устаревшая запись без валидаторов удаляется"
+    assert len(cache) == 1
+    assert cache.stats == {"hits": 2, "misses": 1, "revalidated": 1, "refreshed": 0, "evictions": 0,
+                           "invalidations": 0}
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Кэш мемов")
+@allure.title("Вытесняется давно не использованная запись, объем ограничен числом записей и байтами")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "cache")
+def test_meme_cache_lru_eviction_and_bytes_bound():
+    cache = MemeCache(enabled=True, max_entries=3, max_bytes=100, clock=FakeClock())
+    for meme_id in (1, 2, 3):
+        cache.store((URL, f"/meme/{meme_id}"), cached_response(b"x" * 10))
+    cache.lookup((URL, "/meme/1"))
+    cache.store((URL, "/meme/4"), cached_response(b"x" * 10))
+    assert [key[1] for key in cache._entries] == ["/meme/3", "/meme/1", "/meme/4"], "Вытеснен /meme/2"
+
+    cache.store((URL, "/meme"), cached_response(b"x" * 75))
+    assert [key[1] for key in cache._entries] == ["/meme/1", "/meme/4", "/meme"], "Тела не больше max_bytes"
+    assert cache.size_bytes == 95
+    cache.store((URL, "/meme/5"), cached_response(b"x" * 101))
+    assert (URL, "/meme/5") not in cache._entries, "Тело больше max_bytes не кэшируется"
+    assert cache.stats["evictions"] == 2
+
+    cache.configure(max_bytes=80)
+    assert [key[1] for key in cache._entries] == ["/meme"] and cache.size_bytes == 75
+    with pytest.raises(ValueError):
+        cache.configure(max_entries=0)
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Кэш мемов")
+@allure.title("Изменение мема сбрасывает его запись и список мемов")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "cache")
+def test_meme_cache_invalidation():
+    cache = MemeCache(enabled=True, clock=FakeClock())
+    for path in ("/meme", "/meme/1", "/meme/2"):
+        cache.store((URL, path), cached_response())
+    cache.invalidate(1)
+    assert [key[1] for key in cache._entries] == ["/meme/2"]
+    cache.invalidate()
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+class RecordingHandler:
+    """Обработчик InMemoryTransport, который запоминает запросы и отвечает заданным ответом"""
+
+    def __init__(self, status=200, headers=None, body=b'{"ok": true}'):
+        self.response = (status, headers or {"Content-Type": "application/json"}, body)
+        self.requests = []
+
+    def __call__(self, method, path, headers, body):
+        self.requests.append((method, path, dict(headers), body))
+        return self.response
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Транспорты")
+@allure.title("InMemoryTransport передает обработчику запрос так же, как requests")
+@allure.severity(allure.severity_level.CRITICAL)
+@allure.tag("unit", "transport")
+def test_in_memory_transport_request():
+    handler = RecordingHandler()
+    transport = InMemoryTransport(handler)
+    response = transport.request("post", "http://memes.test//meme?a=1", params={"tag": ["x", "y"]},
+                                 json={"text": "мем"}, headers={"Authorization": "token"})
+    method, path, headers, body = handler.requests[-1]
+    assert (method, path) == ("POST", "/meme?a=1&tag=x&tag=y"), "Ведущие // схлопываются, params дописываются"
+    assert json.loads(body) == {"text": "мем"}
+    assert headers == {"Authorization": "token", "Content-Type": "application/json"}
+    assert (response.status_code, response.reason, response.json()) == (200, "OK", {"ok": True})
+    assert response.request.method == "POST" and response.url == "http://memes.test//meme?a=1&tag=x&tag=y"
+
+    transport.request("PUT", "http://memes.test/meme/1", data={"text": "a b"})
+    assert handler.requests[-1][2:] == ({"Content-Type": "application/x-www-form-urlencoded"}, b"text=a+b")
+    transport.request("GET", "http://memes.test/meme")
+    assert handler.requests[-1][3] == b"", "Запрос без тела передается пустыми байтами"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Транспорты")
+@allure.title("Ответ InMemoryTransport: HEAD без тела, неизвестный статус, ошибка сериализации JSON")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "transport")
+def test_in_memory_transport_response_edge_cases():
+    transport = InMemoryTransport(RecordingHandler(status=599, body=b"oops"))
+    response = transport.request("GET", "http://memes.test/meme")
+    assert (response.status_code, response.reason, response.text) == (599, "", "oops")
+    assert transport.request("HEAD", "http://memes.test/meme").content == b""
+    with pytest.raises(requests.exceptions.InvalidJSONError):
+        transport.request("POST", "http://memes.test/meme", json={"rate": float("nan")})
+    transport.close()
+    assert transport.stats.as_dict()["opened"] == 0, "Соединения не открываются"
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Транспорты")
+@allure.title("Все транспорты реализуют абстрактный Transport")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "transport")
+def test_transports_implement_base_class():
+    assert all(issubclass(transport, Transport) for transport in TRANSPORTS.values())
+    assert TRANSPORTS[HttpPool.name] is HttpPool
+    with pytest.raises(TypeError):
+        Transport()
+    transport = InMemoryTransport(RecordingHandler())
+    with pytest.raises(AttributeError):
+        transport.configure(pool_maxsize=4)
+    transport.configure(handler=RecordingHandler(status=204, body=b""))
+    assert transport.request("DELETE", "http://memes.test/meme/1").status_code == 204
+
+
+@allure.epic("Модульные тесты клиента")
+@allure.feature("Схемы ответов")
+@allure.title("Чужие мемы в общем списке могут иметь лишние поля, но не могут терять обязательные")
+@allure.severity(allure.severity_level.NORMAL)
+@allure.tag("unit", "schema")
+def test_meme_list_schema_allows_extra_fields_of_foreign_memes():
+    own = {"id": 1, "text": "a", "url": "u", "tags": [], "info": {}, "updated_by": "me"}
+    foreign = {**own, "id": 2, "updated_by": "other", "likes": 5}
+    assert MEME_LIST.errors({"data": [own, foreign]}) == []
+    assert MEME.errors(foreign) == ["$.likes: лишнее поле"], "GET /meme/{id} проверяется строго"
+    broken = {key: value for key, value in foreign.items() if key != "url"}
+    assert MEME_LIST.errors({"data": [own, {**broken, "id": "2"}]}) == [
+        "$.data[1].id: ожидался integer, получен string",
+        "$.data[1].url: обязательное поле отсутствует",
+    ]
@@ -0,0 +1,426 @@
+"""Фаззинг тел запросов Memes API некорректными данными
+
+Из эталонных тел (SAMPLE_MEME_PAYLOAD и тело авторизации) генерируются
+мутации: неверные типы, пропущенные и лишние ключи, пустые значения, очень
+длинные строки, глубокая вложенность, тело не-объект. Сначала перебираются
+все одиночные мутации, затем бесконечный поток случайных комбинаций из
+нескольких мутаций. Тела отправляются параллельно через классы эндпоинтов.
+
+Ответы группируются по сигнатуре (эндпоинт, код, форма тела ответа).
+Находка - ответ 5xx, исключение клиента или 2xx на тело, которое по
+контракту должно быть отклонено. Для каждой новой сигнатуры находки тело
+уменьшается (shrinking), пока сигнатура сохраняется.
+
+Пример:
+    python -m tools.fuzz_payloads --local-server --count 100000 --workers 32
+    python -m tools.fuzz_payloads --targets create,update --duration 60 --output fuzz.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from endpoints.authorization import Authorization
+from endpoints.baseapi import BaseAPI
+from endpoints.cleanup import created_memes
+from endpoints.create_meme import CreateMeme
+from endpoints.delete_meme import DeleteMeme
+from endpoints.update_meme import UpdateMeme
+from support.payloads import SAMPLE_MEME_PAYLOAD
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("create", "update", "authorize")
+
+# Поля тел по контракту: точный набор ключей, точный тип (bool - не int), непустые значения
+MEME_FIELDS = {"text": str, "url": str, "tags": list, "info": dict}
+CONTRACTS = {
+    "create": MEME_FIELDS,
+    "update": {"id": int, **MEME_FIELDS},
+    "authorize": {"name": str},
+}
+
+# Значения каждого типа JSON для мутации "неверный тип"
+TYPE_SAMPLES = {
+    "int": 123,
+    "float": 1.5,
+    "bool": True,
+    "null": None,
+    "str": "fuzz",
+    "list": [1, "fuzz"],
+    "dict": {"fuzz": ["fuzz"]},
+}
+
+DEPTHS = (16, 128, 512)
+
+_DIGITS = re.compile(r"\d+")
+
+
+def expects_rejection(target, payload, meme_id=None):
+    """Должен ли сервер отклонить тело по контракту эндпоинта"""
+    fields = CONTRACTS[target]
+    if type(payload) is not dict or payload.keys() != fields.keys():
+        return True
+    if not all(type(payload[name]) is kind and payload[name] for name, kind in fields.items()):
+        return True
+    return target == "update" and payload["id"] != meme_id
+
+
+def _nest(value, depth, container):
+    for _ in range(depth):
+        value = [value] if container is list else {"fuzz": value}
+    return value
+
+
+def single_mutations(payload, max_string):
+    """Все одиночные мутации эталона: (вид, тело)"""
+    for name, sample in TYPE_SAMPLES.items():
+        if not isinstance(sample, dict):
+            yield f"not_object:{name}", sample
+    yield "empty_object", {}
+    yield "extra_key", {**payload, "fuzz": "fuzz"}
+    for key, value in payload.items():
+        for name, sample in TYPE_SAMPLES.items():
+            if type(sample) is not type(value):
+                yield f"wrong_type:{key}:{name}", {**payload, key: sample}
+        yield f"missing_key:{key}", {name: other for name, other in payload.items() if name != key}
+        if value:
+            yield f"empty_value:{key}", {**payload, key: type(value)()}
+        if isinstance(value, str):
+            yield f"oversized_string:{key}", {**payload, key: "x" * max_string}
+            yield f"unicode_string:{key}", {**payload, key: "\u0000퟿\U0001f600" * 8}
+        for depth in DEPTHS:
+            for container in (list, dict):
+                yield (f"deep_nesting:{key}:{container.__name__}:{depth}",
+                       {**payload, key: _nest(value, depth, container)})
+
+
+class _Mutators:
+    """Случайные мутации словаря; каждая возвращает (вид, новое тело) или None"""
+
+    def __init__(self, rng, max_string):
+        self.rng = rng
+        self.max_string = max_string
+        self.all = (self.wrong_type, self.missing_key, self.extra_key, self.empty_value,
+                    self.oversized_string, self.deep_nesting)
+
+    def wrong_type(self, payload):
+        key = self.rng.choice(list(payload))
+        name, sample = self.rng.choice([(name, sample) for name, sample in TYPE_SAMPLES.items()
+                                        if type(sample) is not type(payload[key])])
+        return f"wrong_type:{key}:{name}", {**payload, key: sample}
+
+    def missing_key(self, payload):
+        key = self.rng.choice(list(payload))
+        return f"missing_key:{key}", {name: value for name, value in payload.items() if name != key}
+
+    def extra_key(self, payload):
+        key = f"fuzz_{self.rng.randrange(1000)}"
+        return "extra_key", {**payload, key: self.rng.choice(list(TYPE_SAMPLES.values()))}
+
+    def empty_value(self, payload):
+        key = self.rng.choice(list(payload))
+        value = payload[key]
+        if not isinstance(value, (str, list, dict)):
+            return None
+        return f"empty_value:{key}", {**payload, key: type(value)()}
+
+    def oversized_string(self, payload):
+        keys = [key for key, value in payload.items() if isinstance(value, str)]
+        if not keys:
+            return None
+        key = self.rng.choice(keys)
+        return f"oversized_string:{key}", {**payload, key: "x" * self.rng.randint(256, self.max_string)}
+
+    def deep_nesting(self, payload):
+        key = self.rng.choice(list(payload))
+        container = self.rng.choice((list, dict))
+        depth = self.rng.randint(2, DEPTHS[-1])
+        return f"deep_nesting:{key}:{container.__name__}", {**payload, key: _nest(payload[key], depth, container)}
+
+
+def random_mutations(payload, rng, max_string, max_stack=3):
+    """Бесконечный поток тел: к эталону применяется от 1 до max_stack случайных мутаций"""
+    mutators = _Mutators(rng, max_string)
+    while True:
+        current = payload
+        kinds = []
+        for _ in range(rng.randint(1, max_stack)):
+            if type(current) is not dict or not current:
+                break
+            mutation = rng.choice(mutators.all)(current)
+            if mutation is not None:
+                kinds.append(mutation[0])
+                current = mutation[1]
+        if kinds:
+            yield "+".join(kinds), current
+
+
+def payload_stream(payload, rng, max_string, max_stack=3):
+    """Сначала все одиночные мутации, затем случайные комбинации"""
+    yield from single_mutations(payload, max_string)
+    yield from random_mutations(payload, rng, max_string, max_stack)
+
+
+def simplifications(value):
+    """Более простые варианты значения для shrinking, от самых грубых"""
+    if isinstance(value, dict):
+        for key in value:
+            yield {name: other for name, other in value.items() if name != key}
+        for key, inner in value.items():
+            if isinstance(inner, (dict, list)) and len(value) == 1:
+                yield inner
+            for simpler in simplifications(inner):
+                yield {**value, key: simpler}
+    elif isinstance(value, list):
+        if value:
+            yield []
+        if len(value) == 1:
+            yield value[0]
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+        for index, inner in enumerate(value):
+            for simpler in simplifications(inner):
+                yield value[:index] + [simpler] + value[index + 1:]
+    elif isinstance(value, str):
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+        if value:
+            yield ""
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and value != 0:
+        yield 0
+
+
+def shrink(payload, still_fails, max_steps=200):
+    """Жадно упрощает тело, пока still_fails(тело) истинно; возвращает (тело, шагов)"""
+    steps = 0
+    progress = True
+    while progress and steps < max_steps:
+        progress = False
+        for candidate in simplifications(payload):
+            steps += 1
+            if still_fails(candidate):
+                payload = candidate
+                progress = True
+                break
+            if steps >= max_steps:
+                break
+    return payload, steps
+
+
+def _preview(payload, limit=300):
+    text = json.dumps(payload, ensure_ascii=False, default=str)
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text)} символов)"
+
+
+class FuzzStats:
+    """Счетчики по сигнатурам ответов и находки (потокобезопасно)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = defaultdict(int)
+        self.signatures = {}
+        self.findings = {}
+
+    def record(self, target, kind, payload, signature, finding):
+        with self._lock:
+            self.sent[target] += 1
+            entry = self.signatures.get(signature)
+            if entry is None:
+                entry = self.signatures[signature] = {"count": 0, "kind": kind, "example": _preview(payload)}
+                if finding:
+                    self.findings[signature] = {"target": target, "kind": kind, "reason": finding,
+                                                "payload": payload}
+                    return True
+            entry["count"] += 1
+        return False
+
+
+class PayloadFuzzer:
+    """Отправляет мутированные тела через классы эндпоинтов и ищет неожиданные ответы"""
+
+    def __init__(self, targets=TARGETS, user_name="fuzz_user", seed=None, max_string=65536, max_stack=3,
+                 shrink_steps=200):
+        self.targets = targets
+        self.user_name = user_name
+        self.rng = random.Random(seed)
+        self.max_string = max_string
+        self.max_stack = max_stack
+        self.shrink_steps = shrink_steps
+        self.stats = FuzzStats()
+        self.meme_id = None
+        self.create_api = CreateMeme()
+        self.update_api = UpdateMeme()
+        self.delete_api = DeleteMeme()
+        self.auth_api = Authorization()
+
+    def setup(self):
+        self.auth_api.authorization({"name": self.user_name})
+        if "update" in self.targets:
+            response = self.create_api.create_new_meme(SAMPLE_MEME_PAYLOAD)
+            assert response.status_code == 200, f"Не удалось создать мем для update: {response.status_code}"
+            self.meme_id = response.json()["id"]
+
+    def teardown(self, workers=8):
+        return created_memes.drain(self.delete_api.delete_meme_by_id, workers)
+
+    def base_payload(self, target):
+        if target == "authorize":
+            return {"name": self.user_name}
+        if target == "update":
+            return {"id": self.meme_id, **SAMPLE_MEME_PAYLOAD}
+        return dict(SAMPLE_MEME_PAYLOAD)
+
+    def payloads(self):
+        """Бесконечный поток (эндпоинт, вид мутации, тело) по всем эндпоинтам по очереди"""
+        streams = [self._target_stream(target) for target in self.targets]
+        for stream in itertools.cycle(streams):
+            yield next(stream)
+
+    def _target_stream(self, target):
+        for kind, payload in payload_stream(self.base_payload(target), self.rng, self.max_string, self.max_stack):
+            yield target, kind, payload
+
+    def send(self, target, payload):
+        if target == "create":
+            return self.create_api.create_new_meme(payload)
+        if target == "update":
+            return self.update_api.update_meme_endpoint(self.meme_id, payload)
+        return self.auth_api.send_request("POST", "/authorize", json=payload)
+
+    def probe(self, target, payload):
+        """(сигнатура ответа, причина находки или None)"""
+        try:
+            response = self.send(target, payload)
+        except Exception as ex:
+            return (target, type(ex).__name__, ""), f"исключение {type(ex).__name__}: {ex}"
+        status = response.status_code
+        if 200 <= status < 300 and response.is_json:
+            shape = ",".join(sorted(response.json())) if isinstance(response.json(), dict) else "json"
+        else:
+            shape = _DIGITS.sub("0", response.text[:120])
+        signature = (target, status, shape)
+        if status >= 500:
+            return signature, f"ответ {status}"
+        if status < 300 and expects_rejection(target, payload, self.meme_id):
+            return signature, f"ответ {status} на тело, которое должно быть отклонено"
+        return signature, None
+
+    def execute(self, target, kind, payload):
+        signature, finding = self.probe(target, payload)
+        if self.stats.record(target, kind, payload, signature, finding):
+            logger.warning(f"Новая находка {signature}: {kind}, {finding}")
+
+    def run(self, count=None, duration=None, workers=16):
+        """Отправляет тела, пока не отправлено count или не прошло duration секунд"""
+        stream = self.payloads()
+        if count is not None:
+            stream = itertools.islice(stream, count)
+        deadline = time.perf_counter() + duration if duration else None
+        started = time.perf_counter()
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fuzz") as pool:
+            for item in stream:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(self.execute, *item))
+            for future in in_flight:
+                future.result()
+        return time.perf_counter() - started
+
+    def shrink_findings(self):
+        shrunk = []
+        for signature, finding in self.stats.findings.items():
+            target = finding["target"]
+            payload, steps = shrink(finding["payload"],
+                                    lambda candidate: self.probe(target, candidate)[0] == signature,
+                                    self.shrink_steps)
+            shrunk.append({
+                "signature": list(signature), "kind": finding["kind"], "reason": finding["reason"],
+                "payload": _preview(finding["payload"]), "shrunk": _preview(payload), "shrink_steps": steps,
+            })
+        return shrunk
+
+    def report(self, elapsed, shrunk):
+        total = sum(self.stats.sent.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "sent": total,
+            "payloads_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+            "per_target": {target: {"sent": sent, "payloads_per_second": round(sent / elapsed, 1) if elapsed else 0.0}
+                           for target, sent in sorted(self.stats.sent.items())},
+            "signatures": [{"signature": list(signature), **entry} for signature, entry in
+                           sorted(self.stats.signatures.items(), key=lambda item: -item[1]["count"])],
+            "findings": shrunk,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Фаззинг тел запросов Memes API")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Эндпоинты через запятую (по умолчанию {','.join(TARGETS)})")
+    parser.add_argument("--count", type=int, default=10000, help="Сколько тел отправить (0 - без ограничения)")
+    parser.add_argument("--duration", type=float, help="Ограничение по времени, секунд")
+    parser.add_argument("--workers", type=int, default=16, help="Сколько запросов отправлять параллельно")
+    parser.add_argument("--max-string", type=int, default=65536, help="Максимальная длина длинной строки")
+    parser.add_argument("--max-stack", type=int, default=3, help="Сколько мутаций комбинировать в одном теле")
+    parser.add_argument("--shrink-steps", type=int, default=200, help="Лимит запросов на уменьшение одной находки")
+    parser.add_argument("--url", help="Базовый URL API (по умолчанию BaseAPI.url)")
+    parser.add_argument("--local-server", action="store_true", help="Фаззить локальный Memes API")
+    parser.add_argument("--user-name", default="fuzz_user")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    targets = tuple(target.strip() for target in args.targets.split(","))
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"Неизвестные эндпоинты: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = None
+    if args.local_server:
+        from support.memes_server import MemesServer
+        server = MemesServer().start()
+        BaseAPI.url = server.url
+    elif args.url:
+        BaseAPI.url = args.url
+
+    # Повтор 5xx скрыл бы находку и замедлил бы прогон
+    BaseAPI.retry_policy.configure(max_attempts=1)
+    BaseAPI.transport.configure(pool_maxsize=args.workers)
+    fuzzer = PayloadFuzzer(targets, user_name=args.user_name, seed=args.seed, max_string=args.max_string,
+                           max_stack=args.max_stack, shrink_steps=args.shrink_steps)
+    try:
+        fuzzer.setup()
+        elapsed = fuzzer.run(args.count or None, args.duration, args.workers)
+        shrunk = fuzzer.shrink_findings()
+        fuzzer.teardown(args.workers)
+    finally:
+        BaseAPI.transport.close()
+        if server is not None:
+            server.stop()
+
+    report = fuzzer.report(elapsed, shrunk)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
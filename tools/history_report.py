@@ -0,0 +1,238 @@
+"""Отчет по истории прогонов (support/history.py)
+
+Окно - последние --runs прогонов; из них последние --recent сравниваются с
+остальными (базой). Разделы отчета:
+  - время прогонов: длительность, число тестов и падений, тренд;
+  - замедлившиеся тесты: медиана в свежих прогонах выросла относительно базы;
+  - сдвиг задержки эндпоинтов: распределение времени вызовов изменилось
+    (двухвыборочный критерий Колмогорова-Смирнова, а если отдельные вызовы
+    уже удалены - сравнение медиан по сводкам прогонов);
+  - нестабильные тесты: чередование прошел/упал или большой разброс времени.
+
+Пример:
+    python -m tools.history_report --db logs/history.sqlite3 --runs 50 --recent 5
+    python -m tools.history_report --json > history.json
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import time
+
+from support.history import HistoryStore
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+# Коэффициент критического значения статистики Колмогорова-Смирнова для alpha = 0.01
+KS_COEFFICIENT = 1.628
+
+
+def sparkline(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = high - low or 1.0
+    return "".join(SPARKS[min(int((value - low) / span * len(SPARKS)), len(SPARKS) - 1)] for value in values)
+
+
+def ks_statistic(first, second):
+    """Максимальное расстояние между эмпирическими функциями распределения двух выборок"""
+    first, second = sorted(first), sorted(second)
+    i = j = 0
+    distance = 0.0
+    while i < len(first) and j < len(second):
+        value = min(first[i], second[j])
+        while i < len(first) and first[i] == value:
+            i += 1
+        while j < len(second) and second[j] == value:
+            j += 1
+        distance = max(distance, abs(i / len(first) - j / len(second)))
+    return distance
+
+
+def ks_critical(n, m):
+    return KS_COEFFICIENT * math.sqrt((n + m) / (n * m))
+
+
+def split_runs(runs, recent):
+    """(id первого прогона окна, id первого свежего прогона) или None, если для сравнения мало прогонов"""
+    if len(runs) <= recent:
+        return None
+    return runs[0]["id"], runs[-recent]["id"]
+
+
+def slowing_tests(results, first_recent, threshold, min_delta_ms, min_samples=2):
+    slower = []
+    for nodeid, rows in results.items():
+        base = [duration for run_id, outcome, duration, _ in rows if run_id < first_recent and outcome == "passed"]
+        fresh = [duration for run_id, outcome, duration, _ in rows if run_id >= first_recent and outcome == "passed"]
+        if len(base) < min_samples or len(fresh) < min_samples:
+            continue
+        base_median, fresh_median = statistics.median(base), statistics.median(fresh)
+        delta_ms = (fresh_median - base_median) * 1000
+        if delta_ms >= min_delta_ms and fresh_median >= base_median * threshold:
+            slower.append({
+                "test": nodeid,
+                "base_ms": round(base_median * 1000, 1),
+                "recent_ms": round(fresh_median * 1000, 1),
+                "ratio": round(fresh_median / base_median, 2) if base_median else None,
+                "trend": sparkline([duration for _, _, duration, _ in rows]),
+            })
+    return sorted(slower, key=lambda item: item["base_ms"] - item["recent_ms"])
+
+
+def endpoint_shifts(store, summaries, first_run, first_recent, last_run, min_delta_ms):
+    shifts = []
+    for key, rows in summaries.items():
+        base_rows = [row for row in rows if row[0] < first_recent]
+        fresh_rows = [row for row in rows if row[0] >= first_recent]
+        if not base_rows or not fresh_rows:
+            continue
+        base = store.call_samples(key, first_run, first_recent - 1)
+        fresh = store.call_samples(key, first_recent, last_run)
+        if len(base) >= 5 and len(fresh) >= 5:
+            base_p50, fresh_p50 = statistics.median(base), statistics.median(fresh)
+            base_p95, fresh_p95 = _p95(base), _p95(fresh)
+            distance, critical = ks_statistic(base, fresh), ks_critical(len(base), len(fresh))
+            shifted = distance > critical
+            method = "ks"
+        else:
+            # Отдельные вызовы удалены - сравниваем медианы сводок прогонов
+            base_p50 = statistics.median(row[2] for row in base_rows)
+            fresh_p50 = statistics.median(row[2] for row in fresh_rows)
+            base_p95 = statistics.median(row[3] for row in base_rows)
+            fresh_p95 = statistics.median(row[3] for row in fresh_rows)
+            distance = critical = None
+            shifted = True
+            method = "summary"
+        if shifted and max(abs(fresh_p50 - base_p50), abs(fresh_p95 - base_p95)) >= min_delta_ms:
+            shifts.append({
+                "endpoint": key, "method": method,
+                "base_p50_ms": round(base_p50, 1), "recent_p50_ms": round(fresh_p50, 1),
+                "base_p95_ms": round(base_p95, 1), "recent_p95_ms": round(fresh_p95, 1),
+                "ks_distance": None if distance is None else round(distance, 3),
+                "ks_critical": None if critical is None else round(critical, 3),
+                "trend_p50": sparkline([row[2] for row in rows]),
+            })
+    return sorted(shifts, key=lambda item: -abs(item["recent_p50_ms"] - item["base_p50_ms"]))
+
+
+def unstable_tests(results, cv_threshold, min_mean_ms):
+    unstable = []
+    for nodeid, rows in results.items():
+        outcomes = [outcome for _, outcome, _, _ in rows if outcome in ("passed", "failed", "error")]
+        flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+        failures = sum(outcome != "passed" for outcome in outcomes)
+        durations = [duration for _, outcome, duration, _ in rows if outcome == "passed"]
+        cv = None
+        if len(durations) >= 3:
+            mean = statistics.fmean(durations)
+            if mean * 1000 >= min_mean_ms:
+                cv = statistics.stdev(durations) / mean
+        reasons = []
+        if flips and failures < len(outcomes):
+            reasons.append(f"прошел/упал сменялись {flips} раз, падений {failures} из {len(outcomes)}")
+        if cv is not None and cv >= cv_threshold:
+            reasons.append(f"разброс времени CV {cv:.2f}")
+        if reasons:
+            unstable.append({
+                "test": nodeid, "flips": flips, "failures": failures, "runs": len(outcomes),
+                "cv": None if cv is None else round(cv, 2), "reasons": reasons,
+                "outcomes": "".join("." if outcome == "passed" else "F" for outcome in outcomes),
+            })
+    return sorted(unstable, key=lambda item: (-item["flips"], -(item["cv"] or 0)))
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[max(0, math.ceil(0.95 * len(values)) - 1)]
+
+
+def build_report(store, runs=50, recent=5, slowdown=1.3, min_delta_ms=20.0, cv=0.5, min_mean_ms=10.0):
+    window = store.runs(runs)
+    report = {
+        "runs": [{**run, "started_at": time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started_at"])),
+                  "duration": round(run["duration"], 2)} for run in window],
+        "duration_trend": sparkline([run["duration"] for run in window]),
+        "slowing_tests": [], "endpoint_shifts": [], "unstable_tests": [],
+    }
+    if not window:
+        return report
+    results = store.results(window[0]["id"])
+    report["unstable_tests"] = unstable_tests(results, cv, min_mean_ms)
+    bounds = split_runs(window, recent)
+    if bounds is not None:
+        first_run, first_recent = bounds
+        report["slowing_tests"] = slowing_tests(results, first_recent, slowdown, min_delta_ms)
+        report["endpoint_shifts"] = endpoint_shifts(store, store.endpoint_summaries(first_run), first_run,
+                                                    first_recent, window[-1]["id"], min_delta_ms)
+    return report
+
+
+def format_report(report, recent):
+    lines = [f"Прогоны ({len(report['runs'])}), длительность: {report['duration_trend']}"]
+    for run in report["runs"][-10:]:
+        lines.append(f"  #{run['id']} {run['started_at']}  {run['duration']:>8.2f} с  тестов {run['tests']:>4}  "
+                     f"упало {run['failed']:>3}  воркеров {run['workers']}")
+    if len(report["runs"]) <= recent:
+        lines.append(f"Для сравнения нужно больше {recent} прогонов")
+
+    lines.append("")
+    lines.append(f"Замедлившиеся тесты (последние {recent} прогонов против предыдущих):")
+    for item in report["slowing_tests"] or [None]:
+        if item is None:
+            lines.append("  нет")
+            break
+        lines.append(f"  {item['base_ms']:>8.1f} -> {item['recent_ms']:>8.1f} мс (x{item['ratio']})  "
+                     f"{item['trend']}  {item['test']}")
+
+    lines.append("")
+    lines.append("Сдвиг задержки эндпоинтов:")
+    for item in report["endpoint_shifts"] or [None]:
+        if item is None:
+            lines.append("  нет")
+            break
+        test = (f"KS {item['ks_distance']} > {item['ks_critical']}" if item["method"] == "ks"
+                else "по сводкам прогонов")
+        lines.append(f"  {item['endpoint']}: p50 {item['base_p50_ms']} -> {item['recent_p50_ms']} мс, "
+                     f"p95 {item['base_p95_ms']} -> {item['recent_p95_ms']} мс ({test})  {item['trend_p50']}")
+
+    lines.append("")
+    lines.append("Нестабильные тесты:")
+    for item in report["unstable_tests"] or [None]:
+        if item is None:
+            lines.append("  нет")
+            break
+        lines.append(f"  {item['outcomes'][-30:]:<30}  {'; '.join(item['reasons'])}  {item['test']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отчет по истории прогонов тестов")
+    parser.add_argument("--db", default=os.path.join("logs", "history.sqlite3"), help="Файл истории")
+    parser.add_argument("--runs", type=int, default=50, help="Сколько последних прогонов анализировать")
+    parser.add_argument("--recent", type=int, default=5, help="Сколько последних прогонов сравнивать с остальными")
+    parser.add_argument("--slowdown", type=float, default=1.3, help="Во сколько раз должна вырасти медиана теста")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="Минимальный рост времени, мс")
+    parser.add_argument("--cv", type=float, default=0.5, help="Порог коэффициента вариации времени теста")
+    parser.add_argument("--min-mean-ms", type=float, default=10.0,
+                        help="Разброс времени проверяется только у тестов не быстрее, мс")
+    parser.add_argument("--json", action="store_true", help="Вывести отчет в JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"Файл истории не найден: {args.db}")
+    store = HistoryStore(args.db)
+    try:
+        report = build_report(store, args.runs, args.recent, args.slowdown, args.min_delta_ms, args.cv,
+                              args.min_mean_ms)
+    finally:
+        store.close()
+    print(json.dumps(report, indent=2, ensure_ascii=False) if args.json else format_report(report, args.recent))
+    return report
+
+
+if __name__ == "__main__":
+    main()
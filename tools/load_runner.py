@@ -0,0 +1,316 @@
+"""Нагрузочный прогон Memes API на классах эндпоинтов
+
+Открытая модель (--rps): запросы приходят с заданной частотой независимо от ответов,
+задержка считается от запланированного момента старта (без coordinated omission).
+Закрытая модель (--users): N пользователей выполняют операции друг за другом.
+
+Пример:
+    python -m tools.load_runner --local-server --rps 200 --duration 30 \\
+        --mix create=1,get=6,update=2,delete=1,authorize=0.1 --output load.json
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from endpoints.authorization import Authorization
+from endpoints.baseapi import BaseAPI
+from endpoints.create_meme import CreateMeme
+from endpoints.credentials import credentials
+from endpoints.delete_meme import DeleteMeme
+from endpoints.get_meme import GetMeme
+from endpoints.retry import RetryPolicy
+from endpoints.timing import timings
+from endpoints.update_meme import UpdateMeme
+from support.latency_budget import percentile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = "create=1,get=6,update=2,delete=1,authorize=0.1"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in LoadRunner.OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Неизвестная операция: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadStats:
+    """Задержки и ошибки по операциям (потокобезопасно)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.skipped = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation, latency, status=None, error=False):
+        with self._lock:
+            self.latencies[operation].append(latency)
+            if status is not None:
+                self.statuses[operation][status] += 1
+            if error:
+                self.errors[operation] += 1
+
+    def skip(self, operation):
+        """Операция не выполнена: не было мема, над которым ее выполнить"""
+        with self._lock:
+            self.skipped[operation] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        all_latencies = []
+        with self._lock:
+            for operation in sorted(set(self.latencies) | set(self.skipped)):
+                values = sorted(self.latencies[operation])
+                all_latencies.extend(values)
+                endpoints[operation] = self._summary(values, self.errors[operation], elapsed)
+                endpoints[operation]["statuses"] = dict(self.statuses[operation])
+                endpoints[operation]["skipped"] = self.skipped[operation]
+            total_errors = sum(self.errors.values())
+            total_skipped = sum(self.skipped.values())
+        total = self._summary(sorted(all_latencies), total_errors, elapsed)
+        total["skipped"] = total_skipped
+        return {"total": total, "endpoints": endpoints}
+
+    @staticmethod
+    def _summary(values, errors, elapsed):
+        count = len(values)
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": _ms(percentile(values, 50)),
+                "p95": _ms(percentile(values, 95)),
+                "p99": _ms(percentile(values, 99)),
+                "max": _ms(values[-1] if values else None),
+                "mean": _ms(sum(values) / count if count else None),
+            },
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class LoadRunner:
+    """Запускает взвешенную смесь операций create/get/list/update/delete/authorize"""
+
+    OPERATIONS = ("create", "get", "list", "update", "delete", "authorize")
+
+    def __init__(self, mix, user_name="load_user", seed=None):
+        self.mix = mix
+        self.user_name = user_name
+        self.stats = LoadStats()
+        self._operations = list(mix)
+        self._weights = [mix[name] for name in self._operations]
+        self._random = random.Random(seed)
+        self._meme_ids = []
+        self._ids_lock = threading.Lock()
+        self.create_api = CreateMeme()
+        self.get_api = GetMeme()
+        self.update_api = UpdateMeme()
+        self.delete_api = DeleteMeme()
+        self.auth_api = Authorization()
+
+    def setup(self, memes=10):
+        """Авторизация и начальные мемы для get/update/delete
+
+        Операции над id не создают мемы сами: создание не должно попадать
+        в их задержки. Когда мемов нет, операция пропускается (skipped в отчете).
+        """
+        self.auth_api.authorization({"name": self.user_name})
+        for _ in range(memes):
+            response = self._op_create()
+            if response.status_code != 200:
+                logger.warning(f"Не удалось создать начальный мем: {response.status_code}")
+
+    def teardown(self):
+        with self._ids_lock:
+            meme_ids, self._meme_ids = self._meme_ids, []
+        for meme_id in meme_ids:
+            self.delete_api.delete_meme_by_id(meme_id)
+
+    def pick_operation(self):
+        return self._random.choices(self._operations, self._weights)[0]
+
+    def execute(self, operation, scheduled_at=None):
+        started = time.perf_counter()
+        try:
+            response = getattr(self, f"_op_{operation}")()
+            if response is None:
+                self.stats.skip(operation)
+                return
+            status = response.status_code
+            error = status >= 400
+        except Exception as ex:
+            logger.error(f"Операция {operation} завершилась исключением: {ex}")
+            status, error = type(ex).__name__, True
+        finished = time.perf_counter()
+        self.stats.record(operation, finished - (scheduled_at or started), status, error)
+
+    def run_open(self, rps, duration, max_in_flight=256, poisson=False):
+        """Открытая модель: запросы с частотой rps в течение duration секунд"""
+        interval = 1.0 / rps
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load") as pool:
+            started = time.perf_counter()
+            next_at = started
+            while next_at < started + duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.execute, self.pick_operation(), next_at)
+                next_at += self._random.expovariate(rps) if poisson else interval
+        return time.perf_counter() - started
+
+    def run_closed(self, users, duration, think_time=0.0):
+        """Закрытая модель: users пользователей выполняют операции без пауз (или с think_time)"""
+        started = time.perf_counter()
+        deadline = started + duration
+
+        def user_loop():
+            while time.perf_counter() < deadline:
+                self.execute(self.pick_operation())
+                if think_time:
+                    time.sleep(think_time)
+
+        threads = [threading.Thread(target=user_loop, name=f"user-{i}") for i in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def _payload(self, meme_id=None):
+        payload = {
+            "text": "Load test meme",
+            "url": "https://example.com/load.jpg",
+            "tags": ["load", "test"],
+            "info": {"source": "load_runner"},
+        }
+        if meme_id is not None:
+            payload["id"] = meme_id
+        return payload
+
+    def _take_id(self, remove=False):
+        """Случайный id из созданных мемов или None, если их не осталось"""
+        with self._ids_lock:
+            if not self._meme_ids:
+                return None
+            index = self._random.randrange(len(self._meme_ids))
+            return self._meme_ids.pop(index) if remove else self._meme_ids[index]
+
+    def _op_create(self):
+        response = self.create_api.create_new_meme(self._payload())
+        if response.status_code == 200:
+            with self._ids_lock:
+                self._meme_ids.append(response.json()["id"])
+        return response
+
+    def _op_get(self):
+        meme_id = self._take_id()
+        return None if meme_id is None else self.get_api.get_meme_by_id_endpoint(meme_id)
+
+    def _op_list(self):
+        return self.get_api.get_all_memes_endpoint()
+
+    def _op_update(self):
+        meme_id = self._take_id()
+        return None if meme_id is None else self.update_api.update_meme_endpoint(meme_id, self._payload(meme_id))
+
+    def _op_delete(self):
+        meme_id = self._take_id(remove=True)
+        return None if meme_id is None else self.delete_api.delete_meme_by_id(meme_id)
+
+    def _op_authorize(self):
+        # Новый токен не должен заменить токен, с которым работают остальные операции
+        with credentials.use(credentials.get()):
+            return self.auth_api.authorization({"name": self.user_name})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон Memes API")
+    model = parser.add_mutually_exclusive_group(required=True)
+    model.add_argument("--rps", type=float, help="Открытая модель: запросов в секунду")
+    model.add_argument("--users", type=int, help="Закрытая модель: число одновременных пользователей")
+    parser.add_argument("--duration", type=float, default=10, help="Длительность прогона, секунд")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Веса операций (по умолчанию {DEFAULT_MIX})")
+    parser.add_argument("--poisson", action="store_true", help="Пуассоновский поток вместо равномерного (--rps)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Лимит одновременных запросов (--rps)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Пауза пользователя между операциями (--users)")
+    parser.add_argument("--url", help="Базовый URL API (по умолчанию BaseAPI.url)")
+    parser.add_argument("--local-server", action="store_true", help="Нагружать локальный Memes API")
+    parser.add_argument("--initial-memes", type=int, default=10,
+                        help="Сколько мемов создать до прогона для операций get/update/delete")
+    parser.add_argument("--user-name", default="load_user")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = None
+    if args.local_server:
+        from support.memes_server import MemesServer
+        server = MemesServer().start()
+        BaseAPI.url = server.url
+    elif args.url:
+        BaseAPI.url = args.url
+
+    # Повторы и автомат исказили бы задержки и долю ошибок: каждый запрос отправляется один раз
+    BaseAPI.retry_policy = RetryPolicy(max_attempts=1, breaker_threshold=None)
+    concurrency = args.users or args.max_in_flight
+    BaseAPI.transport.configure(pool_maxsize=concurrency)
+    runner = LoadRunner(args.mix, user_name=args.user_name, seed=args.seed)
+    try:
+        try:
+            runner.setup(args.initial_memes)
+            # Начальные мемы не входят в замеры прогона
+            timings.reset()
+            if args.rps:
+                elapsed = runner.run_open(args.rps, args.duration, args.max_in_flight, args.poisson)
+            else:
+                elapsed = runner.run_closed(args.users, args.duration, args.think_time)
+        finally:
+            runner.teardown()
+    finally:
+        BaseAPI.transport.close()
+        if server is not None:
+            server.stop()
+
+    report = {
+        "model": "open" if args.rps else "closed",
+        "config": {
+            "rps": args.rps, "users": args.users, "duration_s": args.duration,
+            "mix": args.mix, "poisson": args.poisson, "url": BaseAPI.url,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "connections": BaseAPI.transport.stats.as_dict(),
+        "retries": BaseAPI.retry_policy.metrics.as_dict(),
+        "phases": timings.report()["endpoints"],
+        **runner.stats.report(elapsed),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
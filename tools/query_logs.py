@@ -0,0 +1,191 @@
+"""Поиск по логам запусков (logs/test_run_*) по тесту, эндпоинту, статусу и уровню
+
+Сегменты, в которых по индексу (<сегмент>.idx.json) нет нужного теста,
+эндпоинта, статуса или времени, пропускаются без распаковки. Остальные
+читаются потоком, сжатые (.gz, .zst) - без распаковки на диск.
+
+В jsonl-логах тест, эндпоинт и статус есть в каждой записи. В текстовых они
+восстанавливаются по строкам "Запуск теста: ...", "→ HTTP ..." и "← Response: ...".
+
+Пример:
+    python -m tools.query_logs --test test_create_meme_success
+    python -m tools.query_logs --endpoint "GET /meme/{id}" --status 404 --level WARNING
+    python -m tools.query_logs --since "2026-10-18 12:00" --grep "Сетевая ошибка" --stats
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+from endpoints.retry import endpoint_template
+from support.run_logs import DATE_FORMAT, list_segments, open_segment, read_index, segment_format
+
+_TEXT_RECORD = re.compile(r"^(?P<ts>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) - (?P<logger>\S+) - (?P<level>[A-Z]+) - "
+                          r"(?P<msg>.*)$")
+_TEST_START = re.compile(r"^Запуск теста: (?P<name>.+)$")
+_TEST_END = re.compile(r"^Завершение теста: ")
+_REQUEST = re.compile(r"^→ HTTP (?P<method>\S+) (?P<url>\S+)")
+_RESPONSE = re.compile(r"^← Response: (?P<status>\S+)")
+
+
+class Query:
+    def __init__(self, test=None, endpoint=None, status=None, level=None, since=None, until=None, grep=None):
+        self.test = test
+        # В текстовом логе есть только имя теста, без файла
+        self.test_name = test.rsplit("::", 1)[-1] if test else None
+        self.endpoint = endpoint
+        self.status = None if status is None else str(status)
+        self.level = logging.getLevelName(level) if level else None
+        self.since = since
+        self.until = until
+        # Время записей сравнивается строками: формат DATE_FORMAT упорядочен так же, как время
+        self.since_text = None if since is None else time.strftime(DATE_FORMAT, time.localtime(since))
+        self.until_text = None if until is None else time.strftime(DATE_FORMAT, time.localtime(until))
+        self.grep = re.compile(grep) if grep else None
+
+    def skips(self, index):
+        """True, если по индексу в сегменте точно нет подходящих записей"""
+        if index is None:
+            return False
+        if self.test and not any(self.test in test for test in index["tests"]):
+            return True
+        if self.endpoint and not any(self.endpoint in endpoint for endpoint in index["endpoints"]):
+            return True
+        if self.status and self.status not in index["statuses"]:
+            return True
+        if self.level and not any(logging.getLevelName(name) >= self.level for name in index["levels"]):
+            return True
+        if index["first"] is None:
+            return True
+        # Время в индексе - секунды epoch, в строках лога - с точностью до секунды
+        if self.since is not None and index["last"] < self.since - 1:
+            return True
+        return self.until is not None and index["first"] > self.until + 1
+
+    def matches(self, level, ts, message, test, endpoint, status, by_name=False):
+        wanted_test = self.test_name if by_name else self.test
+        if wanted_test and (test is None or wanted_test not in test):
+            return False
+        if self.endpoint and (endpoint is None or self.endpoint not in endpoint):
+            return False
+        if self.status and str(status) != self.status:
+            return False
+        if self.level and logging.getLevelName(level) < self.level:
+            return False
+        if self.since_text is not None and ts[:19] < self.since_text:
+            return False
+        if self.until_text is not None and ts[:19] > self.until_text:
+            return False
+        return self.grep is None or self.grep.search(message) is not None
+
+
+def _parse_time(value):
+    for pattern in (DATE_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, pattern))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Время в формате 'ГГГГ-ММ-ДД[ ЧЧ:ММ[:СС]]': {value}")
+
+
+def scan_jsonl(lines, query):
+    # Быстрая проверка подстрокой до разбора JSON: в строке точно должен быть искомый тест/эндпоинт
+    needles = [value for value in (query.test, query.endpoint) if value and '"' not in value and "\\" not in value]
+    for line in lines:
+        if any(needle not in line for needle in needles):
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if query.matches(entry["level"], entry["ts"], entry["msg"], entry.get("test"), entry.get("endpoint"),
+                         entry.get("status")):
+            yield line.rstrip("\n")
+
+
+def scan_text(lines, query):
+    """Многострочная запись (например, traceback) выводится целиком"""
+    test = endpoint = status = None
+    record = None
+    for line in lines:
+        line = line.rstrip("\n")
+        match = _TEXT_RECORD.match(line)
+        if match is None:
+            if record is not None:
+                record.append(line)
+            continue
+        if record is not None and record[0]:
+            yield from record[1:]
+        message = match.group("msg")
+        started = _TEST_START.match(message)
+        if started:
+            test, endpoint, status = started.group("name"), None, None
+        elif _TEST_END.match(message):
+            endpoint = status = None
+        request = _REQUEST.match(message)
+        if request:
+            endpoint = f"{request.group('method').upper()} {endpoint_template(urlsplit(request.group('url')).path)}"
+            status = None
+        response = _RESPONSE.match(message)
+        if response:
+            status = response.group("status")
+        level, ts = match.group("level"), match.group("ts")
+        record = [query.matches(level, ts, message, test, endpoint, status, by_name=True), line]
+    if record is not None and record[0]:
+        yield from record[1:]
+
+
+def query_logs(directory, query, out=sys.stdout):
+    stats = {"segments": 0, "skipped": 0, "lines": 0}
+    for path in list_segments(directory):
+        stats["segments"] += 1
+        if query.skips(read_index(path)):
+            stats["skipped"] += 1
+            continue
+        scan = scan_jsonl if segment_format(path) == "jsonl" else scan_text
+        try:
+            with open_segment(path) as lines:
+                for line in scan(lines, query):
+                    out.write(line + "\n")
+                    stats["lines"] += 1
+        except BrokenPipeError:
+            raise
+        except (OSError, EOFError) as ex:
+            # Сегмент, который сейчас пишется или сжимается, может быть неполным
+            print(f"{path}: {ex}", file=sys.stderr)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск по логам запусков тестов")
+    parser.add_argument("--dir", default="logs", help="Каталог логов")
+    parser.add_argument("--test", help="Тест: подстрока nodeid или имени теста")
+    parser.add_argument("--endpoint", help='Эндпоинт: подстрока шаблона, например "GET /meme/{id}"')
+    parser.add_argument("--status", help="HTTP-статус ответа")
+    parser.add_argument("--level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="Минимальный уровень записи")
+    parser.add_argument("--since", type=_parse_time, help="Записи не раньше, 'ГГГГ-ММ-ДД[ ЧЧ:ММ[:СС]]'")
+    parser.add_argument("--until", type=_parse_time, help="Записи не позже")
+    parser.add_argument("--grep", help="Регулярное выражение по тексту сообщения")
+    parser.add_argument("--stats", action="store_true", help="Напечатать, сколько сегментов пропущено по индексу")
+    args = parser.parse_args(argv)
+
+    query = Query(args.test, args.endpoint, args.status, args.level, args.since, args.until, args.grep)
+    try:
+        stats = query_logs(args.dir, query)
+    except BrokenPipeError:
+        # Вывод оборван (например, | head): остаток не нужен
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return None
+    if args.stats:
+        print(f"Сегментов: {stats['segments']}, пропущено по индексу: {stats['skipped']}, "
+              f"найдено строк: {stats['lines']}", file=sys.stderr)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
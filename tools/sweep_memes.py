@@ -0,0 +1,58 @@
+"""Удаление мемов, оставшихся от прошлых прогонов
+
+Если прогон упал или был прерван, созданные тестами мемы остаются на сервере
+и замедляют GET /meme. Скрипт авторизуется под именем тестового пользователя
+и удаляет все мемы с updated_by == этому имени.
+
+Пример:
+    python -m tools.sweep_memes --user test_user --dry-run
+    python -m tools.sweep_memes --user test_user --workers 16
+"""
+import argparse
+import logging
+
+from endpoints.authorization import Authorization
+from endpoints.baseapi import BaseAPI
+from endpoints.cleanup import delete_concurrently
+from endpoints.delete_meme import DeleteMeme
+from endpoints.get_meme import GetMeme
+
+logger = logging.getLogger(__name__)
+
+
+def find_orphans(user_name):
+    response = GetMeme().get_all_memes_endpoint()
+    assert response.status_code == 200, f"Не удалось получить список мемов: {response.status_code}"
+    return sorted(meme["id"] for meme in response.json()["data"] if meme.get("updated_by") == user_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Удаление мемов, оставшихся от прошлых прогонов")
+    parser.add_argument("--user", default="test_user", help="Имя, под которым создавали мемы тесты")
+    parser.add_argument("--url", help="Базовый URL API (по умолчанию BaseAPI.url)")
+    parser.add_argument("--workers", type=int, default=8, help="Сколько мемов удалять параллельно")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет удалено")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s - %(levelname)s - %(message)s")
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+    if args.url:
+        BaseAPI.url = args.url
+
+    BaseAPI.transport.configure(pool_maxsize=args.workers)
+    try:
+        Authorization().authorization({"name": args.user})
+        orphans = find_orphans(args.user)
+        logger.info(f"Найдено мемов пользователя {args.user}: {len(orphans)}")
+        if args.dry_run:
+            print("\n".join(str(meme_id) for meme_id in orphans))
+            return {"found": len(orphans), "deleted": 0, "failed": 0}
+        result = delete_concurrently(orphans, DeleteMeme().delete_meme_by_id, args.workers)
+    finally:
+        BaseAPI.transport.close()
+    return {"found": len(orphans), **result}
+
+
+if __name__ == "__main__":
+    main()